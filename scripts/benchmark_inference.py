@@ -0,0 +1,100 @@
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+import numpy as np
+import pandas as pd
+
+from manufacturing_dashboard.artifacts import PREDICTORS, load_saved_artifact
+from manufacturing_dashboard.data import load_ai4i_split
+from manufacturing_dashboard.model import AI4I_FEATURES, EXPLANATION_METHODS, feature_attributions
+
+
+def rows_per_second(function, rows, min_seconds):
+    function()
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return calls * rows / elapsed
+
+
+def single_row_latency(model, rows, samples):
+    timings = []
+    for position in range(samples):
+        row = rows.iloc[[position % len(rows)]]
+        started = time.perf_counter()
+        model.predict_proba(row)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {f"p{percentile}_ms": round(float(value), 3) for percentile, value in zip((50, 99), np.percentile(timings, (50, 99)))}
+
+
+def explanation_ms(model, batch, baselines, method, min_seconds):
+    rows_per_call = rows_per_second(lambda: feature_attributions(model, batch, baselines, method), 1, min_seconds)
+    return round(1000 / rows_per_call, 3)
+
+
+def crossover(timings):
+    """Largest batch size up to which Shapley attributions are no slower than perturbations."""
+    faster = [size for size, methods in timings.items() if methods["shapley"] <= methods["perturbation"]]
+    return max(faster) if faster else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure failure-model throughput and single-row latency for each predictor.")
+    parser.add_argument("--predictors", nargs="+", choices=PREDICTORS, default=list(PREDICTORS), help="Predictors to load the saved artifact with.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000], help="Batch sizes to measure.")
+    parser.add_argument("--min-seconds", type=float, default=2.0, help="Minimum timing window per measurement.")
+    parser.add_argument("--latency-samples", type=int, default=1000, help="Single-row calls timed for the latency percentiles.")
+    parser.add_argument("--explain-sizes", type=int, nargs="*", default=[1, 3, 10, 100, 1000], help="Batch sizes to time each explanation method at.")
+    args = parser.parse_args()
+
+    held_out = load_ai4i_split("test").dropna(subset=AI4I_FEATURES)[AI4I_FEATURES].astype(float)
+    if held_out.empty or load_saved_artifact() is None:
+        sys.exit("The AI4I dataset and a saved model artifact are required for this benchmark.")
+
+    results = {}
+    for predictor in args.predictors:
+        artifact = load_saved_artifact(predictor)
+        model = artifact["model"]
+        throughput = {}
+        for size in args.sizes:
+            repeats = -(-size // len(held_out))
+            batch = pd.concat([held_out] * repeats, ignore_index=True).head(size)
+            throughput[size] = round(rows_per_second(lambda: model.predict_proba(batch), size, args.min_seconds))
+            print(f"{predictor:>8} batch={size:>6} {throughput[size]:>9,} rows/s")
+        latency = single_row_latency(model, held_out, args.latency_samples)
+        print(f"{predictor:>8} single-row p50={latency['p50_ms']:.3f}ms p99={latency['p99_ms']:.3f}ms")
+        results[predictor] = {"rows_per_second": throughput, "single_row_latency": latency}
+
+        explanations = {}
+        for size in args.explain_sizes:
+            batch = pd.concat([held_out] * -(-size // len(held_out)), ignore_index=True).head(size)
+            try:
+                explanations[size] = {
+                    method: explanation_ms(model, batch, artifact.get("feature_medians", {}), method, args.min_seconds)
+                    for method in EXPLANATION_METHODS
+                }
+            except ValueError:
+                break
+            print(f"{predictor:>8} explain batch={size:>6} " + " ".join(f"{method}={ms:.2f}ms" for method, ms in explanations[size].items()))
+        if explanations:
+            results[predictor]["explanation_ms"] = explanations
+            results[predictor]["shapley_max_rows"] = crossover(explanations)
+            print(f"{predictor:>8} Shapley attributions are no slower up to batch={crossover(explanations)}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
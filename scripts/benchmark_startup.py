@@ -0,0 +1,114 @@
+from pathlib import Path
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+APP_PATH = PROJECT_ROOT / "app.py"
+
+# Everything dashboard.py imports before it draws anything.
+STARTUP_MODULES = [
+    "streamlit",
+    "manufacturing_dashboard.data",
+    "manufacturing_dashboard.engine",
+    "manufacturing_dashboard.figures",
+    "manufacturing_dashboard.history",
+    "manufacturing_dashboard.ingestion",
+    "manufacturing_dashboard.model",
+    "manufacturing_dashboard.perf",
+    "manufacturing_dashboard.storage",
+]
+# Training-only and fallback-only dependencies that must stay out of startup.
+DEFERRED_MODULES = ["sklearn", "joblib", "scipy", "plotly.express"]
+IMPORT_BUDGET_SECONDS = 2.0
+FIRST_RENDER_BUDGET_SECONDS = 6.0
+
+IMPORT_PROBE = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+started = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [module for module in {deferred!r} if module in sys.modules]}}))
+"""
+
+# The dashboard resumes from its history database, so point it at an empty one.
+RENDER_PROBE = """
+import json, sys, tempfile, time, warnings
+from pathlib import Path
+sys.path.insert(0, {src!r})
+warnings.simplefilter("ignore")
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+with tempfile.TemporaryDirectory() as directory:
+    import manufacturing_dashboard.storage as storage
+    storage.HISTORY_DB_PATH = Path(directory) / "history.sqlite"
+    app = AppTest.from_file({app!r}, default_timeout=120)
+    app.run()
+    elapsed = time.perf_counter() - started
+    from manufacturing_dashboard.perf import TIMINGS
+    print(json.dumps({{
+        "seconds": elapsed,
+        "exceptions": [str(item.value) for item in app.exception],
+        "render_page_ms": TIMINGS.last("render.page"),
+    }}))
+"""
+
+
+def run_probe(code):
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=PROJECT_ROOT)
+    if completed.returncode != 0:
+        sys.exit(completed.stderr)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time cold dashboard imports and the first render, and fail past a budget.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per measurement; the median is reported.")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_SECONDS, help="Maximum seconds to import the dashboard modules.")
+    parser.add_argument("--render-budget", type=float, default=FIRST_RENDER_BUDGET_SECONDS, help="Maximum seconds from a cold start to the first rendered page.")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the JSON report here.")
+    args = parser.parse_args()
+
+    imports = [
+        run_probe(IMPORT_PROBE.format(src=str(SRC_DIR), modules=STARTUP_MODULES, deferred=DEFERRED_MODULES))
+        for _ in range(args.runs)
+    ]
+    renders = [run_probe(RENDER_PROBE.format(src=str(SRC_DIR), app=str(APP_PATH))) for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "import_seconds": round(statistics.median(run["seconds"] for run in imports), 3),
+        "import_budget_seconds": args.import_budget,
+        "deferred_modules_loaded": sorted({module for run in imports for module in run["loaded"]}),
+        "first_render_seconds": round(statistics.median(run["seconds"] for run in renders), 3),
+        "first_render_budget_seconds": args.render_budget,
+        "render_page_ms": round(statistics.median(run["render_page_ms"] or 0.0 for run in renders), 1),
+        "render_exceptions": sorted({message for run in renders for message in run["exceptions"]}),
+    }
+    failures = []
+    if report["import_seconds"] > args.import_budget:
+        failures.append(f"import took {report['import_seconds']:.2f}s, budget {args.import_budget:.2f}s")
+    if report["deferred_modules_loaded"]:
+        failures.append(f"startup imported {', '.join(report['deferred_modules_loaded'])}")
+    if report["first_render_seconds"] > args.render_budget:
+        failures.append(f"first render took {report['first_render_seconds']:.2f}s, budget {args.render_budget:.2f}s")
+    if report["render_exceptions"]:
+        failures.append("first render raised: " + "; ".join(report["render_exceptions"]))
+    report["failures"] = failures
+
+    payload = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(payload, encoding="utf-8")
+    print(payload)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from pathlib import Path
+import argparse
+import json
+import socket
+import sys
+import time
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from manufacturing_dashboard.data import FAILURE_LABELS, load_ai4i_split
+from manufacturing_dashboard.ingestion import DEFAULT_HOST, DEFAULT_PORT, SENSOR_FIELDS, encode_binary_reading
+
+
+def _readings():
+    test_df = load_ai4i_split("test")
+    columns = ["product_type", "product_id", "udi", *SENSOR_FIELDS, "machine_failure", *FAILURE_LABELS]
+    for record in test_df[columns].astype({"product_type": str}).to_dict(orient="records"):
+        yield {
+            key: value.item() if hasattr(value, "item") else value
+            for key, value in record.items()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream held-out AI4I rows to the ingestion server, standing in for PLCs.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", type=Path, default=None, help="Unix socket path instead of TCP.")
+    parser.add_argument("--rate", type=float, default=30.0, help="Readings per second; 0 sends as fast as possible.")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many readings; 0 loops forever.")
+    parser.add_argument("--binary", action="store_true", help="Send binary frames instead of JSON lines.")
+    args = parser.parse_args()
+
+    if args.unix is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(str(args.unix))
+    else:
+        connection = socket.create_connection((args.host, args.port))
+
+    sent = 0
+    started = time.perf_counter()
+    with connection:
+        while True:
+            for reading in _readings():
+                if args.binary:
+                    connection.sendall(encode_binary_reading(reading))
+                else:
+                    connection.sendall(json.dumps(reading).encode("utf-8") + b"\n")
+                sent += 1
+                if args.limit and sent >= args.limit:
+                    print(f"Sent {sent} readings in {time.perf_counter() - started:.2f}s.")
+                    return
+                if args.rate > 0:
+                    delay = started + sent / args.rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from manufacturing_dashboard.data import STREAM_CHUNK_ROWS, iter_ai4i_chunks, iter_replay_chunks
+from manufacturing_dashboard.replay import DEFAULT_ROWS_PER_SECOND, DEFAULT_TICK_SECONDS, ReplayEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the paced replay engine and report throughput, lag and dropped ticks.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_ROWS_PER_SECOND, help="Target rows per second across the fleet.")
+    parser.add_argument("--tick", type=float, default=DEFAULT_TICK_SECONDS, help="Tick interval in seconds.")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Soak duration.")
+    parser.add_argument("--report-every", type=float, default=2.0, help="Seconds between progress reports.")
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        default=None,
+        help="CSV export in the AI4I schema to replay chunk by chunk instead of the test split.",
+    )
+    parser.add_argument("--chunk-rows", type=int, default=STREAM_CHUNK_ROWS, help="Rows read per chunk with --dataset.")
+    args = parser.parse_args()
+
+    chunks = None
+    if args.dataset is not None:
+        chunks = iter_replay_chunks(iter_ai4i_chunks(args.dataset, args.chunk_rows))
+    engine = ReplayEngine(rows_per_second=args.rate, tick_seconds=args.tick, sink=lambda batch: None, chunks=chunks).start()
+    deadline = time.perf_counter() + args.seconds
+    try:
+        while time.perf_counter() < deadline and engine.running:
+            time.sleep(min(args.report_every, max(deadline - time.perf_counter(), 0)))
+            engine.pop_batches()
+            stats = engine.stats()
+            print(
+                f"{stats['elapsed_seconds']:6.1f}s "
+                f"rows={stats['rows']} "
+                f"rate={stats['achieved_rows_per_second']:.0f}/s "
+                f"lag_mean={stats['lag_ms_mean']:.2f}ms "
+                f"lag_max={stats['lag_ms_max']:.2f}ms "
+                f"dropped_ticks={stats['dropped_ticks']}"
+            )
+    finally:
+        engine.stop()
+    print(json.dumps(engine.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
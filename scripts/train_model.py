@@ -1,4 +1,5 @@
 from pathlib import Path
+import argparse
 import sys
 
 
@@ -11,7 +12,16 @@ from manufacturing_dashboard.training import train_and_save_artifacts
 
 
 def main():
-    report = train_and_save_artifacts()
+    parser = argparse.ArgumentParser(description="Train, compare, tune, and save the failure model.")
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        default=None,
+        help="CSV export in the AI4I schema to stream instead of data/ai4i2020.csv.",
+    )
+    args = parser.parse_args()
+
+    report = train_and_save_artifacts(dataset_path=args.dataset)
     metrics = report["test_metrics"]
     print(f"Saved {report['model_name']} model artifact.")
     print(f"Threshold: {report['chosen_threshold']}")
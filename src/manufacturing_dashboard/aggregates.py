@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+
+KPI_COLUMNS = [
+    "machine_failure",
+    "tool_wear_min",
+    "torque_nm",
+    "units_produced",
+    "production_efficiency",
+    "defect_rate",
+    "energy_usage",
+    "energy_cost",
+]
+GROUP_COLUMN = "machine_type"
+
+
+class RunningAggregates:
+    """Running count, sum, mean and variance per machine and fleet-wide.
+
+    Each appended batch is reduced per machine in one grouped pass and merged
+    into the running totals with Chan's parallel form of Welford's update,
+    for every machine at once, so reading a KPI never rescans history and an
+    update costs the same however many machines report. Missing values are
+    skipped like ``Series.mean()``. The fleet-wide totals are stored under
+    the ``None`` machine key.
+    """
+
+    def __init__(self, columns=KPI_COLUMNS, group_column=GROUP_COLUMN):
+        self.columns = list(columns)
+        self.group_column = group_column
+        self._index = {column: position for position, column in enumerate(self.columns)}
+        self.clear()
+
+    def clear(self):
+        self._positions = {}
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._count = np.zeros((0, len(self.columns)))
+        self._sum = np.zeros((0, len(self.columns)))
+        self._mean = np.zeros((0, len(self.columns)))
+        self._m2 = np.zeros((0, len(self.columns)))
+        self._integer_columns = set()
+
+    def update(self, frame):
+        if frame is None or frame.empty:
+            return
+
+        columns = [column for column in self.columns if column in frame]
+        for column in columns:
+            if pd.api.types.is_integer_dtype(frame[column].dtype) or pd.api.types.is_bool_dtype(frame[column].dtype):
+                self._integer_columns.add(column)
+        values = np.full((len(frame), len(self.columns)), np.nan)
+        for column in columns:
+            values[:, self._index[column]] = frame[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # Group 0 is the fleet; machines follow in order of first appearance.
+        codes = np.zeros(len(frame), dtype=np.int64)
+        machines = []
+        if self.group_column in frame:
+            machine_codes, machines = pd.factorize(frame[self.group_column], use_na_sentinel=False)
+            codes = machine_codes + 1
+        groups = len(machines) + 1
+        self._merge([None, *machines], *_grouped_moments(values, codes, groups))
+
+    def restore(self, totals, integer_columns=()):
+        """Replace the running totals with per-machine ``rows``, ``count``, ``sum`` and ``sum_squares`` arrays.
+
+        Used to resume from a durable store; the fleet-wide totals are summed
+        from the machines.
+        """
+        self.clear()
+        self._integer_columns = set(integer_columns)
+        if not totals:
+            return
+        machines = [None, *totals]
+        groups = [{key: sum(group[key] for group in totals.values()) for key in ("rows", "count", "sum", "sum_squares")}]
+        groups += totals.values()
+        count = np.array([np.asarray(group["count"], dtype=np.float64) for group in groups])
+        total = np.array([np.asarray(group["sum"], dtype=np.float64) for group in groups])
+        sum_squares = np.array([np.asarray(group["sum_squares"], dtype=np.float64) for group in groups])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / count, 0.0)
+            m2 = np.where(count > 0, sum_squares - total * mean, 0.0)
+        self._positions = {machine: position for position, machine in enumerate(machines)}
+        self._rows = np.array([int(group["rows"]) for group in groups], dtype=np.int64)
+        self._count, self._sum, self._mean, self._m2 = count, total, mean, np.maximum(m2, 0.0)
+
+    def _merge(self, machines, rows, count, total, mean, m2):
+        new = [machine for machine in machines if machine not in self._positions]
+        if new:
+            for machine in new:
+                self._positions[machine] = len(self._positions)
+            padding = ((0, len(new)), (0, 0))
+            self._rows = np.pad(self._rows, (0, len(new)))
+            self._count, self._sum, self._mean, self._m2 = (
+                np.pad(array, padding) for array in (self._count, self._sum, self._mean, self._m2)
+            )
+        positions = np.array([self._positions[machine] for machine in machines], dtype=np.int64)
+
+        old_count = self._count[positions]
+        combined = old_count + count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean - self._mean[positions]
+            weight = np.where(combined > 0, count / combined, 0.0)
+        self._mean[positions] += delta * weight
+        self._m2[positions] += m2 + delta ** 2 * old_count * weight
+        self._count[positions] = combined
+        self._sum[positions] += total
+        self._rows[positions] += rows
+
+    def machines(self):
+        return [machine for machine in self._positions if machine is not None]
+
+    def rows(self, machine=None):
+        position = self._positions.get(machine)
+        return int(self._rows[position]) if position is not None else 0
+
+    def count(self, column, machine=None):
+        position = self._positions.get(machine)
+        return int(self._count[position, self._index[column]]) if position is not None else 0
+
+    def sum(self, column, machine=None):
+        position = self._positions.get(machine)
+        total = self._sum[position, self._index[column]] if position is not None else 0.0
+        return int(round(total)) if column in self._integer_columns else float(total)
+
+    def mean(self, column, machine=None):
+        if self.count(column, machine) == 0:
+            return np.nan
+        return float(self._mean[self._positions[machine], self._index[column]])
+
+    def var(self, column, machine=None, ddof=1):
+        count = self.count(column, machine)
+        if count <= ddof:
+            return np.nan
+        return float(self._m2[self._positions[machine], self._index[column]] / (count - ddof))
+
+    def std(self, column, machine=None, ddof=1):
+        return float(np.sqrt(self.var(column, machine, ddof)))
+
+
+def _grouped_moments(values, codes, groups):
+    """Per-group rows, non-null counts, sums, means and squared deviations; group 0 is the whole batch."""
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+
+    def by_group(weights):
+        sums = np.column_stack([np.bincount(codes, weights=column, minlength=groups) for column in weights.T])
+        sums[0] = weights.sum(axis=0)
+        return sums
+
+    rows = np.bincount(codes, minlength=groups)
+    rows[0] = len(codes)
+    count = by_group(present.astype(np.float64))
+    total = by_group(filled)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / count, 0.0)
+    deviations = np.where(present, values - mean[codes], 0.0) ** 2
+    m2 = by_group(deviations)
+    m2[0] = (np.where(present, values - mean[0], 0.0) ** 2).sum(axis=0)
+    return rows, count, total, mean, m2
@@ -1,7 +1,8 @@
-import math
-
+import numpy as np
 import pandas as pd
 
+from manufacturing_dashboard.perf import timed
+
 
 SENSOR_LIMITS = {
     "oil_temp": {"watch": 85, "critical": 110, "label": "oil temperature"},
@@ -13,12 +14,8 @@ FORECAST_HORIZON_READINGS = 6
 HOURLY_DOWNTIME_COST = 850
 PREVENTIVE_MAINTENANCE_COST = 650
 CORRECTIVE_REPAIR_COST = 2400
-
-
-def _scale(value, start, end):
-    if end <= start:
-        return 0
-    return max(0, min(1, (value - start) / (end - start)))
+# Trends read at most 8 readings and confidence stops growing at 40, so older history never changes an insight.
+INSIGHT_LOOKBACK_READINGS = 64
 
 
 def _fmt(value, suffix="", precision=1):
@@ -27,42 +24,87 @@ def _fmt(value, suffix="", precision=1):
     return f"{value:.{precision}f}{suffix}"
 
 
-def _trend(machine_history, column, lookback=6):
-    values = machine_history[column].dropna().tail(lookback)
-    if len(values) < 3:
-        return 0
-    return float(values.iloc[-1] - values.iloc[0])
-
-
-def _trend_per_reading(machine_history, column, lookback=8):
-    values = machine_history[column].dropna().tail(lookback)
-    if len(values) < 3:
-        return 0
-    return float((values.iloc[-1] - values.iloc[0]) / (len(values) - 1))
-
-
-def _recent_average(machine_history, column, lookback=8):
-    values = machine_history[column].dropna().tail(lookback)
-    if values.empty:
-        return math.nan
-    return float(values.mean())
-
-
-def _recent_peak(machine_history, column, lookback=8):
-    values = machine_history[column].dropna().tail(lookback)
-    if values.empty:
-        return math.nan
-    return float(values.max())
-
-
-def _forecast_value(machine_history, column, current_value, horizon=FORECAST_HORIZON_READINGS):
-    trend = max(0, _trend_per_reading(machine_history, column))
-    projected_value = current_value + trend * horizon
-    recent_peak = _recent_peak(machine_history, column)
-    if pd.isna(recent_peak):
-        return projected_value
+def _scale(values, start, end):
+    """Where ``values`` sit between ``start`` and ``end``, clipped to 0..1; missing values scale to 1."""
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        scaled = np.clip((values - start) / (end - start), 0, 1)
+    return np.where(np.isnan(scaled), 1.0, scaled)
+
+
+def _recent_rows(history, machines, lookback=INSIGHT_LOOKBACK_READINGS):
+    """Positions of each machine's newest ``lookback`` history rows, and which machine they belong to.
+
+    Like ``machine_tail``, only scans back from the end of history as far as
+    the fleet needs.
+    """
+    if history.empty or not len(machines):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    lookup = pd.Index(machines)
+    window = len(machines) * lookback * 4
+    while True:
+        start = max(len(history) - window, 0)
+        owner = lookup.get_indexer(history["machine_type"].iloc[start:].to_numpy())
+        counts = np.bincount(owner[owner >= 0], minlength=len(machines))
+        if start == 0 or counts.min() >= lookback:
+            break
+        window *= 4
+    positions = np.flatnonzero(owner >= 0)
+    owner = owner[positions]
+    keep = _rank_from_end(owner, len(machines)) < lookback
+    return start + positions[keep], owner[keep]
+
+
+def _rank_from_end(owner, groups):
+    """0 for each group's last element, 1 for the one before, and so on."""
+    order = np.argsort(owner, kind="stable")
+    sorted_owner = owner[order]
+    group_end = np.cumsum(np.bincount(owner, minlength=groups))
+    ranks = np.empty(len(owner), dtype=np.int64)
+    ranks[order] = group_end[sorted_owner] - 1 - np.arange(len(owner))
+    return ranks
+
+
+def _recent_stats(values, owner, groups):
+    """Per machine, over its newest non-missing ``values``: trends, recent average and recent peak.
+
+    Matches ``dropna().tail(lookback)`` on each machine's history, with the
+    lookbacks the insights use (6 readings for trends, 8 for the rest).
+    """
+    present = ~np.isnan(values)
+    values, owner = values[present], owner[present]
+    ranks = _rank_from_end(owner, groups)
+    available = np.bincount(owner, minlength=groups)
+    newest = np.full(groups, np.nan, dtype=values.dtype)
+    newest[owner[ranks == 0]] = values[ranks == 0]
+
+    def oldest_of(lookback):
+        rows = np.minimum(available, lookback)
+        oldest = np.full(groups, np.nan, dtype=values.dtype)
+        first = ranks == rows[owner] - 1
+        oldest[owner[first]] = values[first]
+        return rows, oldest
+
+    rows, oldest = oldest_of(6)
+    trend = np.where(rows >= 3, (newest - oldest).astype(np.float64), 0.0)
+    rows, oldest = oldest_of(8)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per_reading = np.where(rows >= 3, ((newest - oldest) / np.maximum(rows - 1, 1).astype(values.dtype)).astype(np.float64), 0.0)
+        recent = ranks < 8
+        average = np.bincount(owner[recent], weights=values[recent], minlength=groups) / rows
+    peak = np.full(groups, -np.inf)
+    np.maximum.at(peak, owner[recent], values[recent].astype(np.float64))
+    peak[rows == 0] = np.nan
+    average[rows == 0] = np.nan
+    return {"trend": trend, "trend_per_reading": per_reading, "average": average, "peak": peak}
+
+
+def _forecast(stats, current_value, horizon=FORECAST_HORIZON_READINGS):
+    projected_value = current_value + np.maximum(stats["trend_per_reading"], 0) * horizon
     # Keep recent stress visible so a one-refresh recovery does not erase risk.
-    return max(projected_value, current_value * 0.7 + recent_peak * 0.3)
+    held_value = current_value * 0.7 + stats["peak"] * 0.3
+    with np.errstate(invalid="ignore"):
+        return np.where(held_value > projected_value, held_value, projected_value)
 
 
 def _risk_band(score):
@@ -113,200 +155,187 @@ def _top_cause(causes):
     return max(causes, key=lambda item: item["points"])
 
 
+def _column(frame, column):
+    return frame[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _floats(series):
+    values = series.to_numpy()
+    return values if values.dtype.kind == "f" else series.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+@timed("maintenance_insights")
 def calculate_maintenance_insights(live_df, history_df):
-    """Return explainable predictive and prescriptive maintenance insights."""
+    """Return explainable predictive and prescriptive maintenance insights.
+
+    Every machine is scored at once: its recent trends come from one grouped
+    pass over the newest history rows, and each cause's points are array
+    arithmetic over the fleet. Only the evidence text is built per machine.
+    """
     if live_df.empty:
         return pd.DataFrame()
 
-    history = history_df.copy()
+    history = history_df
     if "timestamp" in history:
-        history["timestamp"] = pd.to_datetime(history["timestamp"], errors="coerce")
-        history = history.sort_values("timestamp")
-
-    insights = []
-
-    for _, row in live_df.iterrows():
-        machine = row["machine_type"]
-        machine_history = history[history["machine_type"] == machine].copy()
-        score = 0
-        causes = []
-        evidence = []
-
-        oil_temp = float(row["oil_temp"])
-        hydraulic_temp = float(row["hydraulic_temp"])
-        bearing_temp = float(row["bearing_temp"])
-        vibration = float(row["vibration"])
-        predicted_oil_temp = _forecast_value(machine_history, "oil_temp", oil_temp)
-        predicted_hydraulic_temp = _forecast_value(machine_history, "hydraulic_temp", hydraulic_temp)
-        predicted_bearing_temp = _forecast_value(machine_history, "bearing_temp", bearing_temp)
-        predicted_vibration = _forecast_value(machine_history, "vibration", vibration)
-        efficiency = float(row["production_efficiency"])
-        defect_rate = float(row["defect_rate"])
-        energy_per_unit = float(row["energy_usage"]) / max(float(row["units_produced"]), 1)
-
-        bearing_vibration_points = (
-            24 * _scale(predicted_bearing_temp, 92, 118)
-            + 28 * _scale(predicted_vibration, 6.5, 11.5)
-            + 8 * _scale(_trend(machine_history, "bearing_temp"), 4, 18)
-            + 8 * _scale(_trend(machine_history, "vibration"), 0.8, 4.0)
-        )
-        if bearing_vibration_points >= 10:
-            causes.append({
-                "reason": "Bearing wear, imbalance, or shaft misalignment",
-                "action": "Inspect bearings, check alignment, and schedule vibration analysis before the next production run.",
-                "points": bearing_vibration_points,
-                "priority": 3,
-            })
-            evidence.append(
-                f"Bearing temp is projected to {_fmt(predicted_bearing_temp, 'C')} and vibration to {_fmt(predicted_vibration, ' mm/s', 2)} within {FORECAST_HORIZON_READINGS} readings."
-            )
-
-        lubrication_points = (
-            28 * _scale(predicted_oil_temp, 82, 112)
-            + 10 * _scale(_trend(machine_history, "oil_temp"), 4, 18)
-            + 8 * _scale(predicted_vibration, 7.0, 11.0)
-        )
-        if lubrication_points >= 10:
-            causes.append({
-                "reason": "Lubrication breakdown or cooling restriction",
-                "action": "Check oil level, oil quality, filters, coolant flow, and heat exchanger performance.",
-                "points": lubrication_points,
-                "priority": 3,
-            })
-            evidence.append(f"Oil temp is projected to {_fmt(predicted_oil_temp, 'C')} from current {_fmt(oil_temp, 'C')}.")
-
-        hydraulic_points = (
-            22 * _scale(predicted_hydraulic_temp, 72, 98)
-            + 8 * _scale(_trend(machine_history, "hydraulic_temp"), 3, 16)
-        )
-        if hydraulic_points >= 8:
-            causes.append({
-                "reason": "Hydraulic fluid overheating or pump strain",
-                "action": "Inspect hydraulic fluid, pump load, reservoir cooling, and blocked return filters.",
-                "points": hydraulic_points,
-                "priority": 2,
-            })
-            evidence.append(f"Hydraulic temp is projected to {_fmt(predicted_hydraulic_temp, 'C')} and may indicate pump or cooling stress.")
-
-        quality_points = (
+        # History from HistoryStore is already time-sorted datetimes; only other frames pay for a sort.
+        timestamps = history["timestamp"]
+        if not (pd.api.types.is_datetime64_any_dtype(timestamps) and timestamps.is_monotonic_increasing):
+            history = history.assign(timestamp=pd.to_datetime(timestamps, errors="coerce")).sort_values("timestamp")
+
+    machines = live_df["machine_type"].to_numpy()
+    fleet = len(machines)
+    positions, owner = _recent_rows(history, machines)
+    recent = history.iloc[positions]
+    # Trends keep the history's own float precision, as the per-machine pandas version did.
+    stats = {column: _recent_stats(_floats(recent[column]), owner, fleet) for column in SENSOR_LIMITS}
+    energy_per_unit_history = recent["energy_usage"] / recent["units_produced"].clip(lower=1)
+    stats["energy_per_unit"] = _recent_stats(_floats(energy_per_unit_history), owner, fleet)
+    history_rows = np.bincount(owner, minlength=fleet)
+
+    current = {column: _column(live_df, column) for column in SENSOR_LIMITS}
+    projected = {column: _forecast(stats[column], current[column]) for column in SENSOR_LIMITS}
+    efficiency = _column(live_df, "production_efficiency")
+    defect_rate = _column(live_df, "defect_rate")
+    energy_per_unit = _column(live_df, "energy_usage") / np.maximum(_column(live_df, "units_produced"), 1)
+    recent_energy_per_unit = stats["energy_per_unit"]["average"]
+
+    # Causes in reporting order; each is (points, minimum points, reason, action, priority, evidence(i)).
+    causes = [
+        (
+            24 * _scale(projected["bearing_temp"], 92, 118)
+            + 28 * _scale(projected["vibration"], 6.5, 11.5)
+            + 8 * _scale(stats["bearing_temp"]["trend"], 4, 18)
+            + 8 * _scale(stats["vibration"]["trend"], 0.8, 4.0),
+            10,
+            "Bearing wear, imbalance, or shaft misalignment",
+            "Inspect bearings, check alignment, and schedule vibration analysis before the next production run.",
+            3,
+            lambda i: f"Bearing temp is projected to {_fmt(projected['bearing_temp'][i], 'C')} and vibration to {_fmt(projected['vibration'][i], ' mm/s', 2)} within {FORECAST_HORIZON_READINGS} readings.",
+        ),
+        (
+            28 * _scale(projected["oil_temp"], 82, 112)
+            + 10 * _scale(stats["oil_temp"]["trend"], 4, 18)
+            + 8 * _scale(projected["vibration"], 7.0, 11.0),
+            10,
+            "Lubrication breakdown or cooling restriction",
+            "Check oil level, oil quality, filters, coolant flow, and heat exchanger performance.",
+            3,
+            lambda i: f"Oil temp is projected to {_fmt(projected['oil_temp'][i], 'C')} from current {_fmt(current['oil_temp'][i], 'C')}.",
+        ),
+        (
+            22 * _scale(projected["hydraulic_temp"], 72, 98)
+            + 8 * _scale(stats["hydraulic_temp"]["trend"], 3, 16),
+            8,
+            "Hydraulic fluid overheating or pump strain",
+            "Inspect hydraulic fluid, pump load, reservoir cooling, and blocked return filters.",
+            2,
+            lambda i: f"Hydraulic temp is projected to {_fmt(projected['hydraulic_temp'][i], 'C')} and may indicate pump or cooling stress.",
+        ),
+        (
             12 * _scale(defect_rate, 1.2, 3.0)
-            + 14 * _scale(85 - efficiency, 0, 40)
-        )
-        if quality_points >= 8:
-            causes.append({
-                "reason": "Tool wear or process drift affecting output quality",
-                "action": "Inspect tooling, recalibrate offsets, and verify material feed or fixture setup.",
-                "points": quality_points,
-                "priority": 2,
-            })
-            evidence.append(f"Efficiency is {_fmt(efficiency, '%')} with defect rate {_fmt(defect_rate, '%', 2)}.")
-
-        recent_energy_per_unit = _recent_average(
-            machine_history.assign(
-                energy_per_unit=machine_history["energy_usage"] / machine_history["units_produced"].clip(lower=1)
+            + 14 * _scale(85 - efficiency, 0, 40),
+            8,
+            "Tool wear or process drift affecting output quality",
+            "Inspect tooling, recalibrate offsets, and verify material feed or fixture setup.",
+            2,
+            lambda i: f"Efficiency is {_fmt(efficiency[i], '%')} with defect rate {_fmt(defect_rate[i], '%', 2)}.",
+        ),
+        (
+            10 * _scale(energy_per_unit - recent_energy_per_unit, 0.25, 1.25),
+            5,
+            "Rising energy per unit suggests mechanical drag or inefficient load",
+            "Check lubrication, belt tension, spindle load, and motor current draw.",
+            1,
+            lambda i: f"Energy per unit is {_fmt(energy_per_unit[i], ' kWh/unit', 2)} versus recent average {_fmt(recent_energy_per_unit[i], ' kWh/unit', 2)}.",
+        ),
+    ]
+
+    if {"tool_wear_min", "torque_nm", "rotational_speed_rpm", "air_temperature_k", "process_temperature_k"}.issubset(live_df.columns):
+        tool_wear = _column(live_df, "tool_wear_min")
+        torque = _column(live_df, "torque_nm")
+        power_kw = torque * _column(live_df, "rotational_speed_rpm") / 9550
+        temp_gap = _column(live_df, "process_temperature_k") - _column(live_df, "air_temperature_k")
+        causes += [
+            (
+                22 * _scale(tool_wear, 150, 240),
+                7,
+                "Tool wear is approaching failure range",
+                "Plan tool replacement and verify cutting parameters before the next batch.",
+                3,
+                lambda i: f"AI4I tool wear is {_fmt(tool_wear[i], ' min', 0)}.",
+            ),
+            (
+                18 * _scale(temp_gap, 8.5, 12.0),
+                7,
+                "Heat dissipation stress",
+                "Inspect cooling, airflow, and process temperature control.",
+                2,
+                lambda i: f"Process temperature is {_fmt(temp_gap[i], ' K')} above air temperature.",
+            ),
+            (
+                np.maximum(16 * _scale(power_kw, 8.5, 10.5), 16 * _scale(3.5 - power_kw, 0, 1.5)),
+                7,
+                "Power load is outside the normal operating band",
+                "Check torque, spindle speed, motor load, and feed settings.",
+                2,
+                lambda i: f"Estimated AI4I power load is {_fmt(power_kw[i], ' kW', 2)}.",
             ),
-            "energy_per_unit",
-        )
-        energy_points = 10 * _scale(energy_per_unit - recent_energy_per_unit, 0.25, 1.25)
-        if energy_points >= 5:
-            causes.append({
-                "reason": "Rising energy per unit suggests mechanical drag or inefficient load",
-                "action": "Check lubrication, belt tension, spindle load, and motor current draw.",
-                "points": energy_points,
-                "priority": 1,
-            })
-            evidence.append(
-                f"Energy per unit is {_fmt(energy_per_unit, ' kWh/unit', 2)} versus recent average {_fmt(recent_energy_per_unit, ' kWh/unit', 2)}."
-            )
-
-        if {"tool_wear_min", "torque_nm", "rotational_speed_rpm", "air_temperature_k", "process_temperature_k"}.issubset(row.index):
-            tool_wear = float(row["tool_wear_min"])
-            torque = float(row["torque_nm"])
-            rpm = float(row["rotational_speed_rpm"])
-            air_temp = float(row["air_temperature_k"])
-            process_temp = float(row["process_temperature_k"])
-            power_kw = torque * rpm / 9550
-            temp_gap = process_temp - air_temp
-
-            tool_wear_points = 22 * _scale(tool_wear, 150, 240)
-            if tool_wear_points >= 7:
-                causes.append({
-                    "reason": "Tool wear is approaching failure range",
-                    "action": "Plan tool replacement and verify cutting parameters before the next batch.",
-                    "points": tool_wear_points,
-                    "priority": 3,
-                })
-                evidence.append(f"AI4I tool wear is {_fmt(tool_wear, ' min', 0)}.")
-
-            heat_points = 18 * _scale(temp_gap, 8.5, 12.0)
-            if heat_points >= 7:
-                causes.append({
-                    "reason": "Heat dissipation stress",
-                    "action": "Inspect cooling, airflow, and process temperature control.",
-                    "points": heat_points,
-                    "priority": 2,
-                })
-                evidence.append(f"Process temperature is {_fmt(temp_gap, ' K')} above air temperature.")
-
-            high_power_points = 16 * _scale(power_kw, 8.5, 10.5)
-            low_power_points = 16 * _scale(3.5 - power_kw, 0, 1.5)
-            power_points = max(high_power_points, low_power_points)
-            if power_points >= 7:
-                causes.append({
-                    "reason": "Power load is outside the normal operating band",
-                    "action": "Check torque, spindle speed, motor load, and feed settings.",
-                    "points": power_points,
-                    "priority": 2,
-                })
-                evidence.append(f"Estimated AI4I power load is {_fmt(power_kw, ' kW', 2)}.")
-
-            overstrain_points = 20 * _scale(torque * tool_wear, 8500, 12000)
-            if overstrain_points >= 7:
-                causes.append({
-                    "reason": "Overstrain risk from torque and accumulated tool wear",
-                    "action": "Reduce load or replace the tool before running another high-torque job.",
-                    "points": overstrain_points,
-                    "priority": 3,
-                })
-                evidence.append(f"Torque-wear product is {_fmt(torque * tool_wear, precision=0)}.")
-
-        for column, limits in SENSOR_LIMITS.items():
-            predicted_values = {
-                "oil_temp": predicted_oil_temp,
-                "hydraulic_temp": predicted_hydraulic_temp,
-                "bearing_temp": predicted_bearing_temp,
-                "vibration": predicted_vibration,
-            }
-            value = predicted_values[column]
-            if value >= limits["critical"]:
-                score += 18
-                evidence.append(f"Projected {limits['label']} reaches critical range: {_fmt(value, precision=2)}.")
-            elif value >= limits["watch"]:
-                score += 8
-
-        score += sum(cause["points"] for cause in causes)
-        score = int(round(min(score, 100)))
-        if score < 30:
-            causes = []
-            evidence = []
-        top_cause = _top_cause(causes)
-        confidence = int(round(min(95, 48 + score * 0.45 + len(machine_history) * 1.2)))
-        cost = _cost_impact(score, top_cause["priority"])
+            (
+                20 * _scale(torque * tool_wear, 8500, 12000),
+                7,
+                "Overstrain risk from torque and accumulated tool wear",
+                "Reduce load or replace the tool before running another high-torque job.",
+                3,
+                lambda i: f"Torque-wear product is {_fmt(torque[i] * tool_wear[i], precision=0)}.",
+            ),
+        ]
+
+    points = np.column_stack([cause[0] for cause in causes])
+    flagged = points >= np.array([cause[1] for cause in causes])
+    score = np.zeros(fleet)
+    critical = {}
+    for column, limits in SENSOR_LIMITS.items():
+        critical[column] = projected[column] >= limits["critical"]
+        score += np.where(critical[column], 18, np.where(projected[column] >= limits["watch"], 8, 0))
+    cause_points = np.zeros(fleet)
+    for position in range(len(causes)):
+        cause_points = cause_points + np.where(flagged[:, position], points[:, position], 0.0)
+    score = np.round(np.minimum(score + cause_points, 100)).astype(int)
+    # Below 30 nothing is reported; otherwise the strongest flagged cause leads, the first one on ties.
+    flagged &= (score >= 30)[:, None]
+    top = np.where(flagged.any(axis=1), np.argmax(np.where(flagged, points, -np.inf), axis=1), -1)
+    confidence = np.round(np.minimum(95, 48 + score * 0.45 + history_rows * 1.2)).astype(int)
 
+    insights = []
+    for i, machine in enumerate(machines):
+        if top[i] < 0:
+            top_cause = _top_cause([])
+        else:
+            reason, action, priority = causes[top[i]][2:5]
+            top_cause = {"reason": reason, "action": action, "priority": priority}
+        evidence = []
+        if score[i] >= 30:
+            evidence = [cause[5](i) for cause, hit in zip(causes, flagged[i]) if hit]
+            evidence += [
+                f"Projected {limits['label']} reaches critical range: {_fmt(projected[column][i], precision=2)}."
+                for column, limits in SENSOR_LIMITS.items()
+                if critical[column][i]
+            ]
+        cost = _cost_impact(int(score[i]), top_cause["priority"])
         insights.append({
             "machine_type": machine,
-            "maintenance_risk_pct": score,
-            "risk_band": _risk_band(score),
+            "maintenance_risk_pct": int(score[i]),
+            "risk_band": _risk_band(score[i]),
             "predicted_reason": top_cause["reason"],
             "prescribed_action": top_cause["action"],
             "priority": top_cause["priority"],
-            "confidence_pct": confidence,
-            "time_to_service": _time_to_service(score),
+            "confidence_pct": int(confidence[i]),
+            "time_to_service": _time_to_service(score[i]),
             "forecast_horizon": f"Next {FORECAST_HORIZON_READINGS} readings",
-            "projected_oil_temp": predicted_oil_temp,
-            "projected_hydraulic_temp": predicted_hydraulic_temp,
-            "projected_bearing_temp": predicted_bearing_temp,
-            "projected_vibration": predicted_vibration,
+            "projected_oil_temp": float(projected["oil_temp"][i]),
+            "projected_hydraulic_temp": float(projected["hydraulic_temp"][i]),
+            "projected_bearing_temp": float(projected["bearing_temp"][i]),
+            "projected_vibration": float(projected["vibration"][i]),
             "estimated_downtime_hours": round(cost["estimated_downtime_hours"], 1),
             "expected_failure_cost": int(round(cost["expected_failure_cost"])),
             "expected_preventive_cost": int(round(cost["expected_preventive_cost"])),
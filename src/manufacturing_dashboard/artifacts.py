@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+from manufacturing_dashboard.compiled import compile_ensemble
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+MODELS_DIR = PROJECT_ROOT / "models"
+REPORTS_DIR = PROJECT_ROOT / "reports"
+MODEL_ARTIFACT_PATH = MODELS_DIR / "failure_model.joblib"
+METRICS_REPORT_PATH = REPORTS_DIR / "model_metrics.json"
+MODEL_COMPARISON_PATH = REPORTS_DIR / "model_comparison.csv"
+MODEL_NAME = "Random Forest"
+PREDICTORS = ("sklearn", "compiled")
+MODEL_TARGET = "Target: Machine failure"
+AI4I_FEATURES = [
+    "air_temperature_k",
+    "process_temperature_k",
+    "rotational_speed_rpm",
+    "torque_nm",
+    "tool_wear_min",
+]
+
+
+def use_predictor(artifact, predictor="sklearn"):
+    """Serve ``artifact`` with ``predictor``: the fitted scikit-learn model, or its ``CompiledEnsemble``.
+
+    Models that cannot be compiled keep scikit-learn.
+    """
+    if predictor not in PREDICTORS:
+        raise ValueError(f"Unknown predictor {predictor!r}; expected one of {PREDICTORS}")
+    compiled = compile_ensemble(artifact["model"]) if predictor == "compiled" else None
+    if compiled is None:
+        return {**artifact, "predictor": "sklearn"}
+    return {**artifact, "model": compiled, "predictor": "compiled"}
+
+
+def load_saved_artifact(predictor="sklearn"):
+    if MODEL_ARTIFACT_PATH.exists():
+        # joblib (and sklearn, while unpickling) load with the first saved model, not at startup.
+        import joblib
+
+        return use_predictor(joblib.load(MODEL_ARTIFACT_PATH), predictor)
+    return None
+
+
+def load_metrics_report():
+    if METRICS_REPORT_PATH.exists():
+        return json.loads(METRICS_REPORT_PATH.read_text(encoding="utf-8"))
+    return None
@@ -0,0 +1,177 @@
+import numpy as np
+
+
+BLOCK_ROWS = 256
+# From about this many rows scikit-learn's compiled traversal is faster than NumPy's.
+SOURCE_BATCH_ROWS = 1_000
+
+
+class CompiledEnsemble:
+    """A fitted tree ensemble flattened into contiguous node arrays.
+
+    The nodes of every tree are concatenated into one set of ``feature``,
+    ``threshold``, ``children``, ``missing_left``, ``cover`` and ``value``
+    arrays, and leaves point back at themselves. Prediction walks every
+    tree for every row at once, one depth level per step, then adds the
+    leaf values tree by tree in the same order scikit-learn does. So
+    ``predict_proba`` matches the source model exactly, but skips its input
+    validation and per-tree dispatch.
+
+    ``output`` is ``"probability"`` for forests, whose ``value`` holds each
+    leaf's class fractions, and ``"log_odds"`` for gradient boosting, whose
+    ``value`` holds leaf scores added to ``base_value``.
+
+    With a ``source`` model, batches of ``SOURCE_BATCH_ROWS`` or more go to
+    it instead, since the outputs are identical and its traversal wins once
+    the per-call overhead is spread over enough rows.
+    """
+
+    def __init__(self, roots, left, right, feature, threshold, missing_left, cover, value, n_features, base_value=0.0, output="probability", input_dtype=np.float64, feature_names=None, source=None):
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.is_leaf = np.asarray(left) < 0
+        nodes = np.arange(len(self.is_leaf))
+        self.left = np.where(self.is_leaf, nodes, left).astype(np.intp)
+        self.right = np.where(self.is_leaf, nodes, right).astype(np.intp)
+        self.feature = np.where(self.is_leaf, 0, feature).astype(np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.missing_left = np.asarray(missing_left, dtype=bool)
+        self.cover = np.asarray(cover, dtype=np.float64)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.base_value = float(base_value)
+        self.output = output
+        self.input_dtype = input_dtype
+        self.feature_names = None if feature_names is None else list(feature_names)
+        self.classes_ = np.array([0, 1])
+        self.n_features_in_ = int(n_features)
+        self.source = source
+        # Interleaved children: the next node is children[2 * node + goes_right].
+        self.children = np.column_stack([self.left, self.right]).ravel()
+        self.depth = self._depth()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def leaf_output(self):
+        """Each node's share of the positive-class output (probability or log-odds)."""
+        if self.output == "probability":
+            return self.value[:, 1] / self.n_trees
+        return self.value[:, 0]
+
+    def apply(self, X):
+        """Leaf reached in every tree, as a ``(rows, trees)`` array of node indices."""
+        X = self._input(X)
+        rows, width = X.shape
+        leaves = np.empty((rows, self.n_trees), dtype=np.intp)
+        # Blocks of rows keep the per-level gathers in cache on large batches.
+        for start in range(0, rows, BLOCK_ROWS):
+            block = X[start:start + BLOCK_ROWS]
+            flat = block.ravel()
+            row_offsets = np.arange(len(block))[:, np.newaxis] * width
+            nodes = np.tile(self.roots, (len(block), 1))
+            for _ in range(self.depth):
+                values = flat[row_offsets + self.feature[nodes]]
+                goes_right = values > self.threshold[nodes]
+                missing = np.isnan(values)
+                if missing.any():
+                    goes_right = np.where(missing, ~self.missing_left[nodes], goes_right)
+                nodes = self.children[2 * nodes + goes_right]
+            leaves[start:start + BLOCK_ROWS] = nodes
+        return leaves
+
+    def predict_proba(self, X):
+        if self.source is not None and len(X) >= SOURCE_BATCH_ROWS:
+            return self.source.predict_proba(X)
+        leaves = self.apply(X)
+        # Accumulate tree by tree, as scikit-learn does, so sums round identically.
+        if self.output == "probability":
+            return np.cumsum(self.value[leaves], axis=1)[:, -1] / self.n_trees
+        from scipy.special import expit
+
+        scores = np.column_stack([np.full(len(leaves), self.base_value), self.value[leaves, 0]])
+        raw = np.cumsum(scores, axis=1)[:, -1]
+        proba = np.empty((len(raw), 2))
+        proba[:, 1] = expit(raw)
+        proba[:, 0] = 1 - proba[:, 1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def _input(self, X):
+        if hasattr(X, "columns") and self.feature_names is not None and list(X.columns) != self.feature_names:
+            X = X[self.feature_names]
+        # Forests compare float32 inputs against float64 thresholds, like scikit-learn trees.
+        return np.asarray(X, dtype=np.float64).astype(self.input_dtype).astype(np.float64)
+
+    def _depth(self):
+        depth = 0
+        frontier = self.roots[~self.is_leaf[self.roots]]
+        while frontier.size:
+            depth += 1
+            frontier = np.concatenate([self.left[frontier], self.right[frontier]])
+            frontier = frontier[~self.is_leaf[frontier]]
+        return depth
+
+
+def _compile_forest(model):
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    return CompiledEnsemble(
+        roots=offsets[:-1],
+        left=np.concatenate([np.where(tree.children_left < 0, -1, tree.children_left + offset) for tree, offset in zip(trees, offsets)]),
+        right=np.concatenate([np.where(tree.children_right < 0, -1, tree.children_right + offset) for tree, offset in zip(trees, offsets)]),
+        feature=np.concatenate([tree.feature for tree in trees]),
+        threshold=np.concatenate([tree.threshold for tree in trees]),
+        missing_left=np.concatenate([
+            getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8)) for tree in trees
+        ]),
+        cover=np.concatenate([tree.weighted_n_node_samples for tree in trees]),
+        value=np.concatenate([tree.value[:, 0, :] for tree in trees]),
+        n_features=model.n_features_in_,
+        output="probability",
+        input_dtype=np.float32,
+        feature_names=getattr(model, "feature_names_in_", None),
+        source=model,
+    )
+
+
+def _compile_boosting(model):
+    nodes = [iteration[0].nodes for iteration in model._predictors]
+    if any(node["is_categorical"].any() for node in nodes):
+        return None
+    offsets = np.cumsum([0] + [len(node) for node in nodes])
+    is_leaf = np.concatenate([node["is_leaf"].astype(bool) for node in nodes])
+    return CompiledEnsemble(
+        roots=offsets[:-1],
+        left=np.where(is_leaf, -1, np.concatenate([node["left"].astype(np.intp) + offset for node, offset in zip(nodes, offsets)])),
+        right=np.where(is_leaf, -1, np.concatenate([node["right"].astype(np.intp) + offset for node, offset in zip(nodes, offsets)])),
+        feature=np.concatenate([node["feature_idx"] for node in nodes]),
+        threshold=np.concatenate([node["num_threshold"] for node in nodes]),
+        missing_left=np.concatenate([node["missing_go_to_left"] for node in nodes]),
+        cover=np.concatenate([node["count"] for node in nodes]),
+        value=np.concatenate([node["value"] for node in nodes])[:, np.newaxis],
+        n_features=model.n_features_in_,
+        base_value=float(np.ravel(model._baseline_prediction)[0]),
+        output="log_odds",
+        feature_names=getattr(model, "feature_names_in_", None),
+        source=model,
+    )
+
+
+def compile_ensemble(model):
+    """``CompiledEnsemble`` for a binary forest or histogram gradient boosting classifier, else ``None``.
+
+    Already compiled models are returned as they are. Other models, such as
+    the logistic regression candidate, have no trees to flatten.
+    """
+    if isinstance(model, CompiledEnsemble):
+        return model
+    if len(getattr(model, "classes_", ())) != 2:
+        return None
+    estimators = getattr(model, "estimators_", None)
+    if isinstance(estimators, list) and estimators and all(hasattr(estimator, "tree_") for estimator in estimators):
+        return _compile_forest(model)
+    if hasattr(model, "_predictors") and all(len(iteration) == 1 for iteration in model._predictors):
+        return _compile_boosting(model)
+    return None
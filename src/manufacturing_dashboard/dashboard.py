@@ -1,17 +1,42 @@
+import time
 from pathlib import Path
 
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
 
-from manufacturing_dashboard.analytics import calculate_maintenance_insights
-from manufacturing_dashboard.data import DATASET_PATH, get_live_data, load_ai4i_dataset
-from manufacturing_dashboard.model import AI4I_FEATURES, MODEL_TARGET, get_model_diagnostics, predict_fault
+from manufacturing_dashboard.data import DATASET_PATH, load_ai4i_dataset, memory_per_100k_rows
+from manufacturing_dashboard.engine import LIVE_REPLAY_ROWS_PER_SECOND, SimulationEngine
+from manufacturing_dashboard.figures import (
+    daily_production_template,
+    figure_copy,
+    gauge_template,
+    patch_gauge,
+    patch_risk_chart,
+    patch_series,
+    risk_chart_template,
+    trend_template,
+)
+from manufacturing_dashboard.history import DEFAULT_RETENTION_ROWS, machine_tail, time_slice
+from manufacturing_dashboard.ingestion import DEFAULT_HOST, DEFAULT_PORT, IngestionServer
+from manufacturing_dashboard.model import AI4I_FEATURES, MODEL_TARGET, get_model_diagnostics, prediction_cache_stats
+from manufacturing_dashboard.perf import TIMINGS, measure
+from manufacturing_dashboard.storage import HISTORY_DB_PATH, DurableHistory
 
 
 ASSET_DIR = Path(__file__).resolve().parents[2] / "assets"
-
+MAX_FAST_FORWARD_STEPS = 5000
+HISTORY_MEMORY_SAMPLE_ROWS = 1000
+HISTORY_RETENTION_ROWS = DEFAULT_RETENTION_ROWS
+LIVE_REFRESH_SECONDS = 2.0
+TREND_MAX_POINTS = 1000
+GAUGES = [
+    ("oil_temp", "Oil Temp", (40, 70), (70, 85), (85, 120), "deg C"),
+    ("hydraulic_temp", "Hydraulic Temp", (30, 60), (60, 75), (75, 120), "deg C"),
+    ("vibration", "Vibration", (0.0, 4.0), (4.0, 7.0), (7.0, 15.0), "mm/s"),
+    ("bearing_temp", "Bearing Temp", (40, 80), (80, 95), (95, 120), "deg C"),
+]
+
+page_started = time.perf_counter()
 st.set_page_config("Manufacturing Dashboard", layout="wide")
 
 st.markdown("""
@@ -110,79 +135,148 @@ def normalize_prediction_result(prediction_result):
     }
 
 
-def create_gauge(value, green_range, orange_range, red_range, unit="deg C"):
-    if value <= green_range[1]:
-        bar_color = "#d0aaff"
-    elif value <= orange_range[1]:
-        bar_color = "#b07bfa"
+def show_figure(key, template, patch, *values):
+    """Patch this session's copy of a figure template and render it, timing build and serialisation per figure."""
+    stage = ".".join(key) if isinstance(key, tuple) else key
+    started = time.perf_counter()
+    figure = figure_copy(st.session_state.figures, key, template)
+    patch(figure, *values)
+    built = time.perf_counter()
+    st.plotly_chart(figure, use_container_width=True)
+    figure_ms = st.session_state.figure_ms
+    figure_ms["build"] += TIMINGS.record(f"figure_build.{stage}", (built - started) * 1000)
+    figure_ms["serialize"] += TIMINGS.record(f"figure_serialize.{stage}", (time.perf_counter() - built) * 1000)
+
+
+def daily_production(engine, snapshot):
+    today = pd.Timestamp.now().normalize()
+    history_df = snapshot["history_df"]
+    window_has_today = snapshot["kpis"].rows() == len(history_df) or history_df["timestamp"].iloc[0] < today
+    if engine.durable is not None and not window_has_today:
+        # Part of today has left the in-memory window; the durable store still has all of it.
+        return engine.durable.aggregate("units_produced", "sum", start=today)
+    today_df = time_slice(history_df, today)
+    return today_df.groupby("machine_type", observed=True)["units_produced"].sum().reset_index()
+
+
+def recent_records(history_df, machine):
+    recent_data = machine_tail(history_df, machine, 10).copy()
+    rounded_columns = {
+        "oil_temp": 1,
+        "hydraulic_temp": 1,
+        "bearing_temp": 1,
+        "vibration": 2,
+        "production_efficiency": 2,
+        "defect_rate": 2,
+        "energy_usage": 2,
+    }
+    recent_data = recent_data.round(rounded_columns)
+    recent_data["energy_cost"] = recent_data["energy_cost"].map("${:.2f}".format)
+    return recent_data
+
+
+@st.cache_resource
+def get_engine():
+    return SimulationEngine(HISTORY_RETENTION_ROWS, TREND_MAX_POINTS, durable=DurableHistory(HISTORY_DB_PATH))
+
+
+@st.cache_resource
+def get_ingestion_server():
+    return IngestionServer(DEFAULT_HOST, DEFAULT_PORT).start()
+
+
+def sync_live_mode():
+    engine = get_engine()
+    if st.session_state.live_mode:
+        engine.start_live(get_ingestion_server() if engine.socket_mode else None)
     else:
-        bar_color = "#9446ff"
-
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=value,
-        number={"suffix": f" {unit}", "font": {"size": 24, "color": "white"}},
-        domain={"x": [0, 1], "y": [0, 1]},
-        gauge={
-            "axis": {"range": [None, red_range[1]], "tickcolor": "#888", "tickwidth": 1.5},
-            "bar": {"color": bar_color, "thickness": 0.25},
-            "bgcolor": "rgba(0,0,0,0.1)",
-            "borderwidth": 0,
-            "steps": [],
-            "threshold": {"line": {"color": "white", "width": 4}, "thickness": 0.75, "value": red_range[0]},
-        },
-    ))
-    fig.update_traces(gauge_shape="angular")
-    fig.update_layout(
-        paper_bgcolor="rgba(0,0,0,0)",
-        font=dict(color="white"),
-        height=250,
-        margin=dict(t=20, b=10, l=0, r=0),
+        engine.stop_live()
+
+
+def sync_socket_mode():
+    engine = get_engine()
+    engine.socket_mode = st.session_state.use_socket_ingestion
+    if engine.live:
+        engine.start_live(get_ingestion_server() if engine.socket_mode else None)
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def poll_live_engine(engine):
+    """Rerun the page when the shared engine has a newer frame; otherwise only refresh the lag readout."""
+    # Only timed polls pick up new frames, so a slow render cannot chain full reruns back to back.
+    polled_with_page = st.session_state.pop("live_page_rendering", False)
+    newer_snapshot = engine.snapshot()["version"] != st.session_state.rendered_version
+    if (engine.has_frame() or newer_snapshot) and not polled_with_page:
+        st.rerun()
+    stats = engine.live_stats()
+    render_lag_ms = TIMINGS.last("live_lag", 0.0)
+    st.caption(
+        f"Live mode: frame {stats.get('taken_frames', 0)} rendered {render_lag_ms:.0f} ms after it was produced; "
+        f"{stats.get('dropped_frames', 0)} stale frames dropped; scoring {stats.get('score_ms_last', 0.0):.0f} ms off-page."
     )
-    return fig
 
 
-if "history_df" not in st.session_state:
-    st.session_state.history_df = pd.DataFrame()
-if "refresh_live_data" not in st.session_state:
-    st.session_state.refresh_live_data = True
-if "machine_health_state" not in st.session_state:
-    st.session_state.machine_health_state = {}
-if "step_once" not in st.session_state:
-    st.session_state.step_once = False
+engine = get_engine()
+if "figures" not in st.session_state:
+    st.session_state.figures = {}
+if "rendered_version" not in st.session_state:
+    st.session_state.rendered_version = None
+# Replay mode is shared by every session, so the toggles mirror the engine rather than holding their own state.
+st.session_state.live_mode = engine.live
+st.session_state.use_socket_ingestion = engine.socket_mode
 
 st.title("Manufacturing Operations Dashboard")
-control_cols = st.columns([1, 1, 2])
+live_mode = engine.live
+control_cols = st.columns([1, 1, 1, 2])
 with control_cols[0]:
-    if st.button("Step one row", use_container_width=True):
-        st.session_state.step_once = True
-        st.session_state.refresh_live_data = True
+    if st.button("Step one row", use_container_width=True, disabled=live_mode):
+        engine.step()
 with control_cols[1]:
-    if st.button("Reset replay", use_container_width=True):
-        st.session_state.history_df = pd.DataFrame()
-        st.session_state.machine_health_state = {}
-        st.session_state.refresh_live_data = True
-        st.session_state.step_once = True
+    fast_forward_steps = st.number_input(
+        "Rows per machine",
+        min_value=1,
+        max_value=MAX_FAST_FORWARD_STEPS,
+        value=100,
+        step=50,
+        label_visibility="collapsed",
+        disabled=live_mode,
+    )
+    if st.button("Fast-forward", use_container_width=True, disabled=live_mode):
+        engine.step(int(fast_forward_steps))
 with control_cols[2]:
-    st.caption("Replay advances only when you step or reset, so the page stays visible while you inspect predictions.")
-
-should_load_live_data = (
-    "live_df" not in st.session_state
-    or st.session_state.refresh_live_data
-    or st.session_state.step_once
-)
-if should_load_live_data:
-    st.session_state.live_df = get_live_data(st.session_state.machine_health_state)
-    st.session_state.history_df = pd.concat(
-        [st.session_state.history_df, st.session_state.live_df],
-        ignore_index=True,
+    if st.button("Reset replay", use_container_width=True):
+        engine.reset()
+        st.session_state.live_mode = False
+with control_cols[3]:
+    st.caption("Replay advances only when you step, fast-forward, or reset, so the page stays visible while you inspect predictions. Live mode advances it in the background instead. Replay is shared by everyone viewing this dashboard.")
+    st.toggle(
+        f"Socket ingestion ({DEFAULT_HOST}:{DEFAULT_PORT})",
+        key="use_socket_ingestion",
+        on_change=sync_socket_mode,
+        help="Accept live readings from scripts/send_readings.py or PLC bridges instead of replay.",
+    )
+    st.toggle(
+        f"Live mode (refresh every {LIVE_REFRESH_SECONDS:.0f} s, {LIVE_REPLAY_ROWS_PER_SECOND} rows/s replay)",
+        key="live_mode",
+        on_change=sync_live_mode,
+        help="A background producer advances replay or drains socket readings and scores them; the page polls for the newest frame.",
     )
-    st.session_state.refresh_live_data = False
-    st.session_state.step_once = False
 
-live_df = st.session_state.live_df.copy()
-history_df = st.session_state.history_df.copy()
-maintenance_insights = calculate_maintenance_insights(live_df, history_df)
+live_mode = engine.live
+engine.ensure_started()
+if live_mode:
+    engine.poll()
+elif engine.socket_mode:
+    ingestion_server = get_ingestion_server()
+    engine.ingest(ingestion_server.pop_batches(), ingestion_server.latest_frame())
+    if ingestion_server.latest_frame().empty:
+        st.caption(f"Waiting for socket readings on {DEFAULT_HOST}:{DEFAULT_PORT}; showing replay data until they arrive.")
+
+snapshot = engine.snapshot()
+live_df = snapshot["live_df"]
+history_df = snapshot["history_df"]
+maintenance_insights = snapshot["insights"]
+kpis = snapshot["kpis"]
 
 using_ai4i = {"machine_failure", "tool_wear_min", "torque_nm", "process_temp_c"}.issubset(history_df.columns)
 avg_predicted_risk = round(maintenance_insights["maintenance_risk_pct"].mean(), 1)
@@ -191,344 +285,343 @@ model_diagnostics = get_model_diagnostics() if using_ai4i else {}
 if not load_ai4i_dataset().empty:
     split_label = model_diagnostics.get("split", "70% train / 30% test")
     st.caption(f"Data source: UCI AI4I 2020 Predictive Maintenance replay ({DATASET_PATH.name}); split: {split_label}")
-st.markdown("### Overall Manufacturing KPIs")
-
-kpi_cols = st.columns(5)
-if using_ai4i:
-    records_replayed = len(history_df)
-    observed_failure_rate = history_df["machine_failure"].mean() * 100
-    avg_tool_wear = history_df["tool_wear_min"].mean()
-    avg_torque = history_df["torque_nm"].mean()
-    with kpi_cols[0]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{records_replayed}</div><div class='metric-label'>Test Rows Replayed</div></div>", unsafe_allow_html=True)
-    with kpi_cols[1]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{observed_failure_rate:.1f}%</div><div class='metric-label'>Observed Test Failure Rate</div></div>", unsafe_allow_html=True)
-    with kpi_cols[2]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_tool_wear:.0f} min</div><div class='metric-label'>Avg Tool Wear</div></div>", unsafe_allow_html=True)
-    with kpi_cols[3]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_torque:.1f} Nm</div><div class='metric-label'>Avg Torque</div></div>", unsafe_allow_html=True)
-    with kpi_cols[4]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_predicted_risk:.1f}%</div><div class='metric-label'>Avg Predicted Risk</div></div>", unsafe_allow_html=True)
-else:
-    total_units = history_df["units_produced"].sum()
-    avg_eff = round(history_df["production_efficiency"].mean(), 2)
-    avg_defect = round(history_df["defect_rate"].mean(), 2)
-    total_energy = round(history_df["energy_usage"].sum(), 2)
-    total_cost = round(history_df["energy_cost"].sum(), 2)
-    with kpi_cols[0]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{total_units}</div><div class='metric-label'>Total Units Produced</div></div>", unsafe_allow_html=True)
-    with kpi_cols[1]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_eff:.1f}%</div><div class='metric-label'>Avg Efficiency</div></div>", unsafe_allow_html=True)
-    with kpi_cols[2]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_defect:.2f}%</div><div class='metric-label'>Avg Defect Rate</div></div>", unsafe_allow_html=True)
-    with kpi_cols[3]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{total_energy:.1f} kWh</div><div class='metric-label'>Total Energy Used</div></div>", unsafe_allow_html=True)
-    with kpi_cols[4]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>${total_cost:.2f}</div><div class='metric-label'>Total Energy Cost</div></div>", unsafe_allow_html=True)
-
-machine_options = live_df["machine_type"].unique().tolist()
-selected_machine = st.selectbox("Select Machine for Gauges & Alerts", machine_options)
-selected_row = live_df[live_df["machine_type"] == selected_machine].iloc[0]
-selected_machine_df = history_df[history_df["machine_type"] == selected_machine]
-selected_insight = maintenance_insights[maintenance_insights["machine_type"] == selected_machine].iloc[0]
-
-st.markdown("### Selected Machine Stats (Total & Avg)")
-
-machine_kpi_cols = st.columns(5)
-if using_ai4i:
-    selected_risk = float(selected_insight["maintenance_risk_pct"])
-    selected_failure_rate = selected_machine_df["machine_failure"].mean() * 100
-    latest_failure_type = str(selected_row.get("failure_type", "None"))
-    with machine_kpi_cols[0]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{len(selected_machine_df)}</div><div class='metric-label'>Test Rows Replayed</div></div>", unsafe_allow_html=True)
-    with machine_kpi_cols[1]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_failure_rate:.1f}%</div><div class='metric-label'>Observed Failure Rate</div></div>", unsafe_allow_html=True)
-    with machine_kpi_cols[2]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_machine_df['tool_wear_min'].mean():.0f} min</div><div class='metric-label'>Avg Tool Wear</div></div>", unsafe_allow_html=True)
-    with machine_kpi_cols[3]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_row['power_kw']:.2f} kW</div><div class='metric-label'>Latest Power Load</div></div>", unsafe_allow_html=True)
-    with machine_kpi_cols[4]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_risk:.0f}%</div><div class='metric-label'>Predicted Risk</div></div>", unsafe_allow_html=True)
-    if latest_failure_type != "None":
-        st.markdown(f"<div class='alert-box'>{selected_machine} replay row is labeled: {latest_failure_type}</div>", unsafe_allow_html=True)
-else:
-    with machine_kpi_cols[0]:
-        total_units_m = selected_machine_df["units_produced"].sum()
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{total_units_m}</div><div class='metric-label'>Total Units Produced</div></div>", unsafe_allow_html=True)
-    with machine_kpi_cols[1]:
-        avg_eff_m = selected_machine_df["production_efficiency"].mean()
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_eff_m:.1f}%</div><div class='metric-label'>Avg Efficiency</div></div>", unsafe_allow_html=True)
-    with machine_kpi_cols[2]:
-        avg_defect_m = selected_machine_df["defect_rate"].mean()
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_defect_m:.2f}%</div><div class='metric-label'>Avg Defect Rate</div></div>", unsafe_allow_html=True)
-    with machine_kpi_cols[3]:
-        total_energy_m = selected_machine_df["energy_usage"].sum()
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{total_energy_m:.2f} kWh</div><div class='metric-label'>Total Energy Used</div></div>", unsafe_allow_html=True)
-    with machine_kpi_cols[4]:
-        total_cost_m = selected_machine_df["energy_cost"].sum()
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>${total_cost_m:.2f}</div><div class='metric-label'>Total Energy Cost</div></div>", unsafe_allow_html=True)
-
-prediction = normalize_prediction_result(predict_fault(selected_row, history_df))
-probability = prediction["probability"]
-downtime_hours = prediction["downtime_hours"]
-explanation = prediction["explanation"]
-threshold = prediction["threshold"]
-predicted_failure = prediction["predicted_failure"]
-st.markdown("<div class='section-band'></div>", unsafe_allow_html=True)
-st.markdown("### Predictive Analytics: Future Failure Probability")
-ai_cols = st.columns(3)
-with ai_cols[0]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{probability * 100:.1f}%</div><div class='metric-label'>Failure Probability</div></div>", unsafe_allow_html=True)
-with ai_cols[1]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{threshold * 100:.0f}%</div><div class='metric-label'>Tuned Failure Threshold</div></div>", unsafe_allow_html=True)
-with ai_cols[2]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{prediction['model_name']}</div><div class='metric-label'>{MODEL_TARGET}</div></div>", unsafe_allow_html=True)
-st.caption("Model features: " + ", ".join(AI4I_FEATURES if using_ai4i else ["oil_temp", "hydraulic_temp", "bearing_temp", "vibration"]))
-if using_ai4i and model_diagnostics.get("accuracy") is not None:
-    f2_score = model_diagnostics.get("f2") or 0
-    roc_auc = model_diagnostics.get("roc_auc") or 0
-    st.caption(
-        "Evaluation summary: "
-        f"train rows {model_diagnostics['train_rows']}, "
-        f"validation rows {model_diagnostics.get('validation_rows', 0)}, "
-        f"test rows {model_diagnostics['test_rows']}, "
-        f"accuracy {model_diagnostics['accuracy'] * 100:.1f}%, "
-        f"recall {model_diagnostics['recall'] * 100:.1f}%, "
-        f"precision {model_diagnostics['precision'] * 100:.1f}%, "
-        f"F2 {f2_score * 100:.1f}%, "
-        f"ROC-AUC {roc_auc * 100:.1f}%."
-    )
-    if model_diagnostics.get("threshold_strategy"):
-        st.caption(model_diagnostics["threshold_strategy"])
-st.markdown(f"**Model explanation:** {explanation}")
-
-feature_contributions = prediction.get("feature_contributions", [])
-if feature_contributions:
-    contribution_df = pd.DataFrame(feature_contributions[:5])
-    contribution_df["Contribution"] = contribution_df["contribution"].map(lambda value: f"{value * 100:+.1f} pp")
-    contribution_df["Current Value"] = contribution_df.apply(
-        lambda row: f"{row['value']:.1f}" if row["feature"] != "rotational_speed_rpm" else f"{row['value']:.0f}",
-        axis=1,
-    )
-    st.dataframe(
-        contribution_df[["label", "Current Value", "Contribution"]].rename(columns={
-            "label": "Feature",
-        }),
-        hide_index=True,
-        use_container_width=True,
-    )
-
-if using_ai4i:
-    actual_failure = int(selected_row["machine_failure"]) == 1
-    if predicted_failure and actual_failure:
-        prediction_result = "Correct Failure"
-    elif predicted_failure and not actual_failure:
-        prediction_result = "False Positive"
-    elif not predicted_failure and actual_failure:
-        prediction_result = "Missed Failure"
+with measure("render.fleet_kpis"):
+    st.markdown("### Overall Manufacturing KPIs")
+
+    kpi_cols = st.columns(5)
+    if using_ai4i:
+        records_replayed = kpis.rows()
+        observed_failure_rate = kpis.mean("machine_failure") * 100
+        avg_tool_wear = kpis.mean("tool_wear_min")
+        avg_torque = kpis.mean("torque_nm")
+        with kpi_cols[0]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{records_replayed}</div><div class='metric-label'>Test Rows Replayed</div></div>", unsafe_allow_html=True)
+        with kpi_cols[1]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{observed_failure_rate:.1f}%</div><div class='metric-label'>Observed Test Failure Rate</div></div>", unsafe_allow_html=True)
+        with kpi_cols[2]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_tool_wear:.0f} min</div><div class='metric-label'>Avg Tool Wear</div></div>", unsafe_allow_html=True)
+        with kpi_cols[3]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_torque:.1f} Nm</div><div class='metric-label'>Avg Torque</div></div>", unsafe_allow_html=True)
+        with kpi_cols[4]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_predicted_risk:.1f}%</div><div class='metric-label'>Avg Predicted Risk</div></div>", unsafe_allow_html=True)
     else:
-        prediction_result = "Correct Normal"
-
-    eval_cols = st.columns(3)
-    with eval_cols[0]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{'Yes' if predicted_failure else 'No'}</div><div class='metric-label'>Predicted Failure</div></div>", unsafe_allow_html=True)
-    with eval_cols[1]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{'Yes' if actual_failure else 'No'}</div><div class='metric-label'>Actual Test Outcome</div></div>", unsafe_allow_html=True)
-    with eval_cols[2]:
-        st.markdown(f"<div class='metric-card'><div class='metric-value'>{prediction_result}</div><div class='metric-label'>Prediction Check</div></div>", unsafe_allow_html=True)
-    st.caption("The actual test outcome is shown only for evaluation after the model prediction; it is not used as a model input.")
-
-if using_ai4i and model_diagnostics.get("model_comparison"):
-    with st.expander("Model comparison report", expanded=False):
-        comparison_df = pd.DataFrame(model_diagnostics["model_comparison"])
-        display_columns = ["model_name", "accuracy", "precision", "recall", "f1", "f2", "roc_auc"]
-        st.dataframe(
-            comparison_df[[column for column in display_columns if column in comparison_df.columns]],
-            hide_index=True,
-            use_container_width=True,
+        total_units = kpis.sum("units_produced")
+        avg_eff = round(kpis.mean("production_efficiency"), 2)
+        avg_defect = round(kpis.mean("defect_rate"), 2)
+        total_energy = round(kpis.sum("energy_usage"), 2)
+        total_cost = round(kpis.sum("energy_cost"), 2)
+        with kpi_cols[0]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{total_units}</div><div class='metric-label'>Total Units Produced</div></div>", unsafe_allow_html=True)
+        with kpi_cols[1]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_eff:.1f}%</div><div class='metric-label'>Avg Efficiency</div></div>", unsafe_allow_html=True)
+        with kpi_cols[2]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_defect:.2f}%</div><div class='metric-label'>Avg Defect Rate</div></div>", unsafe_allow_html=True)
+        with kpi_cols[3]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{total_energy:.1f} kWh</div><div class='metric-label'>Total Energy Used</div></div>", unsafe_allow_html=True)
+        with kpi_cols[4]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>${total_cost:.2f}</div><div class='metric-label'>Total Energy Cost</div></div>", unsafe_allow_html=True)
+
+
+@st.fragment
+def render_machine_panels(engine, snapshot, model_diagnostics, using_ai4i):
+    panel_started = time.perf_counter()
+    st.session_state.figure_ms = {"build": 0.0, "serialize": 0.0}
+    live_df = snapshot["live_df"]
+    history_df = snapshot["history_df"]
+    maintenance_insights = snapshot["insights"]
+    kpis = snapshot["kpis"]
+    machine_options = live_df["machine_type"].unique().tolist()
+    selected_machine = st.selectbox("Select Machine for Gauges & Alerts", machine_options)
+    selected_row = live_df[live_df["machine_type"] == selected_machine].iloc[0]
+    selected_insight = maintenance_insights[maintenance_insights["machine_type"] == selected_machine].iloc[0]
+
+    with measure("render.machine_kpis"):
+        st.markdown("### Selected Machine Stats (Total & Avg)")
+
+        machine_kpi_cols = st.columns(5)
+        if using_ai4i:
+            selected_risk = float(selected_insight["maintenance_risk_pct"])
+            selected_failure_rate = kpis.mean("machine_failure", selected_machine) * 100
+            latest_failure_type = str(selected_row.get("failure_type", "None"))
+            with machine_kpi_cols[0]:
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{kpis.rows(selected_machine)}</div><div class='metric-label'>Test Rows Replayed</div></div>", unsafe_allow_html=True)
+            with machine_kpi_cols[1]:
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_failure_rate:.1f}%</div><div class='metric-label'>Observed Failure Rate</div></div>", unsafe_allow_html=True)
+            with machine_kpi_cols[2]:
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{kpis.mean('tool_wear_min', selected_machine):.0f} min</div><div class='metric-label'>Avg Tool Wear</div></div>", unsafe_allow_html=True)
+            with machine_kpi_cols[3]:
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_row['power_kw']:.2f} kW</div><div class='metric-label'>Latest Power Load</div></div>", unsafe_allow_html=True)
+            with machine_kpi_cols[4]:
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_risk:.0f}%</div><div class='metric-label'>Predicted Risk</div></div>", unsafe_allow_html=True)
+            if latest_failure_type != "None":
+                st.markdown(f"<div class='alert-box'>{selected_machine} replay row is labeled: {latest_failure_type}</div>", unsafe_allow_html=True)
+        else:
+            with machine_kpi_cols[0]:
+                total_units_m = kpis.sum("units_produced", selected_machine)
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{total_units_m}</div><div class='metric-label'>Total Units Produced</div></div>", unsafe_allow_html=True)
+            with machine_kpi_cols[1]:
+                avg_eff_m = kpis.mean("production_efficiency", selected_machine)
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_eff_m:.1f}%</div><div class='metric-label'>Avg Efficiency</div></div>", unsafe_allow_html=True)
+            with machine_kpi_cols[2]:
+                avg_defect_m = kpis.mean("defect_rate", selected_machine)
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{avg_defect_m:.2f}%</div><div class='metric-label'>Avg Defect Rate</div></div>", unsafe_allow_html=True)
+            with machine_kpi_cols[3]:
+                total_energy_m = kpis.sum("energy_usage", selected_machine)
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{total_energy_m:.2f} kWh</div><div class='metric-label'>Total Energy Used</div></div>", unsafe_allow_html=True)
+            with machine_kpi_cols[4]:
+                total_cost_m = kpis.sum("energy_cost", selected_machine)
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>${total_cost_m:.2f}</div><div class='metric-label'>Total Energy Cost</div></div>", unsafe_allow_html=True)
+
+    with measure("render.predictive"):
+        prediction = normalize_prediction_result(engine.prediction(snapshot, selected_machine))
+        probability = prediction["probability"]
+        downtime_hours = prediction["downtime_hours"]
+        explanation = prediction["explanation"]
+        threshold = prediction["threshold"]
+        predicted_failure = prediction["predicted_failure"]
+        st.markdown("<div class='section-band'></div>", unsafe_allow_html=True)
+        st.markdown("### Predictive Analytics: Future Failure Probability")
+        ai_cols = st.columns(3)
+        with ai_cols[0]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{probability * 100:.1f}%</div><div class='metric-label'>Failure Probability</div></div>", unsafe_allow_html=True)
+        with ai_cols[1]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{threshold * 100:.0f}%</div><div class='metric-label'>Tuned Failure Threshold</div></div>", unsafe_allow_html=True)
+        with ai_cols[2]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{prediction['model_name']}</div><div class='metric-label'>{MODEL_TARGET}</div></div>", unsafe_allow_html=True)
+        st.caption("Model features: " + ", ".join(AI4I_FEATURES if using_ai4i else ["oil_temp", "hydraulic_temp", "bearing_temp", "vibration"]))
+        if using_ai4i and model_diagnostics.get("accuracy") is not None:
+            f2_score = model_diagnostics.get("f2") or 0
+            roc_auc = model_diagnostics.get("roc_auc") or 0
+            st.caption(
+                "Evaluation summary: "
+                f"train rows {model_diagnostics['train_rows']}, "
+                f"validation rows {model_diagnostics.get('validation_rows', 0)}, "
+                f"test rows {model_diagnostics['test_rows']}, "
+                f"accuracy {model_diagnostics['accuracy'] * 100:.1f}%, "
+                f"recall {model_diagnostics['recall'] * 100:.1f}%, "
+                f"precision {model_diagnostics['precision'] * 100:.1f}%, "
+                f"F2 {f2_score * 100:.1f}%, "
+                f"ROC-AUC {roc_auc * 100:.1f}%."
+            )
+            if model_diagnostics.get("threshold_strategy"):
+                st.caption(model_diagnostics["threshold_strategy"])
+        st.markdown(f"**Model explanation:** {explanation}")
+
+        feature_contributions = prediction.get("feature_contributions", [])
+        if feature_contributions:
+            contribution_df = pd.DataFrame(feature_contributions[:5])
+            contribution_df["Contribution"] = contribution_df["contribution"].map(lambda value: f"{value * 100:+.1f} pp")
+            contribution_df["Current Value"] = contribution_df.apply(
+                lambda row: f"{row['value']:.1f}" if row["feature"] != "rotational_speed_rpm" else f"{row['value']:.0f}",
+                axis=1,
+            )
+            st.dataframe(
+                contribution_df[["label", "Current Value", "Contribution"]].rename(columns={
+                    "label": "Feature",
+                }),
+                hide_index=True,
+                use_container_width=True,
+            )
+
+        if using_ai4i:
+            actual_failure = int(selected_row["machine_failure"]) == 1
+            if predicted_failure and actual_failure:
+                prediction_result = "Correct Failure"
+            elif predicted_failure and not actual_failure:
+                prediction_result = "False Positive"
+            elif not predicted_failure and actual_failure:
+                prediction_result = "Missed Failure"
+            else:
+                prediction_result = "Correct Normal"
+
+            eval_cols = st.columns(3)
+            with eval_cols[0]:
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{'Yes' if predicted_failure else 'No'}</div><div class='metric-label'>Predicted Failure</div></div>", unsafe_allow_html=True)
+            with eval_cols[1]:
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{'Yes' if actual_failure else 'No'}</div><div class='metric-label'>Actual Test Outcome</div></div>", unsafe_allow_html=True)
+            with eval_cols[2]:
+                st.markdown(f"<div class='metric-card'><div class='metric-value'>{prediction_result}</div><div class='metric-label'>Prediction Check</div></div>", unsafe_allow_html=True)
+            st.caption("The actual test outcome is shown only for evaluation after the model prediction; it is not used as a model input.")
+
+        if using_ai4i and model_diagnostics.get("model_comparison"):
+            with st.expander("Model comparison report", expanded=False):
+                comparison_df = pd.DataFrame(model_diagnostics["model_comparison"])
+                display_columns = ["model_name", "accuracy", "precision", "recall", "f1", "f2", "roc_auc"]
+                st.dataframe(
+                    comparison_df[[column for column in display_columns if column in comparison_df.columns]],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+
+    with measure("render.prescriptive"):
+        st.markdown("<div class='section-band'></div>", unsafe_allow_html=True)
+        st.markdown("### Prescriptive Analytics: Maintenance Reason And Action")
+
+        analytics_cols = st.columns(4)
+        with analytics_cols[0]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['maintenance_risk_pct']}%</div><div class='metric-label'>Predicted Maintenance Risk</div></div>", unsafe_allow_html=True)
+        with analytics_cols[1]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['risk_band']}</div><div class='metric-label'>Risk Band</div></div>", unsafe_allow_html=True)
+        with analytics_cols[2]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['confidence_pct']}%</div><div class='metric-label'>Prediction Confidence</div></div>", unsafe_allow_html=True)
+        with analytics_cols[3]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['time_to_service']}</div><div class='metric-label'>Service Window</div></div>", unsafe_allow_html=True)
+
+        cost_cols = st.columns(4)
+        with cost_cols[0]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['estimated_downtime_hours']:.1f} hrs</div><div class='metric-label'>Risk-Adjusted Downtime</div></div>", unsafe_allow_html=True)
+        with cost_cols[1]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{format_currency(selected_insight['expected_failure_cost'])}</div><div class='metric-label'>Expected Failure Cost</div></div>", unsafe_allow_html=True)
+        with cost_cols[2]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{format_currency(selected_insight['expected_preventive_cost'])}</div><div class='metric-label'>Preventive Cost</div></div>", unsafe_allow_html=True)
+        with cost_cols[3]:
+            st.markdown(f"<div class='metric-card'><div class='metric-value'>{format_currency(selected_insight['estimated_cost_avoided'])}</div><div class='metric-label'>Estimated Cost Avoided</div></div>", unsafe_allow_html=True)
+
+        st.markdown(
+            f"""
+            <div class='analytics-card'>
+                <div class='analytics-title'>Likely reason: {selected_insight['predicted_reason']}</div>
+                <div class='analytics-copy'><strong>Forecast horizon:</strong> {selected_insight['forecast_horizon']}</div>
+                <div class='analytics-copy'><strong>Evidence:</strong> {selected_insight['evidence']}</div>
+                <div class='analytics-copy'><strong>Recommended action:</strong> {selected_insight['prescribed_action']}</div>
+                <div class='analytics-copy'><strong>Cost logic:</strong> Preventive action is compared with expected downtime and corrective repair cost for this risk level.</div>
+            </div>
+            """,
+            unsafe_allow_html=True,
         )
 
-st.markdown("<div class='section-band'></div>", unsafe_allow_html=True)
-st.markdown("### Prescriptive Analytics: Maintenance Reason And Action")
-
-analytics_cols = st.columns(4)
-with analytics_cols[0]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['maintenance_risk_pct']}%</div><div class='metric-label'>Predicted Maintenance Risk</div></div>", unsafe_allow_html=True)
-with analytics_cols[1]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['risk_band']}</div><div class='metric-label'>Risk Band</div></div>", unsafe_allow_html=True)
-with analytics_cols[2]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['confidence_pct']}%</div><div class='metric-label'>Prediction Confidence</div></div>", unsafe_allow_html=True)
-with analytics_cols[3]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['time_to_service']}</div><div class='metric-label'>Service Window</div></div>", unsafe_allow_html=True)
-
-cost_cols = st.columns(4)
-with cost_cols[0]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{selected_insight['estimated_downtime_hours']:.1f} hrs</div><div class='metric-label'>Risk-Adjusted Downtime</div></div>", unsafe_allow_html=True)
-with cost_cols[1]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{format_currency(selected_insight['expected_failure_cost'])}</div><div class='metric-label'>Expected Failure Cost</div></div>", unsafe_allow_html=True)
-with cost_cols[2]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{format_currency(selected_insight['expected_preventive_cost'])}</div><div class='metric-label'>Preventive Cost</div></div>", unsafe_allow_html=True)
-with cost_cols[3]:
-    st.markdown(f"<div class='metric-card'><div class='metric-value'>{format_currency(selected_insight['estimated_cost_avoided'])}</div><div class='metric-label'>Estimated Cost Avoided</div></div>", unsafe_allow_html=True)
-
-st.markdown(
-    f"""
-    <div class='analytics-card'>
-        <div class='analytics-title'>Likely reason: {selected_insight['predicted_reason']}</div>
-        <div class='analytics-copy'><strong>Forecast horizon:</strong> {selected_insight['forecast_horizon']}</div>
-        <div class='analytics-copy'><strong>Evidence:</strong> {selected_insight['evidence']}</div>
-        <div class='analytics-copy'><strong>Recommended action:</strong> {selected_insight['prescribed_action']}</div>
-        <div class='analytics-copy'><strong>Cost logic:</strong> Preventive action is compared with expected downtime and corrective repair cost for this risk level.</div>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
-
-analytics_row = st.columns([1, 1])
-with analytics_row[0]:
-    maintenance_chart_df = (
-        maintenance_insights.set_index("machine_type")
-        .loc[machine_options]
-        .reset_index()
-    )
-    risk_chart = px.bar(
-        maintenance_chart_df,
-        x="machine_type",
-        y="maintenance_risk_pct",
-        color="risk_band",
-        color_discrete_map={
-            "Normal": "#69d2a3",
-            "Watch": "#f7d154",
-            "High": "#ff9f43",
-            "Critical": "#ff4d4d",
-        },
-        title="Predicted Maintenance Risk by Machine",
-        labels={"maintenance_risk_pct": "Risk (%)", "machine_type": "Machine"},
-        category_orders={"machine_type": machine_options},
-    )
-    risk_chart.update_layout(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font_color="white",
-        title_font=dict(size=16),
-        yaxis=dict(range=[0, 100]),
-        margin=dict(t=40, b=20),
-    )
-    st.plotly_chart(risk_chart, use_container_width=True)
-
-with analytics_row[1]:
-    st.dataframe(
-        maintenance_insights[[
-            "machine_type",
-            "maintenance_risk_pct",
-            "risk_band",
-            "predicted_reason",
-            "forecast_horizon",
-            "time_to_service",
-            "estimated_cost_avoided",
-            "prescribed_action",
-        ]].rename(columns={
-            "machine_type": "Machine",
-            "maintenance_risk_pct": "Risk %",
-            "risk_band": "Band",
-            "predicted_reason": "Predicted Reason",
-            "forecast_horizon": "Forecast Horizon",
-            "time_to_service": "Service Window",
-            "estimated_cost_avoided": "Cost Avoided",
-            "prescribed_action": "Recommended Action",
-        }),
-        hide_index=True,
-        use_container_width=True,
+        analytics_row = st.columns([1, 1])
+        with analytics_row[0]:
+            maintenance_chart_df = (
+                maintenance_insights.set_index("machine_type")
+                .loc[machine_options]
+                .reset_index()
+            )
+            show_figure("risk_chart", risk_chart_template(), patch_risk_chart, maintenance_chart_df, machine_options)
+
+        with analytics_row[1]:
+            st.dataframe(
+                maintenance_insights[[
+                    "machine_type",
+                    "maintenance_risk_pct",
+                    "risk_band",
+                    "predicted_reason",
+                    "forecast_horizon",
+                    "time_to_service",
+                    "estimated_cost_avoided",
+                    "prescribed_action",
+                ]].rename(columns={
+                    "machine_type": "Machine",
+                    "maintenance_risk_pct": "Risk %",
+                    "risk_band": "Band",
+                    "predicted_reason": "Predicted Reason",
+                    "forecast_horizon": "Forecast Horizon",
+                    "time_to_service": "Service Window",
+                    "estimated_cost_avoided": "Cost Avoided",
+                    "prescribed_action": "Recommended Action",
+                }),
+                hide_index=True,
+                use_container_width=True,
+            )
+
+        alert_conditions = []
+        if selected_row["oil_temp"] > 110:
+            alert_conditions.append(f"{selected_machine} - Oil temperature is critically high.")
+        if selected_row["vibration"] > 10:
+            alert_conditions.append(f"{selected_machine} - Abnormal vibration levels detected.")
+        if selected_row["bearing_temp"] > 115:
+            alert_conditions.append(f"{selected_machine} - Bearing temperature is too high.")
+        if selected_insight["maintenance_risk_pct"] >= 50:
+            alert_conditions.append(
+                f"Prescriptive analytics recommends maintenance for {selected_machine}: {selected_insight['predicted_reason']}"
+            )
+
+        sound_enabled = st.checkbox("Enable Sound Alerts", value=False, help="Play audio when alerts are triggered")
+
+        if alert_conditions:
+            if sound_enabled:
+                st.audio(str(ASSET_DIR / "alert.mp3"), format="audio/mp3", autoplay=True)
+            for msg in alert_conditions:
+                st.markdown(f"<div class='alert-box'>{msg}</div>", unsafe_allow_html=True)
+
+    with measure("render.gauges"):
+        gauge_cols = st.columns(2) + st.columns(2)
+        for gauge_col, (column, title, green_range, orange_range, red_range, unit) in zip(gauge_cols, GAUGES):
+            with gauge_col:
+                show_figure(("gauge", column), gauge_template(red_range, unit), patch_gauge, selected_row[column], green_range, orange_range)
+                st.markdown(f"<div class='gauge-title'>{title}</div>", unsafe_allow_html=True)
+
+    with measure("render.charts"):
+        chart_row = st.columns(2)
+        with chart_row[0]:
+            daily_prod = engine.derived(snapshot, "daily_production", lambda: daily_production(engine, snapshot))
+            show_figure("daily_production", daily_production_template(), patch_series, daily_prod["machine_type"].tolist(), daily_prod["units_produced"].tolist())
+
+        with chart_row[1]:
+            st.markdown(f"### Efficiency Trend for {selected_machine}")
+            trend = engine.trend(snapshot, selected_machine, "production_efficiency")
+            if trend is not None:
+                show_figure(
+                    "efficiency_trend",
+                    trend_template("Efficiency (%)"),
+                    patch_series,
+                    trend["timestamp"].to_numpy(),
+                    trend["production_efficiency"].to_numpy(),
+                    f"{selected_machine} Production Efficiency Over Time",
+                )
+            else:
+                st.info("No data available yet for this machine.")
+
+    with measure("render.recent_data"):
+        st.markdown(f"### Recent Data for {selected_machine}")
+        recent_data = engine.derived(snapshot, ("recent_data", selected_machine), lambda: recent_records(history_df, selected_machine))
+        st.dataframe(recent_data, use_container_width=True)
+        compact_mb, wide_mb = engine.derived(
+            snapshot,
+            "history_memory",
+            lambda: memory_per_100k_rows(history_df.tail(HISTORY_MEMORY_SAMPLE_ROWS)),
+        )
+        st.caption(
+            f"History memory: {compact_mb:.1f} MB per 100k rows with the compact schema "
+            f"({wide_mb:.1f} MB with default float64/int64/object columns)."
+        )
+    panel_ms = TIMINGS.record("render.machine_panels", (time.perf_counter() - panel_started) * 1000)
+    figure_ms = st.session_state.figure_ms
+    render_timing = (
+        f"Render time: machine panels {panel_ms:.0f} ms "
+        f"(figures: build {figure_ms['build']:.0f} ms, serialize {figure_ms['serialize']:.0f} ms)"
     )
+    page_ms = TIMINGS.last("render.page")
+    if page_ms is not None:
+        render_timing += f", last full page {page_ms:.0f} ms"
+    st.caption(render_timing + ".")
 
-alert_conditions = []
-if selected_row["oil_temp"] > 110:
-    alert_conditions.append(f"{selected_machine} - Oil temperature is critically high.")
-if selected_row["vibration"] > 10:
-    alert_conditions.append(f"{selected_machine} - Abnormal vibration levels detected.")
-if selected_row["bearing_temp"] > 115:
-    alert_conditions.append(f"{selected_machine} - Bearing temperature is too high.")
-if selected_insight["maintenance_risk_pct"] >= 50:
-    alert_conditions.append(
-        f"Prescriptive analytics recommends maintenance for {selected_machine}: {selected_insight['predicted_reason']}"
-    )
 
-sound_enabled = st.checkbox("Enable Sound Alerts", value=False, help="Play audio when alerts are triggered")
-
-if alert_conditions:
-    if sound_enabled:
-        st.audio(str(ASSET_DIR / "alert.mp3"), format="audio/mp3", autoplay=True)
-    for msg in alert_conditions:
-        st.markdown(f"<div class='alert-box'>{msg}</div>", unsafe_allow_html=True)
-
-gauge_cols_1 = st.columns(2)
-gauge_cols_2 = st.columns(2)
-with gauge_cols_1[0]:
-    st.plotly_chart(create_gauge(selected_row["oil_temp"], (40, 70), (70, 85), (85, 120)), use_container_width=True)
-    st.markdown("<div class='gauge-title'>Oil Temp</div>", unsafe_allow_html=True)
-with gauge_cols_1[1]:
-    st.plotly_chart(create_gauge(selected_row["hydraulic_temp"], (30, 60), (60, 75), (75, 120)), use_container_width=True)
-    st.markdown("<div class='gauge-title'>Hydraulic Temp</div>", unsafe_allow_html=True)
-with gauge_cols_2[0]:
-    st.plotly_chart(create_gauge(selected_row["vibration"], (0.0, 4.0), (4.0, 7.0), (7.0, 15.0), unit="mm/s"), use_container_width=True)
-    st.markdown("<div class='gauge-title'>Vibration</div>", unsafe_allow_html=True)
-with gauge_cols_2[1]:
-    st.plotly_chart(create_gauge(selected_row["bearing_temp"], (40, 80), (80, 95), (95, 120)), use_container_width=True)
-    st.markdown("<div class='gauge-title'>Bearing Temp</div>", unsafe_allow_html=True)
-
-chart_row = st.columns(2)
-with chart_row[0]:
-    today = pd.Timestamp.now().normalize()
-    today_df = history_df[history_df["timestamp"] >= today]
-    daily_prod = today_df.groupby("machine_type")["units_produced"].sum().reset_index()
-    fig_bar = px.bar(daily_prod, x="machine_type", y="units_produced", title="Daily Production by Machine Type")
-    fig_bar.update_layout(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font_color="white",
-        title_font=dict(size=16),
-        margin=dict(t=40, b=20),
+render_machine_panels(engine, snapshot, model_diagnostics, using_ai4i)
+
+if not live_mode:
+    st.info("Replay is paused after each render. Use Step one row to test the next held-out record.")
+
+with st.expander("Performance", expanded=False):
+    st.caption(
+        f"Rolling timings over the newest {TIMINGS.window} samples per stage, shared by every session. "
+        "Render and figure stages are measured on the page; the rest run wherever the engine does the work."
     )
-    st.plotly_chart(fig_bar, use_container_width=True)
-
-with chart_row[1]:
-    st.markdown(f"### Efficiency Trend for {selected_machine}")
-    history_df["timestamp"] = pd.to_datetime(history_df["timestamp"])
-    machine_df = history_df[history_df["machine_type"] == selected_machine].sort_values("timestamp")
-
-    if not machine_df.empty:
-        fig = px.line(
-            machine_df,
-            x="timestamp",
-            y="production_efficiency",
-            title=f"{selected_machine} Production Efficiency Over Time",
-            labels={"production_efficiency": "Efficiency (%)", "timestamp": "Time"},
-        )
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="white",
-            title_font=dict(size=16),
-            margin=dict(t=30, b=20),
-        )
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("No data available yet for this machine.")
-
-st.markdown(f"### Recent Data for {selected_machine}")
-selected_machine_df = history_df[history_df["machine_type"] == selected_machine]
-recent_data = selected_machine_df.tail(10).copy()
-rounded_columns = {
-    "oil_temp": 1,
-    "hydraulic_temp": 1,
-    "bearing_temp": 1,
-    "vibration": 2,
-    "production_efficiency": 2,
-    "defect_rate": 2,
-    "energy_usage": 2,
-}
-recent_data = recent_data.round(rounded_columns)
-recent_data["energy_cost"] = recent_data["energy_cost"].map("${:.2f}".format)
-st.dataframe(recent_data, use_container_width=True)
-
-st.info("Replay is paused after each render. Use Step one row to test the next held-out record.")
+    stage_summary = TIMINGS.summary()
+    if stage_summary:
+        st.dataframe(pd.DataFrame.from_dict(stage_summary, orient="index").round(2), use_container_width=True)
+        st.download_button("Download timings (JSON)", TIMINGS.to_json(), file_name="dashboard_timings.json", mime="application/json")
+    cache_stats = prediction_cache_stats()
+    st.caption(
+        f"Prediction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+        f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['evictions']} evictions, "
+        f"{cache_stats['entries']}/{cache_stats['max_entries']} entries."
+    )
+
+TIMINGS.record("render.page", (time.perf_counter() - page_started) * 1000)
+if snapshot["produced_at"] is not None and snapshot["version"] != st.session_state.rendered_version:
+    TIMINGS.record("live_lag", (time.time() - snapshot["produced_at"]) * 1000)
+st.session_state.rendered_version = snapshot["version"]
+if live_mode:
+    st.session_state.live_page_rendering = True
+    poll_live_engine(engine)
@@ -1,15 +1,21 @@
 import datetime
+import hashlib
+import json
+import os
 from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+
+from manufacturing_dashboard.perf import timed
 
 
 DATASET_PATH = Path(__file__).resolve().parents[2] / "data" / "ai4i2020.csv"
+SNAPSHOT_DIR = DATASET_PATH.parent / ".cache"
 TRAIN_FRACTION = 0.70
 TEST_FRACTION = 0.30
+VALIDATION_FRACTION = 0.20
 SPLIT_RANDOM_STATE = 42
 EXPECTED_OUTPUT = {
     "H": 4,
@@ -23,203 +29,603 @@ FAILURE_LABELS = {
     "OSF": "Overstrain failure",
     "RNF": "Random failure",
 }
+AI4I_COLUMNS = {
+    "UDI": "udi",
+    "Product ID": "product_id",
+    "Type": "product_type",
+    "Air temperature [K]": "air_temperature_k",
+    "Process temperature [K]": "process_temperature_k",
+    "Rotational speed [rpm]": "rotational_speed_rpm",
+    "Torque [Nm]": "torque_nm",
+    "Tool wear [min]": "tool_wear_min",
+    "Machine failure": "machine_failure",
+}
+AI4I_CSV_DTYPES = {
+    "UDI": "int64",
+    "Product ID": "str",
+    "Type": "str",
+    "Air temperature [K]": "float64",
+    "Process temperature [K]": "float64",
+    "Rotational speed [rpm]": "int64",
+    "Torque [Nm]": "float64",
+    "Tool wear [min]": "int64",
+    "Machine failure": "int64",
+    **{col: "int64" for col in FAILURE_LABELS},
+}
+KELVIN_OFFSET = 273.15
+READING_DEFAULTS = {
+    "product_id": "",
+    "udi": 0,
+    "machine_failure": 0,
+    **{col: 0 for col in FAILURE_LABELS},
+}
+STREAM_CHUNK_ROWS = 50_000
+REPLAY_PRODUCT_TYPES = ["H", "M", "L"]
+REPLAY_STEP_INTERVAL = datetime.timedelta(seconds=1)
+DEFAULT_FLEET_SIZE = 3
+FLEET_INITIAL_HEALTH = {
+    "bearing_wear": (0.05, 0.18),
+    "lubrication_stress": (0.03, 0.14),
+    "hydraulic_stress": (0.03, 0.12),
+}
+FLEET_WEAR_RATES = {
+    "bearing_wear": (0.003, 0.018),
+    "lubrication_stress": (0.002, 0.015),
+    "hydraulic_stress": (0.001, 0.011),
+}
+FLEET_SHOCK_PROBABILITY = 0.04
+FLEET_SHOCK_SIZE = 0.12
+SNAPSHOT_VERSION = 2
+SPLIT_NAMES = ("train", "test", "fit", "validation")
+
+
+def _failure_type_categories():
+    categories = []
+    for value in range(1 << len(FAILURE_LABELS)):
+        labels = [label for bit, label in enumerate(FAILURE_LABELS.values()) if value & (1 << bit)]
+        categories.append(", ".join(labels) if labels else "None")
+    return categories
+
+
+# Compact in-memory schema shared by the dataset, replay rows and replay history.
+# Sensor readings fit float32 without visible loss (the tree models compare in
+# float32 anyway); labels become fixed categoricals so concatenated history keeps them.
+PRODUCT_TYPE_DTYPE = pd.CategoricalDtype(REPLAY_PRODUCT_TYPES)
+FAILURE_TYPE_DTYPE = pd.CategoricalDtype(_failure_type_categories())
+DATASET_SPLIT_DTYPE = pd.CategoricalDtype(["train", "test", "live"])
+COMPACT_SCHEMA = {
+    "udi": "int32",
+    "product_type": PRODUCT_TYPE_DTYPE,
+    "machine_type": PRODUCT_TYPE_DTYPE,
+    "air_temperature_k": "float32",
+    "process_temperature_k": "float32",
+    "air_temp_c": "float32",
+    "process_temp_c": "float32",
+    "rotational_speed_rpm": "float32",
+    "torque_nm": "float32",
+    "tool_wear_min": "float32",
+    "power_kw": "float32",
+    "machine_failure": "int8",
+    "failure_type": FAILURE_TYPE_DTYPE,
+    "dataset_split": DATASET_SPLIT_DTYPE,
+    **{col: "int8" for col in FAILURE_LABELS},
+    "oil_temp": "float32",
+    "hydraulic_temp": "float32",
+    "bearing_temp": "float32",
+    "vibration": "float32",
+    "units_produced": "int8",
+    "defect_rate": "float32",
+    "production_efficiency": "float32",
+    "energy_usage": "float32",
+    "energy_cost": "float32",
+}
+
+
+def apply_compact_schema(df, schema=None):
+    """Cast known columns to the compact schema; unknown columns are left as they are."""
+    schema = COMPACT_SCHEMA if schema is None else schema
+    casts = {column: dtype for column, dtype in schema.items() if column in df and df[column].dtype != dtype}
+    return df.astype(casts) if casts else df
+
+
+def memory_per_100k_rows(df):
+    """Return (compact, wide) megabytes per 100k rows for a history-like frame."""
+    if df.empty:
+        return 0.0, 0.0
+    wide_types = {}
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            wide_types[column] = object
+        elif pd.api.types.is_integer_dtype(dtype):
+            wide_types[column] = "int64"
+        elif pd.api.types.is_float_dtype(dtype):
+            wide_types[column] = "float64"
+    wide = df.astype(wide_types)
+    scale = 100_000 / len(df) / 1e6
+    return (
+        float(df.memory_usage(deep=True).sum()) * scale,
+        float(wide.memory_usage(deep=True).sum()) * scale,
+    )
 
 
-def _kelvin_to_celsius(value):
-    return float(value) - 273.15
+def _source_fingerprint(path, previous=None):
+    stat = path.stat()
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous and all(previous.get(key) == value for key, value in fingerprint.items()):
+        fingerprint["sha256"] = previous.get("sha256")
+        return fingerprint
 
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    fingerprint["sha256"] = digest.hexdigest()
+    return fingerprint
 
-def _clamp(value, lower, upper):
-    return max(lower, min(upper, value))
+
+def _failure_type_labels(df):
+    # The five failure flags form a bitmask, which is also the category code.
+    mask = np.zeros(len(df), dtype=np.int8)
+    for bit, col in enumerate(FAILURE_LABELS):
+        if col in df:
+            mask |= (df[col].to_numpy() == 1).astype(np.int8) << bit
+    return pd.Categorical.from_codes(mask, dtype=FAILURE_TYPE_DTYPE)
+
+
+def _prepare_ai4i_frame(df):
+    df = df.rename(columns=AI4I_COLUMNS)
+    df["machine_type"] = df["product_type"]
+    df["air_temp_c"] = df["air_temperature_k"] - KELVIN_OFFSET
+    df["process_temp_c"] = df["process_temperature_k"] - KELVIN_OFFSET
+    df["power_kw"] = df["torque_nm"] * df["rotational_speed_rpm"] / 9550
+    df["failure_type"] = _failure_type_labels(df)
+    return apply_compact_schema(df)
+
+
+def _snapshot_meta_path(source_path):
+    return SNAPSHOT_DIR / f"{source_path.stem}.json"
+
+
+def _snapshot_column_path(source_path, column):
+    return SNAPSHOT_DIR / f"{source_path.stem}.{column}.npy"
+
+
+def _snapshot_splits_path(source_path):
+    return SNAPSHOT_DIR / f"{source_path.stem}.splits.npz"
+
+
+def _read_snapshot_meta(source_path):
+    try:
+        return json.loads(_snapshot_meta_path(source_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _load_snapshot(source_path):
+    meta = _read_snapshot_meta(source_path)
+    if meta is None:
+        return None
+
+    try:
+        if meta.get("version") != SNAPSHOT_VERSION:
+            return None
+        fingerprint = _source_fingerprint(source_path, meta["source"])
+        if fingerprint["sha256"] != meta["source"]["sha256"]:
+            return None
+        columns = {}
+        for column in meta["columns"]:
+            values = np.load(_snapshot_column_path(source_path, column), mmap_mode="r", allow_pickle=False)
+            categories = meta["categories"].get(column)
+            if categories is not None:
+                values = pd.Categorical.from_codes(values, categories=categories)
+            columns[column] = values
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+    if fingerprint != meta["source"]:
+        # Same bytes with a new mtime (copied or touched file): refresh the key only.
+        meta["source"] = fingerprint
+        _write_snapshot_meta(source_path, meta)
+    return pd.DataFrame(columns, copy=False)
+
+
+def _write_snapshot_meta(source_path, meta):
+    meta_path = _snapshot_meta_path(source_path)
+    temp_path = meta_path.with_suffix(".json.tmp")
+    try:
+        temp_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        os.replace(temp_path, meta_path)
+    except OSError:
+        pass
+
+
+def _write_snapshot(df, source_path):
+    categories = {}
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                values = df[column].cat.codes.to_numpy()
+                categories[column] = df[column].cat.categories.tolist()
+            else:
+                values = df[column].to_numpy()
+                if not np.issubdtype(values.dtype, np.number):
+                    values = values.astype(str)
+            np.save(_snapshot_column_path(source_path, column), values, allow_pickle=False)
+    except OSError:
+        return
+
+    _write_snapshot_meta(source_path, {
+        "version": SNAPSHOT_VERSION,
+        "source": _source_fingerprint(source_path),
+        "columns": list(df.columns),
+        "categories": categories,
+    })
 
 
 @lru_cache(maxsize=1)
+@timed("dataset_load")
 def load_ai4i_dataset():
     if not DATASET_PATH.exists():
         return pd.DataFrame()
 
-    df = pd.read_csv(DATASET_PATH)
-    df = df.rename(columns={
-        "UDI": "udi",
-        "Product ID": "product_id",
-        "Type": "product_type",
-        "Air temperature [K]": "air_temperature_k",
-        "Process temperature [K]": "process_temperature_k",
-        "Rotational speed [rpm]": "rotational_speed_rpm",
-        "Torque [Nm]": "torque_nm",
-        "Tool wear [min]": "tool_wear_min",
-        "Machine failure": "machine_failure",
-    })
-    df["machine_type"] = df["product_type"]
-    df["air_temp_c"] = df["air_temperature_k"].map(_kelvin_to_celsius)
-    df["process_temp_c"] = df["process_temperature_k"].map(_kelvin_to_celsius)
-    df["power_kw"] = df["torque_nm"] * df["rotational_speed_rpm"] / 9550
-    df["failure_type"] = df.apply(_failure_type, axis=1)
+    snapshot = _load_snapshot(DATASET_PATH)
+    if snapshot is not None:
+        return snapshot
+
+    df = _prepare_ai4i_frame(pd.read_csv(DATASET_PATH, dtype=AI4I_CSV_DTYPES))
+    _write_snapshot(df, DATASET_PATH)
     return df
 
 
-@lru_cache(maxsize=2)
+def iter_ai4i_chunks(path=DATASET_PATH, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield renamed, typed and derived AI4I-schema chunks without loading the whole file."""
+    with pd.read_csv(path, dtype=AI4I_CSV_DTYPES, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield _prepare_ai4i_frame(chunk)
+
+
+def compute_split_positions(labels):
+    """Stratified train/test split, then fit/validation inside train, as row positions."""
+    from sklearn.model_selection import train_test_split
+
+    labels = np.asarray(labels)
+    train_positions, test_positions = train_test_split(
+        np.arange(len(labels)),
+        test_size=TEST_FRACTION,
+        random_state=SPLIT_RANDOM_STATE,
+        stratify=labels,
+    )
+    train_positions = np.sort(train_positions)
+    test_positions = np.sort(test_positions)
+    # Fit/validation keep train_test_split's shuffled order so model fitting is reproducible.
+    fit_positions, validation_positions = train_test_split(
+        train_positions,
+        test_size=VALIDATION_FRACTION,
+        random_state=SPLIT_RANDOM_STATE,
+        stratify=labels[train_positions],
+    )
+    return {
+        "train": train_positions,
+        "test": test_positions,
+        "fit": fit_positions,
+        "validation": validation_positions,
+    }
+
+
+def _split_key():
+    meta = _read_snapshot_meta(DATASET_PATH) or {}
+    fingerprint = _source_fingerprint(DATASET_PATH, meta.get("source"))
+    return json.dumps({
+        "sha256": fingerprint["sha256"],
+        "test_fraction": TEST_FRACTION,
+        "validation_fraction": VALIDATION_FRACTION,
+        "random_state": SPLIT_RANDOM_STATE,
+    }, sort_keys=True)
+
+
+@lru_cache(maxsize=1)
+def load_split_udis():
+    """Return persisted train/test/fit/validation UDI arrays, computing them once."""
+    dataset = load_ai4i_dataset()
+    if dataset.empty:
+        return {}
+
+    key = _split_key()
+    splits_path = _snapshot_splits_path(DATASET_PATH)
+    try:
+        with np.load(splits_path, allow_pickle=False) as stored:
+            if str(stored["key"]) == key:
+                return {split: stored[split] for split in SPLIT_NAMES}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    udis = dataset["udi"].to_numpy()
+    split_udis = {
+        split: udis[positions]
+        for split, positions in compute_split_positions(dataset["machine_failure"]).items()
+    }
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        temp_path = splits_path.with_suffix(".tmp.npz")
+        np.savez(temp_path, key=np.asarray(key), **split_udis)
+        os.replace(temp_path, splits_path)
+    except OSError:
+        pass
+    return split_udis
+
+
+@lru_cache(maxsize=len(SPLIT_NAMES) + 1)
 def load_ai4i_split(split):
     dataset = load_ai4i_dataset()
     if dataset.empty:
         return pd.DataFrame()
 
-    train_df, test_df = train_test_split(
-        dataset,
-        test_size=TEST_FRACTION,
-        random_state=SPLIT_RANDOM_STATE,
-        stratify=dataset["machine_failure"],
-    )
-    train_df = train_df.sort_values("udi").copy()
-    test_df = test_df.sort_values("udi").copy()
-    train_df["dataset_split"] = "train"
-    test_df["dataset_split"] = "test"
-
-    if split == "train":
-        return train_df.reset_index(drop=True)
-    if split == "test":
-        return test_df.reset_index(drop=True)
-    return dataset.copy().reset_index(drop=True)
-
-
-def _failure_type(row):
-    failures = [label for col, label in FAILURE_LABELS.items() if int(row.get(col, 0)) == 1]
-    if failures:
-        return ", ".join(failures)
-    return "None"
-
-
-def _dashboard_row_from_ai4i(row, now):
-    machine = row["machine_type"]
-    expected = EXPECTED_OUTPUT[machine]
-    failure = int(row["machine_failure"])
-    tool_wear = float(row["tool_wear_min"])
-    torque = float(row["torque_nm"])
-    rpm = float(row["rotational_speed_rpm"])
-    power_kw = float(row["power_kw"])
-    process_temp_c = float(row["process_temp_c"])
-    air_temp_c = float(row["air_temp_c"])
-    torque_load = _clamp(torque / 65, 0, 1.4)
-    wear_load = _clamp(tool_wear / 250, 0, 1.2)
-    rpm_instability = _clamp(abs(rpm - 1500) / 700, 0, 1.4)
+    split_udis = load_split_udis()
+    if split not in split_udis:
+        return dataset.copy().reset_index(drop=True)
+
+    positions = pd.Index(dataset["udi"]).get_indexer(split_udis[split])
+    frame = dataset.take(positions).reset_index(drop=True)
+    label = "test" if split == "test" else "train"
+    frame["dataset_split"] = pd.Series(label, index=frame.index, dtype=DATASET_SPLIT_DTYPE)
+    return frame
+
+
+def _dashboard_frame_from_ai4i(df, timestamps):
+    expected = df["machine_type"].map(EXPECTED_OUTPUT).to_numpy(dtype=np.int64)
+    tool_wear = df["tool_wear_min"].to_numpy(dtype=float)
+    torque = df["torque_nm"].to_numpy(dtype=float)
+    rpm = df["rotational_speed_rpm"].to_numpy(dtype=float)
+    power_kw = df["power_kw"].to_numpy(dtype=float)
+    process_temp_c = df["process_temp_c"].to_numpy(dtype=float)
+    air_temp_c = df["air_temp_c"].to_numpy(dtype=float)
+    torque_load = np.clip(torque / 65, 0, 1.4)
+    wear_load = np.clip(tool_wear / 250, 0, 1.2)
+    rpm_instability = np.clip(np.abs(rpm - 1500) / 700, 0, 1.4)
 
     oil_temp = process_temp_c + 42 + torque_load * 18 + wear_load * 10
     hydraulic_temp = air_temp_c + 34 + power_kw * 2.8 + rpm_instability * 5
     bearing_temp = process_temp_c + 38 + torque_load * 15 + wear_load * 18
     vibration = 2.2 + rpm_instability * 2.4 + torque_load * 1.2 + wear_load * 3.4
 
-    actual_output = max(1, expected - int(wear_load > 0.9))
-    efficiency = _clamp((actual_output / expected) * 100 - wear_load * 12, 20, 100)
+    actual_output = np.maximum(1, expected - (wear_load > 0.9).astype(np.int64))
+    efficiency = np.clip((actual_output / expected) * 100 - wear_load * 12, 20, 100)
     defect_rate = 0.4 + wear_load * 2.2 + torque_load * 0.6
-    energy_usage = max(0.5, power_kw * 0.45 + torque_load * 1.1)
-
-    return {
-        "timestamp": now,
-        "machine_type": machine,
-        "product_type": row["product_type"],
-        "product_id": row["product_id"],
-        "udi": int(row["udi"]),
-        "air_temperature_k": row["air_temperature_k"],
-        "process_temperature_k": row["process_temperature_k"],
+    energy_usage = np.maximum(0.5, power_kw * 0.45 + torque_load * 1.1)
+
+    if "dataset_split" in df:
+        dataset_split = df["dataset_split"].array
+    else:
+        dataset_split = np.full(len(df), "test", dtype=object)
+
+    return apply_compact_schema(pd.DataFrame({
+        "timestamp": timestamps,
+        "machine_type": df["machine_type"].array,
+        "product_type": df["product_type"].array,
+        "product_id": df["product_id"].to_numpy(),
+        "udi": df["udi"].to_numpy(),
+        "air_temperature_k": df["air_temperature_k"].to_numpy(),
+        "process_temperature_k": df["process_temperature_k"].to_numpy(),
         "air_temp_c": air_temp_c,
         "process_temp_c": process_temp_c,
         "rotational_speed_rpm": rpm,
         "torque_nm": torque,
         "tool_wear_min": tool_wear,
         "power_kw": power_kw,
-        "machine_failure": failure,
-        "failure_type": row["failure_type"],
-        "dataset_split": row.get("dataset_split", "test"),
-        "TWF": int(row["TWF"]),
-        "HDF": int(row["HDF"]),
-        "PWF": int(row["PWF"]),
-        "OSF": int(row["OSF"]),
-        "RNF": int(row["RNF"]),
+        "machine_failure": df["machine_failure"].to_numpy(),
+        "failure_type": df["failure_type"].array,
+        "dataset_split": dataset_split,
+        **{col: df[col].to_numpy() for col in FAILURE_LABELS},
         "oil_temp": oil_temp,
         "hydraulic_temp": hydraulic_temp,
         "bearing_temp": bearing_temp,
         "vibration": vibration,
         "units_produced": actual_output,
-        "defect_rate": round(defect_rate, 2),
-        "production_efficiency": round(efficiency, 2),
-        "energy_usage": round(energy_usage, 2),
-        "energy_cost": round(energy_usage * 0.18, 2),
-    }
+        "defect_rate": np.round(defect_rate, 2),
+        "production_efficiency": np.round(efficiency, 2),
+        "energy_usage": np.round(energy_usage, 2),
+        "energy_cost": np.round(energy_usage * 0.18, 2),
+    }))
+
+
+def readings_to_dashboard_frame(readings, now=None):
+    """Build dashboard rows from raw sensor readings that use the renamed AI4I columns."""
+    readings = pd.DataFrame(readings)
+    for column, default in READING_DEFAULTS.items():
+        if column not in readings:
+            readings[column] = default
+    readings = readings.fillna(READING_DEFAULTS)
+    readings["dataset_split"] = "live"
+    if now is None:
+        now = datetime.datetime.now()
+    return _dashboard_frame_from_ai4i(_prepare_ai4i_frame(readings), now)
 
 
-def _get_ai4i_live_data(replay_state):
-    now = datetime.datetime.now()
+def iter_replay_chunks(chunks):
+    """Turn AI4I-schema chunks into dashboard replay frames, one chunk at a time."""
+    for chunk in chunks:
+        yield _dashboard_frame_from_ai4i(chunk, np.datetime64(datetime.datetime.now(), "us"))
+
+
+@lru_cache(maxsize=1)
+def load_replay_table():
+    """Precompute dashboard rows for the test split, stored per product type."""
     dataset = load_ai4i_split("test")
-    cursors = replay_state.setdefault("ai4i_cursors", {})
-    rows = []
+    if dataset.empty:
+        return {}
 
-    for product_type in ["H", "M", "L"]:
+    frames = []
+    machines = {}
+    offset = 0
+    for product_type in REPLAY_PRODUCT_TYPES:
         machine_rows = dataset[dataset["product_type"] == product_type].reset_index(drop=True)
-        cursor = cursors.get(product_type)
-        if cursor is None:
-            failure_positions = np.flatnonzero(machine_rows["machine_failure"].to_numpy() == 1)
-            cursor = max(int(failure_positions[0]) - 8, 0) if len(failure_positions) else 0
-        row = machine_rows.iloc[cursor % len(machine_rows)]
-        cursors[product_type] = cursor + 1
-        rows.append(_dashboard_row_from_ai4i(row, now))
+        if machine_rows.empty:
+            continue
+        frame = _dashboard_frame_from_ai4i(machine_rows, pd.NaT).drop(columns="timestamp")
+        failure_positions = np.flatnonzero(frame["machine_failure"].to_numpy() == 1)
+        machines[product_type] = {
+            "offset": offset,
+            "length": len(frame),
+            "start": max(int(failure_positions[0]) - 8, 0) if len(failure_positions) else 0,
+        }
+        frames.append(frame)
+        offset += len(frame)
 
-    return pd.DataFrame(rows)
+    # One positional array per column; machines occupy contiguous row ranges.
+    table = pd.concat(frames, ignore_index=True)
+    return {
+        "columns": {column: table[column].array for column in table.columns},
+        "machines": machines,
+    }
 
 
-def _machine_state(health_state, machine_type):
-    if machine_type not in health_state:
-        health_state[machine_type] = {
-            "bearing_wear": np.random.uniform(0.05, 0.18),
-            "lubrication_stress": np.random.uniform(0.03, 0.14),
-            "hydraulic_stress": np.random.uniform(0.03, 0.12),
-        }
-    return health_state[machine_type]
+def _step_timestamps(steps):
+    # The newest step is stamped "now"; earlier steps are spaced one replay interval apart.
+    now = np.datetime64(datetime.datetime.now(), "us")
+    offsets = np.arange(steps - 1, -1, -1) * np.timedelta64(REPLAY_STEP_INTERVAL, "us")
+    return now - offsets
 
 
-def _advance_state(state):
-    state["bearing_wear"] = min(1.0, state["bearing_wear"] + np.random.uniform(0.003, 0.018))
-    state["lubrication_stress"] = min(1.0, state["lubrication_stress"] + np.random.uniform(0.002, 0.015))
-    state["hydraulic_stress"] = min(1.0, state["hydraulic_stress"] + np.random.uniform(0.001, 0.011))
+def _get_ai4i_live_data(replay_state, steps=1):
+    table = load_replay_table()
+    cursors = replay_state.setdefault("ai4i_cursors", {})
+    step_offsets = np.arange(steps)
+    positions = []
 
-    if np.random.rand() < 0.04:
-        stressed_component = np.random.choice(list(state.keys()))
-        state[stressed_component] = min(1.0, state[stressed_component] + 0.12)
+    for product_type, machine in table["machines"].items():
+        cursor = cursors.get(product_type)
+        if cursor is None:
+            cursor = machine["start"]
+        positions.append(machine["offset"] + (cursor + step_offsets) % machine["length"])
+        cursors[product_type] = cursor + steps
+
+    # Rows are step-major (every machine for step 1, then step 2, ...), matching
+    # the order produced by calling the single-step replay repeatedly.
+    rows = np.stack(positions, axis=1).reshape(-1)
+    columns = {"timestamp": np.repeat(_step_timestamps(steps), len(positions))}
+    for column, values in table["columns"].items():
+        columns[column] = values.take(rows)
+    return pd.DataFrame(columns)
+
+
+def _fleet_machine_ids(machines):
+    if machines == len(REPLAY_PRODUCT_TYPES):
+        return np.asarray(REPLAY_PRODUCT_TYPES, dtype=object)
+    return np.asarray(
+        [f"{REPLAY_PRODUCT_TYPES[index % len(REPLAY_PRODUCT_TYPES)]}-{index + 1:04d}" for index in range(machines)],
+        dtype=object,
+    )
+
+
+def _init_fleet_state(machines=DEFAULT_FLEET_SIZE, seed=None):
+    rng = np.random.default_rng(seed)
+    machine_types = np.resize(np.asarray(REPLAY_PRODUCT_TYPES, dtype=object), machines)
+    initial = rng.uniform(
+        [low for low, _ in FLEET_INITIAL_HEALTH.values()],
+        [high for _, high in FLEET_INITIAL_HEALTH.values()],
+        size=(machines, len(FLEET_INITIAL_HEALTH)),
+    )
+    machine_ids = _fleet_machine_ids(machines)
+    return {
+        "rng": rng,
+        "machine_ids": machine_ids,
+        "machine_dtype": pd.CategoricalDtype(machine_ids),
+        "expected_output": np.asarray([EXPECTED_OUTPUT[machine] for machine in machine_types], dtype=np.int64),
+        **{component: initial[:, index].copy() for index, component in enumerate(FLEET_INITIAL_HEALTH)},
+    }
 
 
-def _get_synthetic_live_data(health_state):
-    now = datetime.datetime.now()
-    machine_types = ["H", "M", "L"]
-    data = []
+def _advance_fleet_state(fleet, uniforms):
+    components = len(FLEET_WEAR_RATES)
+    shock = uniforms[components] < FLEET_SHOCK_PROBABILITY
+    shocked_component = (uniforms[components + 1] * components).astype(np.int64)
+
+    for index, (component, (low, high)) in enumerate(FLEET_WEAR_RATES.items()):
+        health = fleet[component] + low + uniforms[index] * (high - low)
+        health += np.where(shock & (shocked_component == index), FLEET_SHOCK_SIZE, 0.0)
+        np.minimum(health, 1.0, out=health)
+        fleet[component] = health
+
+
+def _get_synthetic_live_data(health_state, now=None):
+    if now is None:
+        now = datetime.datetime.now()
+    fleet = health_state.get("fleet")
+    if fleet is None:
+        fleet = _init_fleet_state(health_state.get("fleet_size", DEFAULT_FLEET_SIZE), health_state.get("seed"))
+        health_state["fleet"] = fleet
+
+    # One uniform block per step drives wear increments, random shocks and readings;
+    # one normal block adds the sensor noise.
+    machines = len(fleet["machine_ids"])
+    components = len(FLEET_WEAR_RATES)
+    uniforms = fleet["rng"].random((components + 6, machines))
+    noise = fleet["rng"].standard_normal((4, machines))
+    _advance_fleet_state(fleet, uniforms[:components + 2])
+    output_draw, defect_draw, energy_draw, cost_draw = uniforms[components + 2:]
+    expected = fleet["expected_output"]
+    bearing_wear = fleet["bearing_wear"]
+    lubrication_stress = fleet["lubrication_stress"]
+    hydraulic_stress = fleet["hydraulic_stress"]
+
+    actual_output = 1 + np.floor(output_draw * expected).astype(np.int64)
+    wear_drag = (bearing_wear + lubrication_stress) / 2
+    efficiency = np.maximum(35, np.round((actual_output / expected) * 100 - wear_drag * 16, 2))
+
+    frame = pd.DataFrame({
+        "timestamp": [now] * machines,
+        "machine_type": fleet["machine_ids"],
+        "oil_temp": 70 + noise[0] * 3 + lubrication_stress * 38,
+        "hydraulic_temp": 63 + noise[1] * 3 + hydraulic_stress * 30,
+        "bearing_temp": 82 + noise[2] * 4 + bearing_wear * 38,
+        "vibration": 4.6 + noise[3] * 0.65 + bearing_wear * 6.2,
+        "units_produced": actual_output,
+        "defect_rate": np.round(0.5 + defect_draw * 0.9 + bearing_wear * 1.2, 2),
+        "production_efficiency": efficiency,
+        "energy_usage": np.round(1 + energy_draw * 3 + wear_drag * 1.8, 2),
+        "energy_cost": np.round(0.2 + cost_draw * 0.4, 2),
+    })
+    return apply_compact_schema(frame, {**COMPACT_SCHEMA, "machine_type": fleet["machine_dtype"]})
 
-    for machine in machine_types:
-        state = _machine_state(health_state, machine)
-        _advance_state(state)
 
-        actual_output = np.random.randint(1, EXPECTED_OUTPUT[machine] + 1)
-        wear_drag = (state["bearing_wear"] + state["lubrication_stress"]) / 2
-        efficiency = max(35, round((actual_output / EXPECTED_OUTPUT[machine]) * 100 - wear_drag * 16, 2))
-        defect_rate = round(np.random.uniform(0.5, 1.4) + state["bearing_wear"] * 1.2, 2)
+def simulate_fleet(machines=DEFAULT_FLEET_SIZE, steps=1, seed=None):
+    """Run the synthetic fleet simulator standalone, e.g. to load-test analytics."""
+    return _get_synthetic_steps({"fleet_size": int(machines), "seed": seed}, max(int(steps), 1))
 
-        data.append({
-            "timestamp": now,
-            "machine_type": machine,
-            "oil_temp": np.random.normal(70, 3) + state["lubrication_stress"] * 38,
-            "hydraulic_temp": np.random.normal(63, 3) + state["hydraulic_stress"] * 30,
-            "bearing_temp": np.random.normal(82, 4) + state["bearing_wear"] * 38,
-            "vibration": np.random.normal(4.6, 0.65) + state["bearing_wear"] * 6.2,
-            "units_produced": actual_output,
-            "defect_rate": defect_rate,
-            "production_efficiency": efficiency,
-            "energy_usage": round(np.random.uniform(1, 4) + wear_drag * 1.8, 2),
-            "energy_cost": round(np.random.uniform(0.2, 0.6), 2),
-        })
 
-    return pd.DataFrame(data)
+def _get_synthetic_steps(health_state, steps):
+    if steps == 1:
+        return _get_synthetic_live_data(health_state)
+    return pd.concat(
+        [_get_synthetic_live_data(health_state, pd.Timestamp(now)) for now in _step_timestamps(steps)],
+        ignore_index=True,
+    )
 
 
-def get_live_data(health_state=None):
+@timed("get_live_data")
+def get_live_data(health_state=None, steps=1):
+    """Advance every machine by ``steps`` readings and return all rows in one frame."""
     if health_state is None:
         health_state = {}
+    steps = max(int(steps), 1)
     if not load_ai4i_split("test").empty:
-        return _get_ai4i_live_data(health_state)
-    return _get_synthetic_live_data(health_state)
+        return _get_ai4i_live_data(health_state, steps)
+    return _get_synthetic_steps(health_state, steps)
+
+
+def live_machine_count(health_state=None):
+    """Number of rows one replay step produces for this health state."""
+    table = load_replay_table()
+    if table:
+        return len(table["machines"])
+    health_state = health_state or {}
+    fleet = health_state.get("fleet")
+    if fleet is not None:
+        return len(fleet["machine_ids"])
+    return int(health_state.get("fleet_size", DEFAULT_FLEET_SIZE))
+
+
+def latest_readings(live_df):
+    """Return the newest row per machine from a (possibly multi-step) live frame."""
+    return live_df.drop_duplicates("machine_type", keep="last").reset_index(drop=True)
@@ -0,0 +1,122 @@
+import numpy as np
+
+
+DEFAULT_MAX_POINTS = 1000
+
+
+def _min_max(x, y):
+    """Keep each row's minimum and maximum point, in their original order."""
+    low = np.argmin(np.where(np.isnan(y), np.inf, y), axis=1)
+    high = np.argmax(np.where(np.isnan(y), -np.inf, y), axis=1)
+    keep = np.column_stack([np.minimum(low, high), np.maximum(low, high)])
+    return np.take_along_axis(x, keep, axis=1), np.take_along_axis(y, keep, axis=1)
+
+
+def _reduce(x, y):
+    """Min/max of one run of points; two or fewer are kept as they are."""
+    if len(x) <= 2:
+        return x, y
+    return (values.ravel() for values in _min_max(x[None, :], y[None, :]))
+
+
+class SeriesDownsampler:
+    """Incremental min/max downsampling of one growing trend series.
+
+    Point ``i`` of the series (counting every point ever appended) falls in
+    bucket ``i // bucket_rows``, and each full bucket keeps only its minimum
+    and maximum, so spikes survive. Full buckets are reduced once and cached;
+    when the output would exceed ``max_points`` neighbouring buckets are
+    merged and the bucket size doubles, which matches bucketing the whole
+    series at the larger size. Each update therefore only reads points
+    appended since the previous one. Once older points leave the retained
+    window, the bucket they shared with retained points is reduced again from
+    the retained points alone.
+    """
+
+    def __init__(self, max_points=DEFAULT_MAX_POINTS):
+        self.max_points = max(int(max_points), 4)
+        self.clear()
+
+    def clear(self):
+        self.bucket_rows = 2
+        self._seen = 0
+        self._start = 0
+        self._x = None
+        self._y = np.empty((0, 2))
+        self._ends = np.empty(0, dtype=np.int64)
+        self._tail_start = 0
+
+    def update(self, x, y, total=None):
+        """Downsample the retained series ``x, y``; ``total`` counts every point ever appended."""
+        x = np.asarray(x)
+        y = np.asarray(y, dtype=np.float64)
+        total = len(x) if total is None else int(total)
+        start = total - len(x)
+        if total < self._seen or start < self._start:
+            self.clear()
+        self._seen, self._start = total, start
+        if self._x is None:
+            self._x = np.empty((0, 2), dtype=x.dtype)
+
+        # Drop buckets whose points have all left the retained window.
+        keep = self._ends > start
+        if not keep.all():
+            self._x, self._y, self._ends = self._x[keep], self._y[keep], self._ends[keep]
+        if self._tail_start < start:
+            self._tail_start = start - start % self.bucket_rows
+
+        while True:
+            self._add_buckets(x, y, start)
+            tail = max(self._tail_start - start, 0)
+            if 2 * len(self._ends) + min(len(x) - tail, 2) <= self.max_points or len(self._ends) < 2:
+                break
+            self._merge_buckets()
+
+        bucket_x, bucket_y = self._x, self._y
+        head_x, head_y = x[:0], y[:0]
+        if len(self._ends) and self._ends[0] - start < self.bucket_rows:
+            # The oldest bucket lost points to eviction; its cached pair may be one of them.
+            retained = int(self._ends[0]) - start
+            head_x, head_y = _reduce(x[:retained], y[:retained])
+            bucket_x, bucket_y = bucket_x[1:], bucket_y[1:]
+        tail_x, tail_y = _reduce(x[tail:], y[tail:])
+        return (
+            np.concatenate([head_x, bucket_x.ravel(), tail_x]),
+            np.concatenate([head_y, bucket_y.ravel(), tail_y]),
+        )
+
+    def _add_buckets(self, x, y, start):
+        """Reduce every bucket the tail has filled, including a first one cut short by eviction."""
+        first = max(self._tail_start - start, 0)
+        ends = np.arange(self._tail_start + self.bucket_rows, start + len(x) + 1, self.bucket_rows)
+        if not len(ends):
+            return
+        rows = int(ends[-1]) - start
+        if start > self._tail_start:
+            cut = int(ends[0]) - start
+            head_x, head_y = _min_max(x[None, :cut], y[None, :cut])
+            full_x, full_y = x[cut:rows], y[cut:rows]
+        else:
+            head_x, head_y = self._x[:0], self._y[:0]
+            full_x, full_y = x[first:rows], y[first:rows]
+        full = len(full_x) // self.bucket_rows
+        bucket_x, bucket_y = _min_max(full_x.reshape(full, self.bucket_rows), full_y.reshape(full, self.bucket_rows))
+        self._x = np.vstack([self._x, head_x, bucket_x])
+        self._y = np.vstack([self._y, head_y, bucket_y])
+        self._ends = np.concatenate([self._ends, ends])
+        self._tail_start = int(ends[-1])
+
+    def _merge_buckets(self):
+        width = 2 * self.bucket_rows
+        if self._ends[-1] % width:
+            # Hand the unpaired newest bucket back to the tail so bucket edges stay aligned.
+            self._tail_start = int(self._ends[-1]) - self.bucket_rows
+            self._x, self._y, self._ends = self._x[:-1], self._y[:-1], self._ends[:-1]
+        # The oldest bucket is unpaired when its partner has been evicted; it stands alone.
+        lone = int(len(self._ends) > 0 and self._ends[0] % width == 0)
+        pairs = (len(self._ends) - lone) // 2
+        merged_x, merged_y = _min_max(self._x[lone:].reshape(pairs, 4), self._y[lone:].reshape(pairs, 4))
+        self._x = np.vstack([self._x[:lone], merged_x])
+        self._y = np.vstack([self._y[:lone], merged_y])
+        self._ends = np.concatenate([self._ends[:lone], self._ends[lone + 1::2]])
+        self.bucket_rows = width
@@ -0,0 +1,243 @@
+import copy
+import threading
+from concurrent.futures import Future
+
+import pandas as pd
+
+from manufacturing_dashboard.analytics import calculate_maintenance_insights
+from manufacturing_dashboard.data import get_live_data, latest_readings
+from manufacturing_dashboard.downsample import DEFAULT_MAX_POINTS, SeriesDownsampler
+from manufacturing_dashboard.history import DEFAULT_RETENTION_ROWS, HistoryStore
+from manufacturing_dashboard.live import LiveProducer
+from manufacturing_dashboard.model import predict_fault, predict_fault_batch
+from manufacturing_dashboard.replay import ReplayEngine
+
+
+LIVE_REPLAY_ROWS_PER_SECOND = 30
+
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def score_live_frame(live_df, history_df):
+    scored = predict_fault_batch(live_df, history_df, explain=True)
+    return dict(zip(live_df["machine_type"], scored.to_dict("records")))
+
+
+class SimulationEngine:
+    """Replay, analytics and inference shared by every dashboard session.
+
+    The engine owns the history store, the replay cursors and the live
+    producer. Every data change publishes a new snapshot holding the newest
+    readings, history, maintenance insights and KPI aggregates, so each tick
+    is analysed once however many sessions are watching. Sessions render
+    snapshots and keep only their UI selections. Predictions and other
+    per-machine views are computed at most once per snapshot version, by
+    whichever session asks first.
+
+    Snapshot history frames are read-only views over the shared store that
+    later ticks never modify, so an older snapshot still renders, and
+    recomputes its derived values, from exactly the rows it was published
+    with.
+
+    Live replay runs on a copy of the replay state. Each published frame
+    brings the state just past its rows, and the engine adopts it, so
+    stopping live mode resumes stepping right after the last published row
+    and frames still queued are replayed again rather than skipped.
+
+    With a ``durable`` store every published batch is also written to disk
+    with the replay cursors it ends at, as its producer recorded them. A new
+    engine resumes from it: the newest rows refill the in-memory window and
+    the KPI totals are recomputed inside the store, so a restart shows the
+    same dashboard without replaying history.
+    """
+
+    def __init__(self, retention_rows=DEFAULT_RETENTION_ROWS, trend_max_points=DEFAULT_MAX_POINTS, durable=None):
+        self.trend_max_points = trend_max_points
+        self.history = HistoryStore(retention_rows)
+        self.durable = durable
+        self.replay_state = {}
+        self.socket_mode = False
+        self._lock = threading.RLock()
+        self._derived_lock = threading.Lock()
+        self._trend_lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+        self._derived = {}
+        self._downsamplers = {}
+        self._producer = None
+        self._producer_socket = False
+        if durable is not None:
+            self._resume()
+
+    def snapshot(self):
+        """Newest published snapshot; never waits on a tick in progress."""
+        return self._snapshot
+
+    def ensure_started(self):
+        with self._lock:
+            if self._snapshot is None:
+                self.step()
+            return self._snapshot
+
+    def step(self, steps=1):
+        with self._lock:
+            # Live replay owns the cursors while it runs.
+            if self._producer is not None:
+                return self._snapshot
+            batch = get_live_data(self.replay_state, steps=steps)
+            return self._publish(batch, latest_readings(batch), replay_state=self.replay_state)
+
+    def ingest(self, rows, live_df):
+        with self._lock:
+            if rows.empty:
+                return self._snapshot
+            return self._publish(rows, live_df)
+
+    def reset(self):
+        with self._lock:
+            self.stop_live()
+            self.history.clear()
+            if self.durable is not None:
+                self.durable.clear()
+            self.replay_state = {}
+            self._downsamplers = {}
+            self._snapshot = None
+            return self.step()
+
+    @property
+    def live(self):
+        return self._producer is not None
+
+    def start_live(self, socket_source=None):
+        """Start live mode on replay, or on ``socket_source`` when given; restarts on a source change."""
+        with self._lock:
+            uses_socket = socket_source is not None
+            if self._producer is not None and self._producer_socket == uses_socket:
+                return
+            self.stop_live()
+            if uses_socket:
+                source = socket_source
+            else:
+                source = ReplayEngine(LIVE_REPLAY_ROWS_PER_SECOND, replay_state=copy.deepcopy(self.replay_state))
+            self._producer = LiveProducer(source, score=score_live_frame, stop_source=not uses_socket).start()
+            self._producer_socket = uses_socket
+
+    def stop_live(self):
+        with self._lock:
+            if self._producer is not None:
+                self._producer.stop()
+            self._producer = None
+
+    def has_frame(self):
+        producer = self._producer
+        return producer is not None and producer.has_frame()
+
+    def live_stats(self):
+        producer = self._producer
+        return producer.stats() if producer is not None else {}
+
+    def poll(self):
+        """Publish the live producer's newest frame, if there is one."""
+        with self._lock:
+            frame = self._producer.take() if self._producer is not None else None
+            if frame is None:
+                return self._snapshot
+            if frame["replay_state"] is not None:
+                self.replay_state = frame["replay_state"]
+            return self._publish(
+                frame["rows"],
+                frame["live_df"],
+                frame["predictions"],
+                frame["produced_at"],
+                frame["replay_state"],
+            )
+
+    def derived(self, snapshot, key, compute):
+        """``compute()`` for this snapshot version, shared by every session.
+
+        The first caller computes outside the shared lock; concurrent callers
+        for the same key wait on its future, and other keys are not held up.
+        """
+        memo_key = (snapshot["version"], key)
+        with self._derived_lock:
+            future = self._derived.get(memo_key)
+            owner = future is None
+            if owner:
+                future = self._derived[memo_key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            future.set_result(compute())
+        except BaseException as error:
+            with self._derived_lock:
+                if self._derived.get(memo_key) is future:
+                    del self._derived[memo_key]
+            future.set_exception(error)
+        return future.result()
+
+    def prediction(self, snapshot, machine):
+        live_df = snapshot["live_df"]
+        row = live_df[live_df["machine_type"] == machine].iloc[0]
+        return self.derived(snapshot, ("prediction", machine), lambda: predict_fault(row, snapshot["history_df"]))
+
+    def trend(self, snapshot, machine, column):
+        """Downsampled ``column`` trend for one machine, or ``None`` before it has any rows."""
+        def compute():
+            history_df = snapshot["history_df"]
+            machine_df = history_df[history_df["machine_type"] == machine]
+            if machine_df.empty:
+                return None
+            # Trends for different snapshots can be computed at once; each downsampler takes one at a time.
+            with self._trend_lock:
+                downsampler, reorders, lock = self._downsamplers.get((machine, column), (None, None, None))
+                # Buckets assume rows only ever arrive at the end; start over after an out-of-order merge.
+                if downsampler is None or reorders != snapshot["history_reorders"]:
+                    downsampler, lock = SeriesDownsampler(self.trend_max_points), threading.Lock()
+                    self._downsamplers[machine, column] = (downsampler, snapshot["history_reorders"], lock)
+            with lock:
+                timestamps, values = downsampler.update(
+                    machine_df["timestamp"].to_numpy(),
+                    machine_df[column].to_numpy(dtype=float),
+                    total=snapshot["kpis"].rows(machine),
+                )
+            return pd.DataFrame({"timestamp": timestamps, column: values})
+
+        return self.derived(snapshot, ("trend", machine, column), compute)
+
+    def _resume(self):
+        restored = self.durable.window(newest=self.history.capacity)
+        if restored.empty:
+            return
+        self.history.append(restored)
+        self.history.aggregates.restore(*self.durable.totals(self.history.aggregates.columns))
+        self.history.total_rows = self.durable.rows()
+        self.replay_state = self.durable.replay_state()
+        self._publish(restored.iloc[:0], latest_readings(restored))
+
+    def _publish(self, rows, live_df, predictions=None, produced_at=None, replay_state=None):
+        """Publish ``rows``; ``replay_state`` holds the cursors just past them, and is saved with them."""
+        self.history.append(rows)
+        if self.durable is not None:
+            self.durable.append(rows, replay_state)
+        history_df = self.history.frame()
+        self._version += 1
+        snapshot = {
+            "version": self._version,
+            "live_df": live_df,
+            "history_df": history_df,
+            "kpis": copy.deepcopy(self.history.aggregates),
+            "history_reorders": self.history.reorders,
+            "insights": calculate_maintenance_insights(live_df, history_df),
+            "produced_at": produced_at,
+        }
+        with self._derived_lock:
+            self._derived = {
+                (self._version, ("prediction", machine)): _resolved(prediction)
+                for machine, prediction in (predictions or {}).items()
+            }
+        self._snapshot = snapshot
+        return snapshot
@@ -0,0 +1,178 @@
+import math
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+
+from manufacturing_dashboard.compiled import compile_ensemble
+
+
+# Leaf lookups per block of rows; bounds memory to a few tens of MB whatever the batch size.
+GATHER_BUDGET = 4_000_000
+
+
+class TreeExplainer:
+    """Exact path-dependent Shapley values (TreeSHAP) for a fitted tree ensemble.
+
+    Every leaf of every tree is flattened into the bounds its path puts on
+    each feature, where missing values go, and the fraction of training
+    cover its path keeps for each feature. A feature left out of a
+    coalition follows both branches in proportion to cover, as in
+    path-dependent TreeSHAP. A row therefore reaches a leaf through one of
+    ``2 ** features`` patterns of inside/outside each feature's bounds, and
+    the leaf's Shapley value for every feature is tabulated per pattern
+    when the explainer is built.
+
+    A row's value only matters through its rank among a feature's
+    thresholds, so every leaf's pattern bit is also precomputed per feature
+    and rank (about 28 MB for the saved forest). Explaining a batch ORs one
+    mask per feature and row into each leaf's pattern, then sums one table
+    row per leaf as a sparse one-hot product, with no model evaluations.
+
+    Attributions are in the model's raw output (probability for forests,
+    log-odds for gradient boosting) and add up to the output minus
+    ``expected_value``.
+    """
+
+    def __init__(self, lower, upper, missing, fraction, value, base_value=0.0, output="probability", input_dtype=np.float64):
+        self.output = output
+        self.input_dtype = input_dtype
+        self.width = lower.shape[1]
+        self.expected_value = float(base_value + np.sum(value * fraction.prod(axis=1)))
+        # Leaves with a zero output add nothing to any attribution.
+        kept = value != 0
+        self.leaves = int(kept.sum())
+        self._thresholds = []
+        self._inside = []
+        for feature in range(self.width):
+            feature_lower, feature_upper = lower[kept, feature], upper[kept, feature]
+            # Splits on missing values alone have infinite thresholds, so only an
+            # infinite bound on the open side means "unbounded".
+            bounded_below, bounded_above = feature_lower > -np.inf, feature_upper < np.inf
+            thresholds = np.unique(np.concatenate([feature_lower[bounded_below], feature_upper[bounded_above]]))
+            # A value with rank r (thresholds below it) is inside (lower, upper]
+            # exactly when lower's rank < r <= upper's rank.
+            lower_rank = np.where(bounded_below, thresholds.searchsorted(feature_lower), -1)
+            upper_rank = np.where(bounded_above, thresholds.searchsorted(feature_upper), len(thresholds))
+            ranks = np.arange(len(thresholds) + 1)[:, np.newaxis]
+            inside = (lower_rank < ranks) & (ranks <= upper_rank)
+            # The last row is for missing values; each row holds the feature's bit already shifted.
+            self._inside.append(np.vstack([inside, missing[kept, feature]]).astype(np.uint8) << feature)
+            self._thresholds.append(thresholds)
+        self._table = _shapley_table(fraction[kept], value[kept]).reshape(-1, self.width)
+        index_dtype = np.int32 if len(self._table) <= np.iinfo(np.int32).max else np.int64
+        self._offsets = (np.arange(self.leaves) * 2 ** self.width).astype(index_dtype)
+
+    def shap_values(self, X):
+        """Per-feature attributions for every row of ``X``, in the model's raw output."""
+        from scipy.sparse import csr_matrix
+
+        # Compare in the dtype the model itself casts to, so rows take the same branches.
+        X = np.asarray(X, dtype=float).astype(self.input_dtype).astype(float)
+        attributions = np.zeros(X.shape)
+        if not self.leaves:
+            return attributions
+        block_rows = max(1, GATHER_BUDGET // self.leaves)
+        for start in range(0, len(X), block_rows):
+            block = X[start:start + block_rows]
+            patterns = np.zeros((len(block), self.leaves), dtype=np.uint8)
+            for feature, (thresholds, inside) in enumerate(zip(self._thresholds, self._inside)):
+                ranks = thresholds.searchsorted(block[:, feature])
+                ranks[np.isnan(block[:, feature])] = len(inside) - 1
+                patterns |= inside[ranks]
+            # Row i picks table row offset + pattern of every leaf; the product sums them.
+            positions = (patterns + self._offsets).ravel()
+            one_hot = csr_matrix(
+                (np.ones(len(positions)), positions, np.arange(len(block) + 1) * self.leaves),
+                shape=(len(block), len(self._table)),
+            )
+            attributions[start:start + block_rows] = one_hot @ self._table
+        return attributions
+
+    def probability_contributions(self, X, probabilities):
+        """Attributions in probability points that add up to ``probabilities`` minus the expected probability.
+
+        Log-odds attributions are rescaled in proportion, so a feature's share
+        of the change is the same on either scale.
+        """
+        attributions = self.shap_values(X)
+        if self.output == "probability":
+            return attributions
+        expected_probability = 1 / (1 + math.exp(-self.expected_value))
+        log_odds_change = attributions.sum(axis=1)
+        probability_change = np.asarray(probabilities, dtype=float) - expected_probability
+        # Near-zero changes use the slope of the sigmoid at the expected value.
+        scale = np.full(len(attributions), expected_probability * (1 - expected_probability))
+        np.divide(probability_change, log_odds_change, out=scale, where=np.abs(log_odds_change) > 1e-12)
+        return attributions * scale[:, np.newaxis]
+
+
+def _shapley_table(fraction, value):
+    # table[leaf, pattern, i]: value * (inside_i - fraction_i) * sum over coalitions S of the
+    # other features of |S|!(M-|S|-1)!/M! * prod(inside_j for j in S) * prod(fraction_j for j not in S).
+    leaves, width = fraction.shape
+    inside = (np.arange(2 ** width)[:, np.newaxis] >> np.arange(width)) & 1
+    weights = [math.factorial(size) * math.factorial(width - size - 1) / math.factorial(width) for size in range(width)]
+    table = np.zeros((leaves, 2 ** width, width))
+    for feature in range(width):
+        others = [other for other in range(width) if other != feature]
+        for size in range(width):
+            for coalition in combinations(others, size):
+                outside = [other for other in others if other not in coalition]
+                reached = inside[:, list(coalition)].all(axis=1)
+                table[:, :, feature] += weights[size] * np.outer(fraction[:, outside].prod(axis=1), reached)
+        table[:, :, feature] *= inside[np.newaxis, :, feature] - fraction[:, [feature]]
+    return table * value[:, np.newaxis, np.newaxis]
+
+
+def _flatten_leaves(ensemble, width):
+    # Walks every tree of the compiled ensemble together, one depth level at a time.
+    nodes = len(ensemble.is_leaf)
+    lower = np.full((nodes, width), -np.inf)
+    upper = np.full((nodes, width), np.inf)
+    missing = np.ones((nodes, width), dtype=bool)
+    fraction = np.ones((nodes, width))
+    frontier = ensemble.roots
+    while frontier.size:
+        parents = frontier[~ensemble.is_leaf[frontier]]
+        split = ensemble.feature[parents]
+        threshold = ensemble.threshold[parents]
+        for children, goes_left in ((ensemble.left[parents], True), (ensemble.right[parents], False)):
+            lower[children] = lower[parents]
+            upper[children] = upper[parents]
+            missing[children] = missing[parents]
+            fraction[children] = fraction[parents]
+            if goes_left:
+                upper[children, split] = np.minimum(upper[parents, split], threshold)
+                missing[children, split] &= ensemble.missing_left[parents]
+            else:
+                lower[children, split] = np.maximum(lower[parents, split], threshold)
+                missing[children, split] &= ~ensemble.missing_left[parents]
+            fraction[children, split] *= ensemble.cover[children] / ensemble.cover[parents]
+        frontier = np.concatenate([ensemble.left[parents], ensemble.right[parents]])
+    leaves = np.flatnonzero(ensemble.is_leaf)
+    return lower[leaves], upper[leaves], missing[leaves], fraction[leaves], leaves
+
+
+@lru_cache(maxsize=4)
+def tree_explainer(model):
+    """``TreeExplainer`` for a binary forest or histogram gradient boosting classifier, else ``None``.
+
+    Accepts the scikit-learn model or its ``CompiledEnsemble`` and is built
+    once per model. Other models, such as the logistic regression
+    candidate, have no trees to walk.
+    """
+    ensemble = compile_ensemble(model)
+    if ensemble is None:
+        return None
+    lower, upper, missing, fraction, leaves = _flatten_leaves(ensemble, ensemble.n_features_in_)
+    return TreeExplainer(
+        lower,
+        upper,
+        missing,
+        fraction,
+        ensemble.leaf_output()[leaves],
+        base_value=ensemble.base_value,
+        output=ensemble.output,
+        input_dtype=ensemble.input_dtype,
+    )
@@ -0,0 +1,145 @@
+from functools import lru_cache
+
+import plotly.graph_objects as go
+
+
+TRANSPARENT = "rgba(0,0,0,0)"
+CHART_LAYOUT = {
+    "paper_bgcolor": TRANSPARENT,
+    "plot_bgcolor": TRANSPARENT,
+    "font_color": "white",
+    "title_font": {"size": 16},
+}
+GAUGE_BAR_COLORS = ("#d0aaff", "#b07bfa", "#9446ff")
+RISK_BAND_COLORS = {
+    "Normal": "#69d2a3",
+    "Watch": "#f7d154",
+    "High": "#ff9f43",
+    "Critical": "#ff4d4d",
+}
+TREND_LINE_COLOR = "#636efa"
+
+
+def figure_copy(figures, key, template):
+    """Per-session copy of a process-wide template, made once and then patched in place."""
+    if key not in figures:
+        figures[key] = go.Figure(template)
+    return figures[key]
+
+
+@lru_cache(maxsize=None)
+def gauge_template(red_range, unit="deg C"):
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=0,
+        number={"suffix": f" {unit}", "font": {"size": 24, "color": "white"}},
+        domain={"x": [0, 1], "y": [0, 1]},
+        gauge={
+            "axis": {"range": [None, red_range[1]], "tickcolor": "#888", "tickwidth": 1.5},
+            "bar": {"color": GAUGE_BAR_COLORS[0], "thickness": 0.25},
+            "bgcolor": "rgba(0,0,0,0.1)",
+            "borderwidth": 0,
+            "steps": [],
+            "threshold": {"line": {"color": "white", "width": 4}, "thickness": 0.75, "value": red_range[0]},
+            "shape": "angular",
+        },
+    ))
+    fig.update_layout(
+        paper_bgcolor=TRANSPARENT,
+        font=dict(color="white"),
+        height=250,
+        margin=dict(t=20, b=10, l=0, r=0),
+    )
+    return fig
+
+
+def patch_gauge(fig, value, green_range, orange_range):
+    if value <= green_range[1]:
+        bar_color = GAUGE_BAR_COLORS[0]
+    elif value <= orange_range[1]:
+        bar_color = GAUGE_BAR_COLORS[1]
+    else:
+        bar_color = GAUGE_BAR_COLORS[2]
+    # Plain attribute assignment skips the update_* argument parsing, which dominates patch cost.
+    indicator = fig.data[0]
+    indicator.value = value
+    indicator.gauge.bar.color = bar_color
+
+
+@lru_cache(maxsize=1)
+def risk_chart_template():
+    fig = go.Figure([
+        go.Bar(
+            name=band,
+            legendgroup=band,
+            marker={"color": color},
+            hovertemplate=f"risk_band={band}<br>Machine=%{{x}}<br>Risk (%)=%{{y}}<extra></extra>",
+            orientation="v",
+            textposition="auto",
+        )
+        for band, color in RISK_BAND_COLORS.items()
+    ])
+    fig.update_layout(
+        title="Predicted Maintenance Risk by Machine",
+        xaxis={"title": {"text": "Machine"}, "categoryorder": "array"},
+        yaxis={"title": {"text": "Risk (%)"}, "range": [0, 100]},
+        legend={"title": {"text": "risk_band"}, "tracegroupgap": 0},
+        barmode="relative",
+        margin=dict(t=40, b=20),
+        **CHART_LAYOUT,
+    )
+    return fig
+
+
+def patch_risk_chart(fig, insights, machines):
+    fig.layout.xaxis.categoryarray = list(machines)
+    for trace in fig.data:
+        band_rows = insights[insights["risk_band"] == trace.name]
+        trace.x = band_rows["machine_type"].tolist()
+        trace.y = band_rows["maintenance_risk_pct"].tolist()
+        trace.showlegend = not band_rows.empty
+
+
+@lru_cache(maxsize=1)
+def daily_production_template():
+    fig = go.Figure(go.Bar(
+        marker={"color": TREND_LINE_COLOR},
+        hovertemplate="machine_type=%{x}<br>units_produced=%{y}<extra></extra>",
+        orientation="v",
+        textposition="auto",
+        showlegend=False,
+    ))
+    fig.update_layout(
+        title="Daily Production by Machine Type",
+        xaxis={"title": {"text": "machine_type"}},
+        yaxis={"title": {"text": "units_produced"}},
+        barmode="relative",
+        margin=dict(t=40, b=20),
+        **CHART_LAYOUT,
+    )
+    return fig
+
+
+@lru_cache(maxsize=None)
+def trend_template(y_label):
+    fig = go.Figure(go.Scatter(
+        mode="lines",
+        line={"color": TREND_LINE_COLOR, "dash": "solid"},
+        hovertemplate=f"Time=%{{x}}<br>{y_label}=%{{y}}<extra></extra>",
+        showlegend=False,
+    ))
+    fig.update_layout(
+        xaxis={"title": {"text": "Time"}},
+        yaxis={"title": {"text": y_label}},
+        margin=dict(t=30, b=20),
+        **CHART_LAYOUT,
+    )
+    return fig
+
+
+def patch_series(fig, x, y, title=None):
+    trace = fig.data[0]
+    trace.x = x
+    trace.y = y
+    if title is not None:
+        fig.layout.title.text = title
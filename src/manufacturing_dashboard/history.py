@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+
+from manufacturing_dashboard.aggregates import RunningAggregates
+from manufacturing_dashboard.perf import timed
+
+
+DEFAULT_RETENTION_ROWS = 100_000
+
+
+def _missing_value(dtype):
+    if isinstance(dtype, pd.CategoricalDtype):
+        return -1
+    if dtype.kind == "f":
+        return np.nan
+    if dtype.kind == "M":
+        return np.datetime64("NaT")
+    if dtype.kind == "O":
+        return None
+    return 0
+
+
+def time_slice(frame, start=None, end=None):
+    """Rows with ``start <= timestamp < end`` from a time-sorted frame, located by binary search."""
+    if frame.empty:
+        return frame
+    timestamps = frame["timestamp"].to_numpy()
+    lower = 0 if start is None else timestamps.searchsorted(pd.Timestamp(start).to_datetime64(), "left")
+    upper = len(timestamps) if end is None else timestamps.searchsorted(pd.Timestamp(end).to_datetime64(), "left")
+    return frame.iloc[lower:upper]
+
+
+def machine_tail(frame, machine, rows):
+    """Newest ``rows`` readings for one machine, scanning back from the end only as far as needed."""
+    if frame.empty or rows <= 0:
+        return frame.iloc[:0]
+    machines = frame["machine_type"]
+    if isinstance(machines.dtype, pd.CategoricalDtype):
+        values = machines.cat.codes.to_numpy()
+        target = machines.cat.categories.get_indexer([machine])[0]
+    else:
+        values = machines.to_numpy()
+        target = machine
+
+    window = rows * 4
+    while True:
+        start = max(len(values) - window, 0)
+        positions = np.flatnonzero(values[start:] == target)
+        if len(positions) >= rows or start == 0:
+            return frame.iloc[start + positions[-rows:]]
+        window *= 4
+
+
+class HistoryStore:
+    """Fixed-capacity replay history backed by preallocated per-column arrays.
+
+    Each column buffer holds twice the retention window. The retained window
+    is one contiguous slice of it that slides forward as rows are appended
+    and the oldest are evicted, so ``frame()`` wraps the buffers in a
+    DataFrame without copying.
+
+    Rows are kept sorted by timestamp, so ``time_slice`` and ``machine_tail``
+    can answer range queries on ``frame()`` without scanning it. A batch that
+    starts after the newest row is written at the end; one that overlaps it
+    is merged with only the rows newer than its first timestamp. ``reorders``
+    counts those merges. When the window is full the oldest timestamps are
+    evicted.
+
+    Frames returned by ``frame()`` are read-only views that never change:
+    appends only write past the window's end. When a batch reaches the end of
+    the buffers, or a merge would rewrite rows a frame can see, the window is
+    moved to the start of fresh buffers instead, which costs one copy of the
+    window per ``retention_rows`` appended.
+
+    ``aggregates`` holds running KPI totals over every row appended since the
+    last ``clear()``, including rows that have aged out of the window.
+    """
+
+    def __init__(self, retention_rows=DEFAULT_RETENTION_ROWS, aggregates=None):
+        self.capacity = int(retention_rows)
+        self.aggregates = aggregates if aggregates is not None else RunningAggregates()
+        self.clear()
+
+    def clear(self):
+        self._columns = {}
+        self._dtypes = {}
+        self._start = 0
+        self._size = 0
+        self._shared = False
+        self.total_rows = 0
+        self.reorders = 0
+        self.aggregates.clear()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def empty(self):
+        return self._size == 0
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @timed("history_append")
+    def append(self, frame):
+        if frame is None or frame.empty:
+            return
+        self.aggregates.update(frame)
+        self.total_rows += len(frame)
+
+        rows = len(frame)
+        for column in frame.columns:
+            if column not in self._columns:
+                self._add_column(column, frame[column].dtype)
+        batch = {
+            column: self._encode(column, frame[column]) if column in frame else np.full(rows, _missing_value(self._dtypes[column]))
+            for column in list(self._columns)
+        }
+
+        # Merge the batch with any retained rows newer than its first timestamp.
+        insert_at = self._size
+        order = None
+        if "timestamp" in batch:
+            timestamps = batch["timestamp"]
+            if rows > 1 and not (timestamps[1:] >= timestamps[:-1]).all():
+                order = np.argsort(timestamps, kind="stable")
+                timestamps = timestamps[order]
+            window = self._columns["timestamp"][self._start:self._start + self._size]
+            insert_at = int(window.searchsorted(timestamps[0], "right"))
+            if insert_at < self._size:
+                self.reorders += 1
+                order = np.argsort(np.concatenate([window[insert_at:], batch["timestamp"]]), kind="stable")
+
+        newer = slice(self._start + insert_at, self._start + self._size)
+        merged_rows = self._size - insert_at + rows
+        # Older retained rows that still fit in front of the merged ones.
+        kept = min(insert_at, max(self.capacity - merged_rows, 0))
+        keep = slice(max(merged_rows - self.capacity, 0), None)
+        start = self._start + insert_at - kept
+        size = kept + min(merged_rows, self.capacity)
+        move = start + size > 2 * self.capacity or (insert_at < self._size and self._shared)
+        for column, values in batch.items():
+            buffer = self._columns[column]
+            if insert_at < self._size:
+                values = np.concatenate([buffer[newer], values])
+            if order is not None:
+                values = values[order]
+            values = values[keep]
+            if move:
+                # Published frames may still view this buffer, so only write to a fresh one.
+                target = np.empty_like(buffer) if self._shared else buffer
+                target[:kept] = buffer[start:start + kept]
+                target[kept:size] = values
+                self._columns[column] = target
+            else:
+                buffer[start + kept:start + size] = values
+        if move:
+            start = 0
+            self._shared = False
+        self._start = start
+        self._size = size
+
+    def frame(self):
+        """Zero-copy DataFrame over the retained window, oldest timestamp first."""
+        if self.empty:
+            return pd.DataFrame()
+
+        start = self._start
+        stop = self._start + self._size
+        self._shared = True
+        data = {}
+        for column, buffer in self._columns.items():
+            values = buffer[start:stop]
+            values.flags.writeable = False
+            dtype = self._dtypes[column]
+            if isinstance(dtype, pd.CategoricalDtype):
+                data[column] = pd.Categorical.from_codes(values, dtype=dtype)
+            elif dtype.kind == "O":
+                data[column] = pd.Series(values, dtype=object, copy=False)
+            else:
+                data[column] = values
+        return pd.DataFrame(data, copy=False)
+
+    def _add_column(self, column, dtype):
+        if isinstance(dtype, pd.CategoricalDtype):
+            storage = np.int8 if len(dtype.categories) < 127 else np.int32
+        elif isinstance(dtype, np.dtype) and dtype.kind in "biufM":
+            storage = dtype
+        else:
+            dtype = np.dtype(object)
+            storage = dtype
+        buffer = np.empty(self.capacity * 2, dtype=storage)
+        buffer[:] = _missing_value(dtype)
+        self._columns[column] = buffer
+        self._dtypes[column] = dtype
+
+    def _encode(self, column, series):
+        dtype = self._dtypes[column]
+        if not isinstance(dtype, pd.CategoricalDtype):
+            return series.to_numpy(dtype=self._columns[column].dtype)
+
+        if isinstance(series.dtype, pd.CategoricalDtype) and series.dtype == dtype:
+            return series.cat.codes.to_numpy()
+        # Unseen labels extend the categories at the end so stored codes stay valid.
+        values = pd.Index(series.astype(object))
+        new_labels = values.dropna().unique().difference(dtype.categories, sort=False)
+        if len(new_labels):
+            dtype = pd.CategoricalDtype(list(dtype.categories) + list(new_labels))
+            self._dtypes[column] = dtype
+            if len(dtype.categories) >= 127 and self._columns[column].dtype == np.int8:
+                self._columns[column] = self._columns[column].astype(np.int32)
+        return dtype.categories.get_indexer(values)
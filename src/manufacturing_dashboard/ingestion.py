@@ -0,0 +1,283 @@
+import asyncio
+import json
+import math
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from manufacturing_dashboard.data import FAILURE_LABELS, REPLAY_PRODUCT_TYPES, readings_to_dashboard_frame
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+BATCH_MAX_READINGS = 512
+BATCH_MAX_WAIT_SECONDS = 0.1
+QUEUE_MAX_READINGS = 10_000
+RETAINED_BATCHES = 256
+MAX_LINE_BYTES = 64 * 1024
+
+# Binary frame: marker, product type, UDI, air K, process K, rpm, torque Nm,
+# tool wear min, failure bitmask (bit 0 machine failure, bits 1-5 TWF..RNF).
+BINARY_MARKER = 0xA5
+BINARY_READING = struct.Struct("<1sIfffffB")
+SENSOR_FIELDS = [
+    "air_temperature_k",
+    "process_temperature_k",
+    "rotational_speed_rpm",
+    "torque_nm",
+    "tool_wear_min",
+]
+FLAG_FIELDS = ["machine_failure", *FAILURE_LABELS]
+# Readings are stored as float32 sensors and an int32 UDI; anything outside would not fit.
+SENSOR_LIMIT = float(np.finfo(np.float32).max)
+UDI_LIMIT = int(np.iinfo(np.int32).max)
+
+
+def encode_binary_reading(reading):
+    flags = 0
+    for bit, field in enumerate(FLAG_FIELDS):
+        if int(reading.get(field, 0)) == 1:
+            flags |= 1 << bit
+    return bytes([BINARY_MARKER]) + BINARY_READING.pack(
+        str(reading["product_type"]).encode("ascii"),
+        int(reading.get("udi", 0)),
+        *(float(reading[field]) for field in SENSOR_FIELDS),
+        flags,
+    )
+
+
+def decode_binary_reading(payload):
+    product_type, udi, *sensors, flags = BINARY_READING.unpack(payload)
+    reading = {"product_type": product_type.decode("ascii"), "udi": udi}
+    reading.update(zip(SENSOR_FIELDS, sensors))
+    reading.update({field: (flags >> bit) & 1 for bit, field in enumerate(FLAG_FIELDS)})
+    return reading
+
+
+def _validate_reading(reading):
+    """Coerce one decoded reading to the fields and types dashboard rows are built from.
+
+    Raises ``ValueError`` or ``TypeError`` for anything that could not be
+    stored, so a bad reading is rejected on its own instead of failing the
+    whole micro-batch later.
+    """
+    if not isinstance(reading, dict):
+        raise TypeError(f"reading must be an object, not {type(reading).__name__}")
+    if reading.get("product_type") not in REPLAY_PRODUCT_TYPES:
+        raise ValueError(f"unknown product type {reading.get('product_type')!r}")
+    validated = {
+        "product_type": reading["product_type"],
+        "product_id": str(reading.get("product_id") or ""),
+        "udi": int(reading.get("udi") or 0),
+    }
+    if not 0 <= validated["udi"] <= UDI_LIMIT:
+        raise ValueError(f"udi {validated['udi']} out of range")
+    for field in SENSOR_FIELDS:
+        value = float(reading[field])
+        if not math.isfinite(value) or abs(value) > SENSOR_LIMIT:
+            raise ValueError(f"{field} must be a finite number, got {reading[field]!r}")
+        validated[field] = value
+    for field in FLAG_FIELDS:
+        flag = int(reading.get(field) or 0)
+        if flag not in (0, 1):
+            raise ValueError(f"{field} must be 0 or 1, got {reading[field]!r}")
+        validated[field] = flag
+    return validated
+
+
+class IngestionServer:
+    """Accept sensor readings over TCP or a Unix socket and micro-batch them into dashboard rows.
+
+    Each connection sends newline-delimited JSON readings or binary frames
+    (``BINARY_MARKER`` followed by ``BINARY_READING``). Readings go through a
+    bounded queue: when the batcher falls behind, connection handlers wait on
+    the queue, stop reading their sockets and the kernel pushes back on senders.
+    """
+
+    def __init__(
+        self,
+        host=DEFAULT_HOST,
+        port=DEFAULT_PORT,
+        unix_path=None,
+        batch_max_readings=BATCH_MAX_READINGS,
+        batch_max_wait=BATCH_MAX_WAIT_SECONDS,
+        queue_max_readings=QUEUE_MAX_READINGS,
+    ):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.batch_max_readings = batch_max_readings
+        self.batch_max_wait = batch_max_wait
+        self.queue_max_readings = queue_max_readings
+        self._lock = threading.Lock()
+        self._latest = pd.DataFrame()
+        self._batches = deque(maxlen=RETAINED_BATCHES)
+        self._stats = {
+            "readings": 0,
+            "batches": 0,
+            "rejected": 0,
+            "rejected_batches": 0,
+            "connections": 0,
+            "queue_full_waits": 0,
+            "last_batch_at": None,
+        }
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._queue = None
+        self._ready = threading.Event()
+        self.error = None
+
+    def start(self):
+        """Run the server on a daemon thread with its own event loop."""
+        if self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._run, name="sensor-ingestion", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def latest_frame(self):
+        """Newest dashboard row per machine; never waits on ingestion."""
+        with self._lock:
+            return self._latest
+
+    def pop_batches(self):
+        """Return and clear the micro-batches produced since the last call."""
+        with self._lock:
+            batches = list(self._batches)
+            self._batches.clear()
+        if not batches:
+            return pd.DataFrame()
+        return pd.concat(batches, ignore_index=True)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued"] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self.serve())
+        except OSError as exc:
+            self.error = exc
+            self._ready.set()
+            self._loop.close()
+            return
+        try:
+            self._ready.set()
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    async def serve(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_max_readings)
+        if self.unix_path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection,
+                path=str(self.unix_path),
+                limit=MAX_LINE_BYTES,
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection,
+                self.host,
+                self.port,
+                limit=MAX_LINE_BYTES,
+            )
+        asyncio.get_running_loop().create_task(self._batch_readings())
+        return self._server
+
+    async def _enqueue(self, reading):
+        if self._queue.full():
+            self._count("queue_full_waits")
+        await self._queue.put(reading)
+
+    async def _handle_connection(self, reader, writer):
+        self._count("connections")
+        try:
+            while True:
+                marker = await reader.read(1)
+                if not marker:
+                    break
+                try:
+                    if marker[0] == BINARY_MARKER:
+                        payload = await reader.readexactly(BINARY_READING.size)
+                        reading = decode_binary_reading(payload)
+                    else:
+                        line = marker + await reader.readuntil(b"\n")
+                        if not line.strip():
+                            continue
+                        reading = json.loads(line)
+                    await self._enqueue(_validate_reading(reading))
+                except (ValueError, KeyError, TypeError, OverflowError, UnicodeDecodeError, struct.error):
+                    self._count("rejected")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown; end the handler quietly instead of surfacing the cancel.
+            pass
+        finally:
+            writer.close()
+
+    async def _batch_readings(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            readings = [await self._queue.get()]
+            deadline = loop.time() + self.batch_max_wait
+            while len(readings) < self.batch_max_readings:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    readings.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                batch = readings_to_dashboard_frame(readings)
+            except (ValueError, KeyError, TypeError, OverflowError):
+                # Readings are validated on arrival, so this is a last resort:
+                # drop the batch and keep the batcher alive for the next one.
+                self._count("rejected", len(readings))
+                self._count("rejected_batches")
+                continue
+            self._publish(batch)
+
+    def _publish(self, batch):
+        latest = batch.drop_duplicates("machine_type", keep="last")
+        with self._lock:
+            if not self._latest.empty:
+                latest = pd.concat([self._latest, latest], ignore_index=True).drop_duplicates(
+                    "machine_type", keep="last"
+                )
+            self._latest = latest.reset_index(drop=True)
+            self._batches.append(batch)
+            self._stats["readings"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["last_batch_at"] = time.time()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
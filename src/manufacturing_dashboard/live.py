@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pandas as pd
+
+from manufacturing_dashboard.data import latest_readings
+from manufacturing_dashboard.history import DEFAULT_RETENTION_ROWS, HistoryStore
+
+
+DEFAULT_FRAME_INTERVAL_SECONDS = 0.5
+SCORING_HISTORY_ROWS = 5_000
+MAX_CARRIED_ROWS = DEFAULT_RETENTION_ROWS
+
+
+class LiveProducer:
+    """Turn a live source into scored frames for the dashboard's live mode.
+
+    ``source`` is a ``ReplayEngine`` or ``IngestionServer``. Every interval the
+    producer drains its new rows, keeps the newest reading per machine and
+    scores those readings with ``score(live_df, history_df)``, all on its own
+    thread. Frames are handed to the page through a single slot: if the page
+    has not taken the previous frame yet, it is stale and is replaced and
+    counted as dropped. Its rows are carried into the replacing frame so the
+    shared history still receives every row.
+
+    Sources with ``pop_checkpointed`` also hand over their replay state.
+    Each frame carries a copy of the state its newest rows end at as
+    ``replay_state``, so the rows and cursors can be persisted and resumed
+    together.
+    """
+
+    def __init__(
+        self,
+        source,
+        score=None,
+        interval_seconds=DEFAULT_FRAME_INTERVAL_SECONDS,
+        stop_source=True,
+        scoring_history_rows=SCORING_HISTORY_ROWS,
+    ):
+        self.source = source
+        self.score = score
+        self.interval_seconds = float(interval_seconds)
+        self.stop_source = stop_source
+        self._scoring_history = HistoryStore(scoring_history_rows)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._slot = None
+        self._live = pd.DataFrame()
+        self._frame_id = 0
+        self._taken = 0
+        self._dropped = 0
+        self._last_score_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self.source.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="live-producer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+        if self.stop_source:
+            self.source.stop()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def has_frame(self):
+        with self._lock:
+            return self._slot is not None
+
+    def take(self):
+        """Newest untaken frame, or ``None``; never waits on the producer."""
+        with self._lock:
+            frame, self._slot = self._slot, None
+            if frame is not None:
+                self._taken += 1
+            return frame
+
+    def stats(self):
+        with self._lock:
+            return {
+                "frames": self._frame_id,
+                "taken_frames": self._taken,
+                "dropped_frames": self._dropped,
+                "score_ms_last": self._last_score_ms,
+            }
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            pop_checkpointed = getattr(self.source, "pop_checkpointed", None)
+            rows, replay_state = pop_checkpointed() if pop_checkpointed else (self.source.pop_batches(), None)
+            if rows.empty:
+                continue
+            self._publish(rows, replay_state)
+
+    def _publish(self, rows, replay_state=None):
+        combined = rows if self._live.empty else pd.concat([self._live, rows], ignore_index=True)
+        self._live = latest_readings(combined)
+        self._scoring_history.append(rows)
+
+        started = time.perf_counter()
+        predictions = self.score(self._live, self._scoring_history.frame()) if self.score else {}
+        score_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            stale = self._slot
+            if stale is not None:
+                self._dropped += 1
+                rows = pd.concat([stale["rows"], rows], ignore_index=True).iloc[-MAX_CARRIED_ROWS:]
+            self._frame_id += 1
+            self._last_score_ms = score_ms
+            self._slot = {
+                "frame_id": self._frame_id,
+                "produced_at": time.time(),
+                "rows": rows,
+                "live_df": self._live,
+                "predictions": predictions,
+                "replay_state": replay_state,
+            }
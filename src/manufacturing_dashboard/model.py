@@ -2,20 +2,32 @@ from functools import lru_cache
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
 
-from manufacturing_dashboard.data import load_ai4i_dataset, load_ai4i_split
-from manufacturing_dashboard.training import (
+from manufacturing_dashboard.artifacts import (
     AI4I_FEATURES,
     METRICS_REPORT_PATH,
     MODEL_NAME,
     MODEL_TARGET,
     load_metrics_report,
     load_saved_artifact,
+    use_predictor,
 )
+from manufacturing_dashboard.cache import LRUCache
+from manufacturing_dashboard.data import load_ai4i_dataset, load_ai4i_split
+from manufacturing_dashboard.explain import tree_explainer
+from manufacturing_dashboard.perf import timed
 
 
 DEFAULT_FAILURE_THRESHOLD = 0.5
+# "compiled" serves tree ensembles from flattened node arrays; "sklearn" uses the fitted model.
+MODEL_PREDICTOR = "compiled"
+# Finer than any AI4I sensor's resolution, coarse enough to absorb float32 round-trips.
+PREDICTION_CACHE_DECIMALS = 4
+PREDICTION_CACHE_SIZE = 4096
+EXPLANATION_METHODS = ("shapley", "perturbation")
+# Exact tree attributions cost a table lookup per leaf per row, which only beats re-scoring
+# perturbations on small batches; scripts/benchmark_inference.py measures the crossover.
+EXACT_EXPLANATION_MAX_ROWS = 32
 DERIVED_FEATURES = [
     "oil_temp",
     "hydraulic_temp",
@@ -29,9 +41,13 @@ FAULT_THRESHOLDS = {
 }
 
 
+# Process-wide, shared by every session and the live producer; callers only ever get copies.
+PREDICTION_CACHE = LRUCache(PREDICTION_CACHE_SIZE)
+
+
 @lru_cache(maxsize=1)
 def _runtime_ai4i_artifact():
-    artifact = load_saved_artifact()
+    artifact = load_saved_artifact(MODEL_PREDICTOR)
     if artifact is not None:
         return artifact
 
@@ -43,6 +59,9 @@ def _runtime_ai4i_artifact():
     if training_data["machine_failure"].nunique() < 2:
         return None
 
+    # Fallback-only; the saved artifact path never needs this import.
+    from sklearn.ensemble import RandomForestClassifier
+
     model = RandomForestClassifier(
         n_estimators=250,
         max_depth=8,
@@ -51,14 +70,22 @@ def _runtime_ai4i_artifact():
         random_state=42,
     )
     model.fit(training_data[AI4I_FEATURES], training_data["machine_failure"])
-    return {
+    return use_predictor({
         "model": model,
         "model_name": MODEL_NAME,
         "target": MODEL_TARGET,
         "features": AI4I_FEATURES,
         "threshold": DEFAULT_FAILURE_THRESHOLD,
         "feature_medians": training_data[AI4I_FEATURES].median().to_dict(),
-    }
+    }, MODEL_PREDICTOR)
+
+
+def get_model_version():
+    """Identifier that changes whenever the served model changes."""
+    artifact = _runtime_ai4i_artifact()
+    if artifact is None:
+        return None
+    return artifact.get("trained_at_utc") or artifact.get("model_name", MODEL_NAME)
 
 
 @lru_cache(maxsize=1)
@@ -151,6 +178,8 @@ def _train_threshold_fallback(history_df):
     if data["fault"].nunique() < 2:
         return None
 
+    from sklearn.ensemble import RandomForestClassifier
+
     model = RandomForestClassifier(
         n_estimators=150,
         max_depth=6,
@@ -213,33 +242,66 @@ def _format_feature_value(feature, value):
     return f"{value:.2f}"
 
 
-def _local_feature_contributions(model, selected_row, features, baseline_values, probability):
-    row_frame = selected_row[features].astype(float).to_frame().T
+def explanation_method(model, rows):
+    """Attribution method ``feature_attributions`` uses by default for a batch of ``rows``."""
+    if rows <= EXACT_EXPLANATION_MAX_ROWS and tree_explainer(model) is not None:
+        return "shapley"
+    return "perturbation"
+
+
+@timed("explanation")
+def feature_attributions(model, feature_frame, baseline_values, method=None):
+    """Probability of each row and each feature's contribution to it, in probability points.
+
+    ``"shapley"`` gives exact path-dependent Shapley values from a tree
+    ensemble's fitted trees. ``"perturbation"`` compares each row with
+    copies that reset one feature to its training baseline, all scored in a
+    single ``predict_proba`` call; features without a baseline keep their
+    own value. By default tree ensembles use Shapley values for batches of
+    up to ``EXACT_EXPLANATION_MAX_ROWS`` rows and everything else uses
+    perturbations.
+    """
+    features = list(feature_frame.columns)
+    values = feature_frame.to_numpy(dtype=float)
+    rows, width = values.shape
+    medians = np.array([baseline_values.get(feature, np.nan) for feature in features], dtype=float)
+    baselines = np.where(np.isnan(medians), values, medians)
+
+    explainer = tree_explainer(model)
+    method = method or explanation_method(model, rows)
+    if method not in EXPLANATION_METHODS:
+        raise ValueError(f"Unknown explanation method {method!r}; expected one of {EXPLANATION_METHODS}")
+    if method == "shapley":
+        if explainer is None:
+            raise ValueError(f"Shapley explanations need a tree ensemble, not {type(model).__name__}")
+        probabilities = model.predict_proba(feature_frame)[:, 1]
+        return probabilities, explainer.probability_contributions(values, probabilities), baselines
+
+    stacked = np.repeat(values[:, np.newaxis, :], width + 1, axis=1)
+    positions = np.arange(width)
+    stacked[:, positions + 1, positions] = baselines
+    scored = model.predict_proba(pd.DataFrame(stacked.reshape(-1, width), columns=features))[:, 1]
+    scored = scored.reshape(rows, width + 1)
+    return scored[:, 0], scored[:, :1] - scored[:, 1:], baselines
+
+
+def _local_feature_contributions(features, values, baselines, attributions):
     contributions = []
-
-    for feature in features:
-        baseline_frame = row_frame.copy()
-        baseline_value = float(baseline_values.get(feature, row_frame.iloc[0][feature]))
-        baseline_frame.loc[:, feature] = baseline_value
-        baseline_probability = float(model.predict_proba(baseline_frame)[0, 1])
-        contribution = probability - baseline_probability
+    for feature, value, baseline_value, contribution in zip(features, values, baselines, attributions):
+        contribution = float(contribution)
         contributions.append({
             "feature": feature,
             "label": _feature_label(feature),
-            "value": float(row_frame.iloc[0][feature]),
-            "baseline": baseline_value,
-            "contribution": float(contribution),
+            "value": float(value),
+            "baseline": float(baseline_value),
+            "contribution": contribution,
             "direction": "increased" if contribution >= 0 else "reduced",
         })
 
     return sorted(contributions, key=lambda item: abs(item["contribution"]), reverse=True)
 
 
-def _ai4i_explanation(selected_row, artifact, probability):
-    model = artifact["model"]
-    features = artifact.get("features", AI4I_FEATURES)
-    baselines = artifact.get("feature_medians", {})
-    contributions = _local_feature_contributions(model, selected_row, features, baselines, probability)
+def _ai4i_explanation(selected_row, contributions):
     positive_drivers = [item for item in contributions if item["contribution"] > 0.005]
     rules = _ai4i_rules_explanation(selected_row)
 
@@ -255,64 +317,172 @@ def _ai4i_explanation(selected_row, artifact, probability):
     if rules:
         driver_text += ". Rule checks also flagged: " + ", ".join(rules)
 
-    return driver_text, contributions
+    return driver_text
 
 
-def predict_fault(selected_row: pd.Series, history_df: pd.DataFrame):
-    """Predict failure probability and estimated downtime for one reading."""
-    using_ai4i = all(feature in selected_row for feature in AI4I_FEATURES) and not load_ai4i_dataset().empty
-    threshold = DEFAULT_FAILURE_THRESHOLD
-    contributions = []
-    model_name = MODEL_NAME
+def score_chunks(chunks):
+    """Score AI4I-schema chunks as they stream in, one ``predict_fault_batch`` call per chunk."""
+    for chunk in chunks:
+        yield chunk.join(predict_fault_batch(chunk))
+
+
+def prediction_cache_stats():
+    return PREDICTION_CACHE.stats()
+
+
+def _prediction_key(values, method):
+    """Cache key for one AI4I reading explained with ``method``, or ``None`` when a feature is missing."""
+    if np.isnan(values).any():
+        return None
+    return get_model_version(), method, tuple(np.round(values, PREDICTION_CACHE_DECIMALS).tolist())
 
-    if using_ai4i:
-        artifact = _runtime_ai4i_artifact()
-        if artifact is None:
-            return {
-                "probability": 0.0,
-                "downtime_hours": 0.5,
-                "explanation": "Insufficient data to train predictive model",
-                "threshold": threshold,
-                "predicted_failure": False,
-                "feature_contributions": contributions,
-                "model_name": model_name,
-            }
-        model = artifact["model"]
-        features = artifact.get("features", AI4I_FEATURES)
-        threshold = float(artifact.get("threshold", DEFAULT_FAILURE_THRESHOLD))
-        model_name = artifact.get("model_name", MODEL_NAME)
-        feature_frame = selected_row[features].astype(float).to_frame().T
-        probability = float(model.predict_proba(feature_frame)[0, 1])
-        explanation, contributions = _ai4i_explanation(selected_row, artifact, probability)
-    else:
-        model = _train_threshold_fallback(history_df)
-        if model is None:
-            return {
-                "probability": 0.0,
-                "downtime_hours": 0.5,
-                "explanation": "Insufficient data to train predictive model",
-                "threshold": threshold,
-                "predicted_failure": False,
-                "feature_contributions": contributions,
-                "model_name": "Runtime Threshold Model",
-            }
-        features = DERIVED_FEATURES
-        feature_frame = selected_row[features].astype(float).to_frame().T
-        probability = float(model.predict_proba(feature_frame)[0, 1])
-        explanation = _threshold_explanation(selected_row)
-        model_name = "Runtime Threshold Model"
 
+def _copy_prediction(prediction):
+    return {**prediction, "feature_contributions": [dict(item) for item in prediction["feature_contributions"]]}
+
+
+def _cached_prediction(key):
+    """Copy of the cached prediction for ``key``, so callers cannot change the shared entry."""
+    cached = None if key is None else PREDICTION_CACHE.get(key)
+    return None if cached is None else _copy_prediction(cached)
+
+
+def _cache_prediction(key, prediction):
+    if key is not None:
+        PREDICTION_CACHE.put(key, _copy_prediction(prediction))
+    return prediction
+
+
+def _prediction(probability, threshold, explanation, contributions, model_name):
     if np.isnan(probability):
         probability = 0.0
         explanation = "Prediction unavailable for this reading"
-
-    downtime = max(0.5, probability * 6)
     return {
         "probability": probability,
-        "downtime_hours": downtime,
+        "downtime_hours": max(0.5, probability * 6),
         "explanation": explanation,
         "threshold": threshold,
         "predicted_failure": probability >= threshold,
         "feature_contributions": contributions,
         "model_name": model_name,
     }
+
+
+@timed("predict_fault_batch")
+def predict_fault_batch(frame, history_df=None, explain=False):
+    """Score every row of ``frame`` with one ``predict_proba`` call.
+
+    Returns ``probability``, ``threshold``, ``predicted_failure`` and
+    ``downtime_hours`` columns on ``frame``'s index: the same numbers
+    ``predict_fault`` gives for each row. Without the AI4I features the
+    runtime threshold model is trained on ``history_df``. Rows with no
+    model available, or no usable prediction, score 0.
+
+    With ``explain`` it also returns ``explanation``,
+    ``feature_contributions`` and ``model_name`` as ``predict_fault`` does.
+    Readings already in ``PREDICTION_CACHE`` are reused, and the rest are
+    explained together in one pass. The method follows the batch size, as
+    ``explanation_method`` decides, so batches larger than
+    ``EXACT_EXPLANATION_MAX_ROWS`` get perturbation attributions.
+    """
+    using_ai4i = all(feature in frame.columns for feature in AI4I_FEATURES) and not load_ai4i_dataset().empty
+    threshold = DEFAULT_FAILURE_THRESHOLD
+    model = None
+    if using_ai4i:
+        model_name = MODEL_NAME
+        artifact = _runtime_ai4i_artifact()
+        if artifact is not None:
+            model = artifact["model"]
+            features = artifact.get("features", AI4I_FEATURES)
+            threshold = float(artifact.get("threshold", DEFAULT_FAILURE_THRESHOLD))
+            model_name = artifact.get("model_name", MODEL_NAME)
+    else:
+        model_name = "Runtime Threshold Model"
+        if history_df is not None:
+            model = _train_threshold_fallback(history_df)
+            features = DERIVED_FEATURES
+
+    rows = len(frame)
+    probabilities = np.zeros(rows)
+    explanations = ["Insufficient data to train predictive model"] * rows
+    contributions = [[] for _ in range(rows)]
+    if model is not None and rows:
+        feature_frame = frame[features].astype(float)
+        if explain and using_ai4i:
+            values = feature_frame.to_numpy()
+            # One method for the whole batch, so every row is explained the same way.
+            method = explanation_method(model, rows)
+            keys = [_prediction_key(row_values, method) for row_values in values]
+            predictions = [_cached_prediction(key) for key in keys]
+            uncached = [position for position, prediction in enumerate(predictions) if prediction is None]
+            if uncached:
+                fresh, attributions, baselines = feature_attributions(model, feature_frame.iloc[uncached], artifact.get("feature_medians", {}), method)
+                for offset, position in enumerate(uncached):
+                    row_contributions = _local_feature_contributions(features, values[position], baselines[offset], attributions[offset])
+                    explanation = _ai4i_explanation(frame.iloc[position], row_contributions)
+                    prediction = _prediction(float(fresh[offset]), threshold, explanation, row_contributions, model_name)
+                    predictions[position] = _cache_prediction(keys[position], prediction)
+            probabilities = np.array([prediction["probability"] for prediction in predictions])
+            explanations = [prediction["explanation"] for prediction in predictions]
+            contributions = [prediction["feature_contributions"] for prediction in predictions]
+        else:
+            probabilities = model.predict_proba(feature_frame)[:, 1]
+            if explain:
+                explanations = [_threshold_explanation(frame.iloc[position]) for position in range(rows)]
+
+    unavailable = np.isnan(probabilities)
+    if unavailable.any():
+        probabilities = np.where(unavailable, 0.0, probabilities)
+        for position in np.flatnonzero(unavailable):
+            explanations[position] = "Prediction unavailable for this reading"
+
+    scored = pd.DataFrame({
+        "probability": probabilities,
+        "threshold": threshold,
+        "predicted_failure": probabilities >= threshold,
+        "downtime_hours": np.maximum(0.5, probabilities * 6),
+    }, index=frame.index)
+    if explain:
+        scored["explanation"] = explanations
+        scored["feature_contributions"] = contributions
+        scored["model_name"] = model_name
+    return scored
+
+
+@timed("predict_fault")
+def predict_fault(selected_row: pd.Series, history_df: pd.DataFrame):
+    """Predict failure probability and estimated downtime for one reading.
+
+    AI4I predictions are memoised in ``PREDICTION_CACHE`` by model version
+    and rounded features, so re-scoring an unchanged reading is a lookup.
+    """
+    using_ai4i = all(feature in selected_row for feature in AI4I_FEATURES) and not load_ai4i_dataset().empty
+    threshold = DEFAULT_FAILURE_THRESHOLD
+
+    if using_ai4i:
+        artifact = _runtime_ai4i_artifact()
+        if artifact is None:
+            return _prediction(0.0, threshold, "Insufficient data to train predictive model", [], MODEL_NAME)
+        features = artifact.get("features", AI4I_FEATURES)
+        # Scalar lookups; list-indexing the Series would cost more than a cache hit.
+        values = np.array([selected_row[feature] for feature in features], dtype=float)
+        method = explanation_method(artifact["model"], 1)
+        key = _prediction_key(values, method)
+        cached = _cached_prediction(key)
+        if cached is not None:
+            return cached
+
+        threshold = float(artifact.get("threshold", DEFAULT_FAILURE_THRESHOLD))
+        feature_frame = pd.DataFrame([values], columns=features)
+        probabilities, attributions, baselines = feature_attributions(artifact["model"], feature_frame, artifact.get("feature_medians", {}), method)
+        contributions = _local_feature_contributions(features, values, baselines[0], attributions[0])
+        explanation = _ai4i_explanation(selected_row, contributions)
+        prediction = _prediction(float(probabilities[0]), threshold, explanation, contributions, artifact.get("model_name", MODEL_NAME))
+        return _cache_prediction(key, prediction)
+
+    model = _train_threshold_fallback(history_df)
+    if model is None:
+        return _prediction(0.0, threshold, "Insufficient data to train predictive model", [], "Runtime Threshold Model")
+    feature_frame = selected_row[DERIVED_FEATURES].astype(float).to_frame().T
+    probability = float(model.predict_proba(feature_frame)[0, 1])
+    return _prediction(probability, threshold, _threshold_explanation(selected_row), [], "Runtime Threshold Model")
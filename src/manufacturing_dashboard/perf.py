@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_WINDOW = 500
+PERCENTILES = (50, 95, 99)
+
+
+class StageTimings:
+    """Rolling wall-clock timings for named pipeline stages.
+
+    Each stage keeps its newest ``window`` samples in milliseconds, so the
+    percentiles follow the current workload rather than the whole process
+    lifetime. Recording is one deque append under a lock and is safe from
+    background threads; percentiles are only computed when read.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = int(window)
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counts = {}
+
+    def record(self, stage, ms):
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+            self._samples[stage].append(float(ms))
+            self._counts[stage] += 1
+        return ms
+
+    @contextmanager
+    def measure(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - started) * 1000)
+
+    def timed(self, stage):
+        """Decorator form of ``measure``."""
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.measure(stage):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def last(self, stage, default=None):
+        with self._lock:
+            samples = self._samples.get(stage)
+            return samples[-1] if samples else default
+
+    def clear(self):
+        with self._lock:
+            self._samples = {}
+            self._counts = {}
+
+    def summary(self):
+        """Per-stage count, last, mean and p50/p95/p99 in milliseconds, sorted by stage."""
+        with self._lock:
+            snapshot = {stage: (self._counts[stage], np.fromiter(samples, dtype=float)) for stage, samples in self._samples.items()}
+
+        summary = {}
+        for stage in sorted(snapshot):
+            count, samples = snapshot[stage]
+            row = {
+                "count": count,
+                "window": len(samples),
+                "last_ms": float(samples[-1]),
+                "mean_ms": float(samples.mean()),
+            }
+            for percentile, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+                row[f"p{percentile}_ms"] = float(value)
+            summary[stage] = row
+        return summary
+
+    def to_json(self, path=None):
+        """Summary as JSON for offline comparison; also written to ``path`` when given."""
+        payload = json.dumps({
+            "recorded_at_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "window": self.window,
+            "stages": self.summary(),
+        }, indent=2)
+        if path is not None:
+            Path(path).write_text(payload, encoding="utf-8")
+        return payload
+
+
+# Process-wide, like the simulation engine whose stages it times.
+TIMINGS = StageTimings()
+
+
+def measure(stage):
+    return TIMINGS.measure(stage)
+
+
+def timed(stage):
+    return TIMINGS.timed(stage)
@@ -0,0 +1,186 @@
+import copy
+import datetime
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from manufacturing_dashboard.data import get_live_data, latest_readings, live_machine_count
+
+
+DEFAULT_ROWS_PER_SECOND = 1000
+DEFAULT_TICK_SECONDS = 0.05
+RETAINED_BATCHES = 256
+LAG_WINDOW_TICKS = 200
+
+
+def _checkpoint(replay_state):
+    """Copy of the replay state, safe to hand to another thread and to resume from."""
+    return copy.deepcopy(replay_state)
+
+
+class ReplayEngine:
+    """Emit replay rows at a fixed wall-clock rate on a background thread.
+
+    Every tick advances the replay cursors in ``replay_state`` with one batched
+    ``get_live_data`` call sized to keep the fleet at ``rows_per_second``. If a
+    tick starts more than one interval late, the missed ticks are counted as
+    dropped instead of being replayed in a burst, so the emitted rate never
+    overshoots the target.
+
+    Each batch is queued with a copy of the replay state it ends at, and
+    ``pop_checkpointed`` hands both over together, so a consumer can persist
+    or resume from rows and cursors that match while the thread keeps
+    advancing.
+
+    With ``chunks`` (for example ``iter_replay_chunks(iter_ai4i_chunks(path))``)
+    the rows come from that iterator in order instead, and a chunk is only read
+    once the previous one has been emitted. The thread stops when it runs out.
+    """
+
+    def __init__(
+        self,
+        rows_per_second=DEFAULT_ROWS_PER_SECOND,
+        tick_seconds=DEFAULT_TICK_SECONDS,
+        replay_state=None,
+        sink=None,
+        chunks=None,
+    ):
+        self.rows_per_second = float(rows_per_second)
+        self.tick_seconds = float(tick_seconds)
+        self.replay_state = {} if replay_state is None else replay_state
+        self.sink = sink
+        self.chunks = None if chunks is None else iter(chunks)
+        self._pending = pd.DataFrame()
+        self._exhausted = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._latest = pd.DataFrame()
+        self._batches = deque(maxlen=RETAINED_BATCHES)
+        self._checkpoint = None
+        self._lags = deque(maxlen=LAG_WINDOW_TICKS)
+        self._started_at = None
+        self._machines = 1
+        self._rows = 0
+        self._ticks = 0
+        self._dropped_ticks = 0
+        self._max_lag = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        # Load the replay table before the clock starts so the first tick is not late.
+        # A chunk source is paced in rows, not fleet steps.
+        self._machines = 1 if self.chunks is not None else max(live_machine_count(self.replay_state), 1)
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="replay-engine", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def latest_frame(self):
+        with self._lock:
+            return self._latest
+
+    def pop_batches(self):
+        return self.pop_checkpointed()[0]
+
+    def pop_checkpointed(self):
+        """New rows, and a copy of the replay state just past them (``None`` without rows)."""
+        with self._lock:
+            batches = list(self._batches)
+            checkpoint = self._checkpoint
+            self._batches.clear()
+            self._checkpoint = None
+        if not batches:
+            return pd.DataFrame(), None
+        return pd.concat(batches, ignore_index=True), checkpoint
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+            lags = list(self._lags)
+            return {
+                "target_rows_per_second": self.rows_per_second,
+                "achieved_rows_per_second": self._rows / elapsed if elapsed else 0.0,
+                "rows": self._rows,
+                "ticks": self._ticks,
+                "dropped_ticks": self._dropped_ticks,
+                "lag_ms_last": lags[-1] * 1000 if lags else 0.0,
+                "lag_ms_mean": sum(lags) / len(lags) * 1000 if lags else 0.0,
+                "lag_ms_max": self._max_lag * 1000,
+                "elapsed_seconds": elapsed,
+            }
+
+    def _next_batch(self, steps):
+        if self.chunks is None:
+            return get_live_data(self.replay_state, steps=steps)
+
+        parts = []
+        while steps > 0:
+            if self._pending.empty:
+                chunk = next(self.chunks, None)
+                if chunk is None:
+                    self._exhausted = True
+                    break
+                self._pending = chunk
+            parts.append(self._pending.iloc[:steps])
+            self._pending = self._pending.iloc[steps:]
+            steps -= len(parts[-1])
+        if not parts:
+            return None
+        batch = pd.concat(parts, ignore_index=True)
+        batch["timestamp"] = np.datetime64(datetime.datetime.now(), "us")
+        return batch
+
+    def _run(self):
+        steps_per_second = self.rows_per_second / self._machines
+        owed_steps = 0.0
+        tick = 0
+        next_tick_at = self._started_at
+
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if now < next_tick_at:
+                self._stop.wait(next_tick_at - now)
+                continue
+
+            lag = now - next_tick_at
+            missed = int(lag // self.tick_seconds)
+            # Skip ticks we are too late for rather than bursting to catch up.
+            tick += missed + 1
+            next_tick_at = self._started_at + tick * self.tick_seconds
+
+            owed_steps += steps_per_second * self.tick_seconds
+            steps = int(owed_steps)
+            owed_steps -= steps
+            batch = self._next_batch(steps) if steps else None
+            if batch is not None and self.sink is not None:
+                self.sink(batch)
+            checkpoint = _checkpoint(self.replay_state) if batch is not None else None
+
+            with self._lock:
+                self._ticks += 1
+                self._dropped_ticks += missed
+                self._lags.append(lag)
+                self._max_lag = max(self._max_lag, lag)
+                if batch is not None:
+                    self._rows += len(batch)
+                    self._latest = latest_readings(batch)
+                    self._batches.append(batch)
+                    self._checkpoint = checkpoint
+            if self._exhausted:
+                break
@@ -0,0 +1,244 @@
+import json
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from manufacturing_dashboard.data import COMPACT_SCHEMA, REPLAY_PRODUCT_TYPES, SNAPSHOT_DIR, apply_compact_schema
+from manufacturing_dashboard.perf import timed
+
+
+HISTORY_DB_PATH = SNAPSHOT_DIR / "history.sqlite"
+FLUSH_ROWS = 5_000
+FLUSH_SECONDS = 1.0
+SQL_AGGREGATES = {"sum": "SUM", "avg": "AVG", "min": "MIN", "max": "MAX", "count": "COUNT"}
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _sql_type(dtype):
+    if isinstance(dtype, pd.CategoricalDtype) or dtype.kind == "O":
+        return "TEXT"
+    if dtype.kind in "biuM":
+        return "INTEGER"
+    return "REAL"
+
+
+def _sql_values(series):
+    # sqlite3 only binds Python scalars; timestamps are stored as epoch microseconds.
+    if series.dtype.kind == "M":
+        values = series.to_numpy(dtype="datetime64[us]")
+        missing = np.isnat(values)
+        stamps = values.view(np.int64).tolist()
+        return [None if gap else stamp for gap, stamp in zip(missing, stamps)] if missing.any() else stamps
+    if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype.kind == "O":
+        return series.astype(object).where(series.notna(), None).tolist()
+    return series.tolist()
+
+
+def _machine_categorical(values):
+    extra = sorted(set(values.dropna()) - set(REPLAY_PRODUCT_TYPES))
+    return pd.Categorical(values, categories=REPLAY_PRODUCT_TYPES + extra)
+
+
+def _timestamp_param(value):
+    return int(pd.Timestamp(value).to_datetime64().astype("datetime64[us]").view(np.int64))
+
+
+class DurableHistory:
+    """Append-only SQLite copy of the replay history, for queries and resume.
+
+    The database runs in WAL mode. ``append`` only queues a frame; a writer
+    thread inserts the queue in one transaction every ``flush_seconds``, or
+    sooner once ``flush_rows`` rows are waiting, so appends never wait on
+    disk. Every query flushes first so it always sees the rows appended so
+    far. The replay cursors are saved in the same transaction as the rows
+    they produced.
+
+    Filters and aggregates run inside SQLite on the timestamp index, so callers
+    read only the rows or totals they need, however large the file grows.
+    """
+
+    def __init__(self, path=HISTORY_DB_PATH, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS):
+        self.path = path
+        self.flush_rows = int(flush_rows)
+        self.flush_seconds = float(flush_seconds)
+        self._lock = threading.Lock()
+        self._db_lock = threading.RLock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._pending = []
+        self._pending_rows = 0
+        self._pending_cursors = None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS history (seq INTEGER PRIMARY KEY, timestamp INTEGER, machine_type TEXT)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS history_time ON history (timestamp)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._column_types = self._read_column_types()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._writer.join(timeout=5)
+        with self._db_lock:
+            self.flush()
+            self._connection.close()
+
+    def append(self, frame, replay_state=None):
+        if frame is None or frame.empty:
+            return
+        with self._lock:
+            self._pending.append(frame)
+            self._pending_rows += len(frame)
+            if replay_state is not None and "ai4i_cursors" in replay_state:
+                self._pending_cursors = {product: int(cursor) for product, cursor in replay_state["ai4i_cursors"].items()}
+            if self._pending_rows >= self.flush_rows:
+                self._wake.set()
+
+    @timed("durable_flush")
+    def flush(self):
+        with self._db_lock:
+            with self._lock:
+                pending, cursors = self._pending, self._pending_cursors
+                self._pending = []
+                self._pending_rows = 0
+                self._pending_cursors = None
+            if not pending:
+                return
+            frame = pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+            with self._connection:
+                for column in frame.columns:
+                    if column not in self._column_types:
+                        sql_type = _sql_type(frame[column].dtype)
+                        self._connection.execute(f"ALTER TABLE history ADD COLUMN {_quote(column)} {sql_type}")
+                        self._column_types[column] = sql_type
+                columns = list(frame.columns)
+                self._connection.executemany(
+                    f"INSERT INTO history ({', '.join(map(_quote, columns))}) VALUES ({', '.join('?' * len(columns))})",
+                    zip(*(_sql_values(frame[column]) for column in columns)),
+                )
+                if cursors is not None:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('ai4i_cursors', ?)",
+                        (json.dumps(cursors),),
+                    )
+
+    def clear(self):
+        with self._db_lock:
+            with self._lock:
+                self._pending = []
+                self._pending_rows = 0
+                self._pending_cursors = None
+            with self._connection:
+                self._connection.execute("DELETE FROM history")
+                self._connection.execute("DELETE FROM meta")
+
+    def rows(self, machine=None):
+        where, params = self._where(machine=machine)
+        return int(self._execute(f"SELECT COUNT(*) FROM history{where}", params)[0][0])
+
+    def replay_state(self):
+        """Replay cursors saved with the newest flushed rows, as a fresh ``replay_state`` dict."""
+        rows = self._execute("SELECT value FROM meta WHERE key = 'ai4i_cursors'")
+        return {"ai4i_cursors": json.loads(rows[0][0])} if rows else {}
+
+    def window(self, start=None, end=None, machine=None, columns=None, newest=None):
+        """Rows with ``start <= timestamp < end``, oldest first; ``newest`` keeps only the last N."""
+        with self._db_lock:
+            self.flush()
+            selected = [column for column in (columns or self._column_types) if column in self._column_types]
+            where, params = self._where(start, end, machine)
+            query = f"SELECT {', '.join(map(_quote, selected))} FROM history{where} ORDER BY timestamp DESC, seq DESC"
+            if newest is not None:
+                query += " LIMIT ?"
+                params.append(int(newest))
+            frame = pd.read_sql_query(query, self._connection, params=params)
+        return self._decode(frame.iloc[::-1].reset_index(drop=True))
+
+    def aggregate(self, column, how="sum", start=None, end=None, machine=None):
+        """``how`` of ``column`` per machine between ``start`` and ``end``, computed by SQLite."""
+        with self._db_lock:
+            self.flush()
+            if column not in self._column_types or how not in SQL_AGGREGATES:
+                raise ValueError(f"Cannot aggregate {column!r} with {how!r}")
+            where, params = self._where(start, end, machine)
+            query = (
+                f"SELECT machine_type, {SQL_AGGREGATES[how]}({_quote(column)}) AS {_quote(column)} "
+                f"FROM history{where} GROUP BY machine_type"
+            )
+            frame = pd.read_sql_query(query, self._connection, params=params)
+        frame["machine_type"] = _machine_categorical(frame["machine_type"])
+        return frame.sort_values("machine_type", ignore_index=True)
+
+    def totals(self, columns):
+        """Per-machine rows, non-null counts, sums and sums of squares, for seeding ``RunningAggregates``."""
+        with self._db_lock:
+            self.flush()
+            present = [column for column in columns if column in self._column_types]
+            selections = ["machine_type", "COUNT(*)"]
+            for column in present:
+                quoted = _quote(column)
+                selections += [f"COUNT({quoted})", f"TOTAL({quoted})", f"TOTAL({quoted} * {quoted})"]
+            rows = self._execute(f"SELECT {', '.join(selections)} FROM history GROUP BY machine_type")
+
+        totals = {}
+        for row in rows:
+            stats = np.zeros((3, len(columns)))
+            for offset, column in enumerate(present):
+                stats[:, columns.index(column)] = row[2 + offset * 3:5 + offset * 3]
+            totals[row[0]] = {"rows": int(row[1]), "count": stats[0], "sum": stats[1], "sum_squares": stats[2]}
+        integer_columns = [column for column in present if self._column_types[column] == "INTEGER"]
+        return totals, integer_columns
+
+    def _execute(self, query, params=()):
+        with self._db_lock:
+            self.flush()
+            return self._connection.execute(query, params).fetchall()
+
+    def _where(self, start=None, end=None, machine=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_timestamp_param(start))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(_timestamp_param(end))
+        if machine is not None:
+            clauses.append("machine_type = ?")
+            params.append(str(machine))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _write_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def _read_column_types(self):
+        return {
+            name: declared
+            for _, name, declared, *_ in self._connection.execute("PRAGMA table_info(history)")
+            if name != "seq"
+        }
+
+    def _decode(self, frame):
+        if "timestamp" in frame:
+            frame["timestamp"] = pd.to_datetime(frame["timestamp"], unit="us")
+        if "machine_type" in frame:
+            frame["machine_type"] = _machine_categorical(frame["machine_type"])
+        # Integer columns with gaps come back as floats and stay that way.
+        schema = {
+            column: dtype
+            for column, dtype in COMPACT_SCHEMA.items()
+            if column in frame and column != "machine_type" and not (self._column_types.get(column) == "INTEGER" and frame[column].isna().any())
+        }
+        return apply_compact_schema(frame, schema)
@@ -1,6 +1,5 @@
 import json
 from datetime import datetime, timezone
-from pathlib import Path
 
 import joblib
 import numpy as np
@@ -15,34 +14,32 @@ from sklearn.metrics import (
     recall_score,
     roc_auc_score,
 )
-from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.utils.class_weight import compute_sample_weight
 
+from manufacturing_dashboard.artifacts import (
+    AI4I_FEATURES,
+    METRICS_REPORT_PATH,
+    MODEL_ARTIFACT_PATH,
+    MODEL_COMPARISON_PATH,
+    MODEL_TARGET,
+    MODELS_DIR,
+    PROJECT_ROOT,
+    REPORTS_DIR,
+)
 from manufacturing_dashboard.data import (
+    SPLIT_NAMES,
     SPLIT_RANDOM_STATE,
     TEST_FRACTION,
     TRAIN_FRACTION,
+    compute_split_positions,
+    iter_ai4i_chunks,
     load_ai4i_split,
 )
 
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-MODELS_DIR = PROJECT_ROOT / "models"
-REPORTS_DIR = PROJECT_ROOT / "reports"
-MODEL_ARTIFACT_PATH = MODELS_DIR / "failure_model.joblib"
-METRICS_REPORT_PATH = REPORTS_DIR / "model_metrics.json"
-MODEL_COMPARISON_PATH = REPORTS_DIR / "model_comparison.csv"
-MODEL_NAME = "Random Forest"
-MODEL_TARGET = "Target: Machine failure"
-AI4I_FEATURES = [
-    "air_temperature_k",
-    "process_temperature_k",
-    "rotational_speed_rpm",
-    "torque_nm",
-    "tool_wear_min",
-]
+TRAINING_SAMPLE_ROWS = 2_000_000
 
 
 def _candidate_models():
@@ -90,6 +87,42 @@ def _clean_training_frame(df):
     return df.dropna(subset=required).copy()
 
 
+def collect_model_columns(chunks, max_rows=TRAINING_SAMPLE_ROWS):
+    """Keep the model features and target from streamed chunks, at most ``max_rows`` of them.
+
+    Every row draws a random key and the rows with the ``max_rows`` smallest keys
+    are kept, a uniform sample that never holds more than one chunk beyond the
+    sample itself. Smaller exports are kept whole. Rows stay in file order.
+    """
+    required = AI4I_FEATURES + ["machine_failure"]
+    rng = np.random.default_rng(SPLIT_RANDOM_STATE)
+    sample = None
+    keys = np.empty(0)
+    for chunk in chunks:
+        frame = chunk[required].dropna()
+        sample = frame if sample is None else pd.concat([sample, frame])
+        keys = np.concatenate([keys, rng.random(len(frame))])
+        if len(keys) > max_rows:
+            kept = np.sort(np.argpartition(keys, max_rows)[:max_rows])
+            sample, keys = sample.iloc[kept], keys[kept]
+    if sample is None:
+        return pd.DataFrame(columns=required)
+    return sample.reset_index(drop=True)
+
+
+def _load_splits(dataset_path=None):
+    if dataset_path is None:
+        return {split: _clean_training_frame(load_ai4i_split(split)) for split in SPLIT_NAMES}
+
+    dataset = collect_model_columns(iter_ai4i_chunks(dataset_path))
+    if dataset.empty:
+        return {split: dataset for split in SPLIT_NAMES}
+    return {
+        split: dataset.take(positions).reset_index(drop=True)
+        for split, positions in compute_split_positions(dataset["machine_failure"]).items()
+    }
+
+
 def _fit_candidate(candidate, x_train, y_train):
     model = candidate["model"]
     if candidate.get("use_sample_weight"):
@@ -184,18 +217,15 @@ def _feature_importance(model):
     ]
 
 
-def train_and_save_artifacts():
-    train_df = _clean_training_frame(load_ai4i_split("train"))
-    test_df = _clean_training_frame(load_ai4i_split("test"))
+def train_and_save_artifacts(dataset_path=None):
+    splits = _load_splits(dataset_path)
+    train_df = splits["train"]
+    test_df = splits["test"]
     if train_df.empty or test_df.empty:
         raise RuntimeError("AI4I train/test data is unavailable.")
 
-    train_base, validation_df = train_test_split(
-        train_df,
-        test_size=0.20,
-        random_state=SPLIT_RANDOM_STATE,
-        stratify=train_df["machine_failure"],
-    )
+    train_base = splits["fit"]
+    validation_df = splits["validation"]
 
     x_train = train_base[AI4I_FEATURES]
     y_train = train_base["machine_failure"].astype(int)
@@ -289,15 +319,3 @@ def train_and_save_artifacts():
     }
     METRICS_REPORT_PATH.write_text(json.dumps(report, indent=2), encoding="utf-8")
     return report
-
-
-def load_saved_artifact():
-    if MODEL_ARTIFACT_PATH.exists():
-        return joblib.load(MODEL_ARTIFACT_PATH)
-    return None
-
-
-def load_metrics_report():
-    if METRICS_REPORT_PATH.exists():
-        return json.loads(METRICS_REPORT_PATH.read_text(encoding="utf-8"))
-    return None
@@ -0,0 +1,7 @@
+from pathlib import Path
+import sys
+
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
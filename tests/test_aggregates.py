@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from manufacturing_dashboard.aggregates import RunningAggregates
+
+
+COLUMNS = ["units_produced", "energy_usage"]
+
+
+def _batch(rng, rows, machines):
+    energy = rng.normal(3, 1, rows)
+    energy[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        "machine_type": rng.choice(machines, rows),
+        "units_produced": rng.integers(0, 10, rows),
+        "energy_usage": energy,
+    })
+
+
+def test_running_moments_match_groupby_after_several_appends():
+    rng = np.random.default_rng(3)
+    aggregates = RunningAggregates(COLUMNS)
+    batches = [_batch(rng, rows, ["H", "M", "L", f"X-{rows}"]) for rows in (1, 40, 7, 300, 2)]
+    for batch in batches:
+        aggregates.update(batch)
+    history = pd.concat(batches, ignore_index=True)
+
+    expected = history.groupby("machine_type")[COLUMNS].agg(["count", "sum", "mean", "var"])
+    assert sorted(aggregates.machines()) == sorted(expected.index)
+    for machine, row in expected.iterrows():
+        assert aggregates.rows(machine) == (history["machine_type"] == machine).sum()
+        for column in COLUMNS:
+            assert aggregates.count(column, machine) == row[column, "count"]
+            assert aggregates.sum(column, machine) == pytest.approx(row[column, "sum"])
+            assert aggregates.mean(column, machine) == pytest.approx(row[column, "mean"], nan_ok=True)
+            assert aggregates.var(column, machine) == pytest.approx(row[column, "var"], nan_ok=True)
+    for column in COLUMNS:
+        assert aggregates.mean(column) == pytest.approx(history[column].mean())
+        assert aggregates.var(column) == pytest.approx(history[column].var())
+    assert aggregates.rows() == len(history)
+    assert isinstance(aggregates.sum("units_produced"), int)
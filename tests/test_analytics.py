@@ -0,0 +1,19 @@
+import pandas as pd
+
+from manufacturing_dashboard.analytics import calculate_maintenance_insights
+from manufacturing_dashboard.data import latest_readings, simulate_fleet
+
+
+def test_fleet_insights_match_each_machine_scored_alone():
+    history = simulate_fleet(machines=40, steps=30, seed=11)
+    live = latest_readings(history)
+
+    fleet = calculate_maintenance_insights(live, history).set_index("machine_type")
+
+    assert len(fleet) == 40
+    for machine in live["machine_type"].iloc[::7]:
+        alone = calculate_maintenance_insights(
+            live[live["machine_type"] == machine],
+            history[history["machine_type"] == machine],
+        ).set_index("machine_type")
+        pd.testing.assert_frame_equal(fleet.loc[[machine]], alone, check_categorical=False)
@@ -0,0 +1,23 @@
+from manufacturing_dashboard.cache import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted_and_counted():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "entries": 2,
+        "max_entries": 2,
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+        "hit_rate": 0.75,
+    }
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["hits"] == 0
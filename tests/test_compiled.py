@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from manufacturing_dashboard.artifacts import AI4I_FEATURES, load_saved_artifact
+from manufacturing_dashboard.compiled import SOURCE_BATCH_ROWS, compile_ensemble
+from manufacturing_dashboard.data import load_ai4i_split
+
+
+@pytest.fixture(scope="module")
+def splits():
+    train, test = load_ai4i_split("train"), load_ai4i_split("test")
+    if train.empty:
+        pytest.skip("needs the AI4I dataset")
+    return train[AI4I_FEATURES].astype(float), train["machine_failure"], test[AI4I_FEATURES].astype(float)
+
+
+def test_compiled_probabilities_match_scikit_learn(splits):
+    x, y, test = splits
+    x = x.copy()
+    x.iloc[::11, 3] = np.nan
+    rows = test.head(SOURCE_BATCH_ROWS - 1).copy()
+    rows.iloc[::5, 3] = np.nan
+    models = [
+        RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(x, y),
+        HistGradientBoostingClassifier(max_iter=30, random_state=0).fit(x, y),
+    ]
+    for model in models:
+        compiled = compile_ensemble(model)
+        expected = model.predict_proba(rows)
+        np.testing.assert_array_equal(compiled.predict_proba(rows), expected)
+        np.testing.assert_array_equal(compiled.predict_proba(rows.iloc[:1]), expected[:1])
+        # Columns are matched by name, as scikit-learn does.
+        np.testing.assert_array_equal(compiled.predict_proba(rows[AI4I_FEATURES[::-1]]), expected)
+        np.testing.assert_array_equal(compiled.predict(rows), model.predict(rows))
+
+
+def test_saved_artifact_compiles_to_the_same_probabilities(splits):
+    artifact = load_saved_artifact("sklearn")
+    if artifact is None:
+        pytest.skip("needs the saved model artifact")
+    compiled = load_saved_artifact("compiled")
+    rows = splits[2].head(200)
+    np.testing.assert_array_equal(compiled["model"].predict_proba(rows), artifact["model"].predict_proba(rows))
+
+
+def test_models_without_trees_are_not_compiled(splits):
+    x, y, _ = splits
+    assert compile_ensemble(LogisticRegression(max_iter=2000).fit(x, y)) is None
+    assert compile_ensemble(RandomForestClassifier(n_estimators=2).fit(x, pd.Series(np.arange(len(y)) % 3))) is None
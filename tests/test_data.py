@@ -0,0 +1,149 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from manufacturing_dashboard import data as data_module
+from manufacturing_dashboard.data import (
+    COMPACT_SCHEMA,
+    DATASET_PATH,
+    FAILURE_LABELS,
+    KELVIN_OFFSET,
+    get_live_data,
+    iter_ai4i_chunks,
+    load_ai4i_split,
+    load_replay_table,
+    simulate_fleet,
+)
+
+
+@pytest.fixture
+def export_path(tmp_path, monkeypatch):
+    if not DATASET_PATH.exists():
+        pytest.skip("needs the AI4I dataset")
+    monkeypatch.setattr(data_module, "SNAPSHOT_DIR", tmp_path / ".cache")
+    path = tmp_path / "export.csv"
+    pd.read_csv(DATASET_PATH, nrows=2000).to_csv(path, index=False)
+    return path
+
+
+def test_prepared_columns_match_the_row_by_row_definitions(export_path):
+    raw = pd.read_csv(export_path)
+    prepared = pd.concat(iter_ai4i_chunks(export_path), ignore_index=True)
+
+    for column, dtype in COMPACT_SCHEMA.items():
+        if column in prepared:
+            assert prepared[column].dtype == dtype, column
+    np.testing.assert_allclose(prepared["air_temp_c"], raw["Air temperature [K]"] - KELVIN_OFFSET, rtol=1e-6)
+    np.testing.assert_allclose(prepared["process_temp_c"], raw["Process temperature [K]"] - KELVIN_OFFSET, rtol=1e-6)
+    np.testing.assert_allclose(prepared["power_kw"], raw["Torque [Nm]"] * raw["Rotational speed [rpm]"] / 9550, rtol=1e-6)
+    expected_failure_types = [
+        ", ".join(label for flag, label in FAILURE_LABELS.items() if row[flag] == 1) or "None"
+        for _, row in raw.iterrows()
+    ]
+    assert prepared["failure_type"].astype(str).tolist() == expected_failure_types
+
+
+def test_snapshot_round_trips_and_is_rebuilt_when_the_csv_changes(export_path, monkeypatch):
+    monkeypatch.setattr(data_module, "DATASET_PATH", export_path)
+    load = data_module.load_ai4i_dataset
+    load.cache_clear()
+    try:
+        parsed = load()
+        snapshot = data_module._load_snapshot(export_path)
+        assert snapshot.dtypes.equals(parsed.dtypes)
+        assert snapshot.equals(parsed)
+
+        # Same bytes with a new modification time keep the snapshot.
+        stat = export_path.stat()
+        os.utime(export_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert data_module._load_snapshot(export_path) is not None
+
+        changed = pd.read_csv(export_path)
+        changed.loc[0, "Torque [Nm]"] += 1
+        changed.to_csv(export_path, index=False)
+        assert data_module._load_snapshot(export_path) is None
+        load.cache_clear()
+        assert load()["torque_nm"].iloc[0] == pytest.approx(parsed["torque_nm"].iloc[0] + 1)
+        assert data_module._load_snapshot(export_path) is not None
+    finally:
+        load.cache_clear()
+
+
+def test_seeded_fleet_simulation_is_reproducible():
+    first = simulate_fleet(machines=50, steps=20, seed=5).drop(columns="timestamp")
+    again = simulate_fleet(machines=50, steps=20, seed=5).drop(columns="timestamp")
+    other = simulate_fleet(machines=50, steps=20, seed=6).drop(columns="timestamp")
+
+    pd.testing.assert_frame_equal(first, again)
+    assert not first.equals(other)
+    assert first["oil_temp"].notna().all()
+
+
+def test_replay_steps_look_up_the_precomputed_split_rows():
+    table = load_replay_table()
+    if not table:
+        pytest.skip("replay needs the AI4I dataset")
+    split = load_ai4i_split("test")
+    machine = table["machines"]["M"]
+    replay_state = {"ai4i_cursors": {"M": machine["length"] - 2}}
+
+    for step in range(4):
+        row = get_live_data(replay_state)
+        row = row[row["machine_type"] == "M"].drop(columns="timestamp").reset_index(drop=True)
+        source = split[split["product_type"] == "M"].iloc[[(machine["length"] - 2 + step) % machine["length"]]]
+        expected = data_module._dashboard_frame_from_ai4i(source.reset_index(drop=True), pd.NaT).drop(columns="timestamp")
+        pd.testing.assert_frame_equal(row, expected)
+    assert replay_state["ai4i_cursors"]["M"] == machine["length"] + 2
+
+
+@pytest.mark.parametrize("synthetic", [False, True])
+def test_fast_forward_matches_single_steps(synthetic):
+    if synthetic:
+        batched_state, stepped_state = {"fleet_size": 12, "seed": 3}, {"fleet_size": 12, "seed": 3}
+        advance = data_module._get_synthetic_steps
+    elif load_replay_table():
+        length = load_replay_table()["machines"]["H"]["length"]
+        # Start near the end of one machine's rows so the batch wraps around.
+        batched_state, stepped_state = {"ai4i_cursors": {"H": length - 3}}, {"ai4i_cursors": {"H": length - 3}}
+        advance = get_live_data
+    else:
+        pytest.skip("replay needs the AI4I dataset")
+
+    batched = advance(batched_state, 7)
+    stepped = pd.concat([advance(stepped_state, 1) for _ in range(7)], ignore_index=True)
+
+    assert len(batched) == len(stepped)
+    assert batched["timestamp"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(batched.drop(columns="timestamp"), stepped.drop(columns="timestamp"))
+    if synthetic:
+        for component in ("bearing_wear", "lubrication_stress", "hydraulic_stress"):
+            np.testing.assert_array_equal(batched_state["fleet"][component], stepped_state["fleet"][component])
+    else:
+        assert batched_state["ai4i_cursors"] == stepped_state["ai4i_cursors"]
+
+
+def test_split_udis_are_persisted_and_reused(export_path, monkeypatch):
+    monkeypatch.setattr(data_module, "DATASET_PATH", export_path)
+    caches = (data_module.load_ai4i_dataset, data_module.load_split_udis)
+    for cache in caches:
+        cache.cache_clear()
+    try:
+        splits = data_module.load_split_udis()
+        udis = data_module.load_ai4i_dataset()["udi"].to_numpy()
+        assert np.array_equal(np.sort(np.concatenate([splits["train"], splits["test"]])), np.sort(udis))
+        assert np.array_equal(np.sort(np.concatenate([splits["fit"], splits["validation"]])), np.sort(splits["train"]))
+        assert len(splits["test"]) == round(len(udis) * data_module.TEST_FRACTION)
+
+        def recompute(labels):
+            raise AssertionError("split was recomputed instead of read back")
+
+        monkeypatch.setattr(data_module, "compute_split_positions", recompute)
+        data_module.load_split_udis.cache_clear()
+        reloaded = data_module.load_split_udis()
+        for split in data_module.SPLIT_NAMES:
+            assert np.array_equal(reloaded[split], splits[split])
+    finally:
+        for cache in caches:
+            cache.cache_clear()
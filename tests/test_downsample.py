@@ -0,0 +1,34 @@
+import numpy as np
+
+from manufacturing_dashboard.downsample import SeriesDownsampler
+
+
+def test_retained_window_matches_one_shot_downsample():
+    rng = np.random.default_rng(7)
+    timestamps = np.arange(3000)
+    values = rng.normal(size=3000)
+    downsampler = SeriesDownsampler(40)
+
+    for total in range(0, 3000, 37):
+        start = max(total - 250, 0)
+        x, y = downsampler.update(timestamps[start:total], values[start:total], total=total)
+        one_shot = SeriesDownsampler(40)
+        one_shot.bucket_rows = downsampler.bucket_rows
+        expected_x, expected_y = one_shot.update(timestamps[start:total], values[start:total], total=total)
+
+        assert len(x) <= 40
+        assert x.min(initial=start) >= start
+        assert np.array_equal(x, expected_x)
+        assert np.array_equal(y, expected_y)
+
+
+def test_boundary_bucket_drops_evicted_spike():
+    downsampler = SeriesDownsampler(4)
+    values = np.zeros(64)
+    values[1] = 100.0
+    downsampler.update(np.arange(64), values)
+
+    x, y = downsampler.update(np.arange(2, 66), np.zeros(64), total=66)
+
+    assert x.min() >= 2
+    assert y.max() == 0.0
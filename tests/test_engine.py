@@ -0,0 +1,115 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from manufacturing_dashboard import engine as engine_module
+from manufacturing_dashboard.data import load_replay_table
+from manufacturing_dashboard.engine import SimulationEngine
+from manufacturing_dashboard.storage import DurableHistory
+
+
+def _replayed_rows(replay_state, machines):
+    return {
+        product: cursor - machines[product]["start"]
+        for product, cursor in replay_state["ai4i_cursors"].items()
+    }
+
+
+def test_live_replay_saves_cursors_with_their_rows(tmp_path, monkeypatch):
+    machines = load_replay_table().get("machines")
+    if not machines:
+        pytest.skip("replay needs the AI4I dataset")
+    monkeypatch.setattr(engine_module, "LIVE_REPLAY_ROWS_PER_SECOND", 3000)
+    durable = DurableHistory(tmp_path / "history.sqlite")
+    engine = SimulationEngine(durable=durable)
+    engine.ensure_started()
+    engine.start_live()
+    try:
+        published = 0
+        deadline = time.monotonic() + 10
+        while published < 2 and time.monotonic() < deadline:
+            if engine.has_frame():
+                engine.poll()
+                published += 1
+            time.sleep(0.02)
+        assert published == 2
+        # The replay thread is still running, as it would be at a crash.
+        durable.flush()
+        saved = _replayed_rows(durable.replay_state(), machines)
+        assert saved == {product: durable.rows(product) for product in saved}
+    finally:
+        engine.stop_live()
+        durable.close()
+
+
+def _assert_replayed_without_gaps(history, replay_state, table):
+    udis = table["columns"]["udi"]
+    for product, cursor in replay_state["ai4i_cursors"].items():
+        machine = table["machines"][product]
+        positions = machine["offset"] + (machine["start"] + np.arange(cursor - machine["start"])) % machine["length"]
+        # History is ordered by timestamp, not by replay position, so compare the rows as sets.
+        replayed = np.sort(history.loc[history["machine_type"] == product, "udi"].to_numpy())
+        assert np.array_equal(replayed, np.sort(np.asarray(udis.take(positions))))
+
+
+def test_stepping_after_live_replay_continues_from_the_last_published_row(monkeypatch):
+    table = load_replay_table()
+    if not table:
+        pytest.skip("replay needs the AI4I dataset")
+    monkeypatch.setattr(engine_module, "LIVE_REPLAY_ROWS_PER_SECOND", 3000)
+    engine = SimulationEngine()
+    engine.ensure_started()
+    engine.step(steps=3)
+    engine.start_live()
+    try:
+        deadline = time.monotonic() + 10
+        while not engine.has_frame() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        engine.poll()
+        # Let the replay thread run ahead of the last published frame.
+        time.sleep(0.3)
+    finally:
+        engine.stop_live()
+    engine.step(steps=2)
+
+    _assert_replayed_without_gaps(engine.snapshot()["history_df"], engine.replay_state, table)
+
+
+def test_slow_derived_value_does_not_block_other_keys():
+    engine = SimulationEngine()
+    snapshot = {"version": 1}
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append("slow")
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(engine.derived(snapshot, "slow", slow))) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    assert started.wait(5)
+
+    assert engine.derived(snapshot, "fast", lambda: "fast") == "fast"
+    release.set()
+    for worker in workers:
+        worker.join(5)
+    assert results == ["slow", "slow"]
+    assert calls == ["slow"]
+
+
+def test_failed_derived_value_is_retried():
+    engine = SimulationEngine()
+    snapshot = {"version": 1}
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        engine.derived(snapshot, "key", fail)
+    assert engine.derived(snapshot, "key", lambda: 3) == 3
@@ -0,0 +1,87 @@
+import math
+from itertools import combinations
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+
+from manufacturing_dashboard.artifacts import AI4I_FEATURES
+from manufacturing_dashboard.compiled import compile_ensemble
+from manufacturing_dashboard.data import load_ai4i_split
+from manufacturing_dashboard.explain import tree_explainer
+
+
+@pytest.fixture(scope="module")
+def training():
+    train = load_ai4i_split("train")
+    if train.empty:
+        pytest.skip("needs the AI4I dataset")
+    return train[AI4I_FEATURES].to_numpy(dtype=float)[:3000], train["machine_failure"].to_numpy()[:3000]
+
+
+def _models(x, y):
+    forest = RandomForestClassifier(n_estimators=6, max_depth=4, random_state=0).fit(x, y)
+    boosting = HistGradientBoostingClassifier(max_iter=8, max_leaf_nodes=6, random_state=0).fit(x, y)
+    return [(forest, lambda rows: forest.predict_proba(rows)[:, 1]), (boosting, boosting.decision_function)]
+
+
+def _path_expectation(ensemble, row, known):
+    # Features outside ``known`` follow both branches, weighted by training cover.
+    def walk(node):
+        if ensemble.is_leaf[node]:
+            return ensemble.leaf_output()[node]
+        feature = ensemble.feature[node]
+        if feature in known:
+            value = row[feature]
+            left = ensemble.missing_left[node] if np.isnan(value) else value <= ensemble.threshold[node]
+            return walk(ensemble.left[node] if left else ensemble.right[node])
+        left, right = ensemble.left[node], ensemble.right[node]
+        return (ensemble.cover[left] * walk(left) + ensemble.cover[right] * walk(right)) / ensemble.cover[node]
+
+    return ensemble.base_value + sum(walk(root) for root in ensemble.roots)
+
+
+def _brute_force_shapley(ensemble, row):
+    width = len(row)
+    row = ensemble._input(row[np.newaxis, :])[0]
+    values = np.zeros(width)
+    for feature in range(width):
+        others = [other for other in range(width) if other != feature]
+        for size in range(width):
+            weight = math.factorial(size) * math.factorial(width - size - 1) / math.factorial(width)
+            for known in combinations(others, size):
+                with_feature = _path_expectation(ensemble, row, {*known, feature})
+                values[feature] += weight * (with_feature - _path_expectation(ensemble, row, set(known)))
+    return values
+
+
+def test_attributions_add_up_and_match_brute_force_shapley(training):
+    x, y = training
+    rows = x[-40:].copy()
+    for model, raw_output in _models(x, y):
+        explainer = tree_explainer(model)
+        attributions = explainer.shap_values(rows)
+        np.testing.assert_allclose(attributions.sum(axis=1) + explainer.expected_value, raw_output(rows), atol=1e-9)
+
+        ensemble = compile_ensemble(model)
+        for row in rows[:3]:
+            np.testing.assert_allclose(explainer.shap_values(row[np.newaxis, :])[0], _brute_force_shapley(ensemble, row), atol=1e-9)
+
+        probabilities = model.predict_proba(rows)[:, 1]
+        contributions = explainer.probability_contributions(rows, probabilities)
+        expected_probability = explainer.expected_value if explainer.output == "probability" else 1 / (1 + math.exp(-explainer.expected_value))
+        np.testing.assert_allclose(contributions.sum(axis=1), probabilities - expected_probability, atol=1e-9)
+
+
+def test_missing_values_follow_the_learned_branch(training):
+    x, y = training
+    x = x.copy()
+    x[::9, 4] = np.nan
+    boosting = HistGradientBoostingClassifier(max_iter=8, max_leaf_nodes=6, random_state=0).fit(x, y)
+    explainer = tree_explainer(boosting)
+    rows = x[:18]
+
+    attributions = explainer.shap_values(rows)
+
+    np.testing.assert_allclose(attributions.sum(axis=1) + explainer.expected_value, boosting.decision_function(rows), atol=1e-9)
+    np.testing.assert_allclose(attributions[0], _brute_force_shapley(compile_ensemble(boosting), rows[0]), atol=1e-9)
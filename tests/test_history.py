@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from manufacturing_dashboard.history import HistoryStore, machine_tail
+
+
+def _batch(seconds, machines="HML"):
+    seconds = np.asarray(seconds)
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(seconds, unit="s"),
+        "machine_type": pd.Categorical([machines[second % len(machines)] for second in seconds], categories=list("HML")),
+        "value": seconds.astype(float),
+    })
+
+
+def test_frames_are_unchanged_by_evicting_appends():
+    store = HistoryStore(60)
+    store.append(_batch(np.arange(60)))
+    frame = store.frame()
+    expected = frame.copy()
+
+    for start in range(60, 400, 7):
+        store.append(_batch(np.arange(start, start + 7)))
+
+    assert frame.equals(expected)
+    assert machine_tail(frame, "M", 3)["value"].tolist() == [52.0, 55.0, 58.0]
+    assert store.frame()["value"].tolist() == list(np.arange(343, 403, dtype=float))
+
+
+def test_frames_are_unchanged_by_merges():
+    store = HistoryStore(100)
+    store.append(_batch(np.arange(0, 40, 2)))
+    frame = store.frame()
+    expected = frame.copy()
+
+    store.append(_batch(np.arange(1, 40, 2)))
+
+    assert frame.equals(expected)
+    assert store.reorders == 1
+    assert store.frame()["value"].tolist() == list(np.arange(40, dtype=float))
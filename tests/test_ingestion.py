@@ -0,0 +1,106 @@
+import json
+import socket
+import time
+
+import pytest
+
+from manufacturing_dashboard import ingestion
+from manufacturing_dashboard.ingestion import IngestionServer, _validate_reading
+
+
+READING = {
+    "product_type": "M",
+    "udi": 7,
+    "air_temperature_k": 298.1,
+    "process_temperature_k": 308.6,
+    "rotational_speed_rpm": 1551,
+    "torque_nm": 42.8,
+    "tool_wear_min": 0,
+}
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = IngestionServer(unix_path=tmp_path / "ingest.sock", batch_max_wait=0.02).start()
+    yield server
+    server.stop()
+
+
+def _send(server, *lines):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(str(server.unix_path))
+        client.sendall(b"".join(line.encode() + b"\n" for line in lines))
+
+
+def test_validate_reading_coerces_fields():
+    reading = _validate_reading({**READING, "udi": "12", "TWF": "1", "extra": [1, 2]})
+
+    assert reading["udi"] == 12
+    assert reading["TWF"] == 1
+    assert reading["machine_failure"] == 0
+    assert reading["rotational_speed_rpm"] == 1551.0
+    assert "extra" not in reading
+
+
+@pytest.mark.parametrize("reading", [
+    [1, 2],
+    "reading",
+    {**READING, "product_type": "X"},
+    {**READING, "udi": "abc"},
+    {**READING, "udi": -1},
+    {**READING, "udi": 2 ** 40},
+    {**READING, "torque_nm": "high"},
+    {**READING, "torque_nm": float("nan")},
+    {**READING, "torque_nm": 1e300},
+    {**READING, "machine_failure": 2},
+    {key: value for key, value in READING.items() if key != "tool_wear_min"},
+])
+def test_validate_reading_rejects_malformed(reading):
+    with pytest.raises((ValueError, TypeError, KeyError)):
+        _validate_reading(reading)
+
+
+def test_malformed_lines_are_rejected_without_dropping_the_connection(server):
+    _send(
+        server,
+        "[1, 2]",
+        '"reading"',
+        json.dumps({**READING, "udi": "abc"}),
+        json.dumps({**READING, "torque_nm": None}),
+        json.dumps(READING),
+    )
+
+    assert _wait_for(lambda: server.stats()["readings"] == 1)
+    assert server.stats()["rejected"] == 4
+    assert server.latest_frame()["udi"].tolist() == [7]
+
+
+def test_failed_batch_conversion_keeps_the_batcher_running(server, monkeypatch):
+    convert = ingestion.readings_to_dashboard_frame
+    calls = []
+
+    def fail_once(readings):
+        calls.append(len(readings))
+        if len(calls) == 1:
+            raise ValueError("bad batch")
+        return convert(readings)
+
+    monkeypatch.setattr(ingestion, "readings_to_dashboard_frame", fail_once)
+    _send(server, json.dumps(READING))
+    assert _wait_for(lambda: server.stats()["rejected_batches"] == 1)
+
+    _send(server, json.dumps({**READING, "udi": 8}))
+    assert _wait_for(lambda: server.stats()["readings"] == 1)
+    stats = server.stats()
+    assert stats["rejected"] == 1
+    assert stats["queued"] == 0
+    assert server.latest_frame()["udi"].tolist() == [8]
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from manufacturing_dashboard import model as model_module
+from manufacturing_dashboard.artifacts import AI4I_FEATURES
+from manufacturing_dashboard.data import load_ai4i_split, simulate_fleet
+from manufacturing_dashboard.model import feature_attributions, predict_fault, predict_fault_batch
+
+
+@pytest.fixture
+def readings():
+    test = load_ai4i_split("test")
+    if test.empty or model_module._runtime_ai4i_artifact() is None:
+        pytest.skip("scoring needs the AI4I dataset and a model")
+    # Failures first, so both outcomes are scored.
+    return pd.concat([test[test["machine_failure"] == 1].head(5), test.head(15)]).set_index(np.arange(100, 120))
+
+
+def test_batch_scores_match_single_readings(readings):
+    scored = predict_fault_batch(readings, explain=True)
+
+    assert scored.index.equals(readings.index)
+    assert scored["predicted_failure"].any()
+    for index, row in readings.iterrows():
+        single = predict_fault(row, None)
+        for column in ("probability", "threshold", "predicted_failure", "downtime_hours", "explanation", "model_name"):
+            assert scored.at[index, column] == pytest.approx(single[column]), column
+
+
+def test_batch_without_ai4i_features_uses_the_threshold_model():
+    history = simulate_fleet(machines=30, steps=40, seed=2)
+    history.loc[history.index[::7], "vibration"] = 12.0
+    live = history.tail(4)
+
+    scored = predict_fault_batch(live, history)
+
+    for index, row in live.iterrows():
+        assert scored.at[index, "probability"] == pytest.approx(predict_fault(row, history)["probability"])
+    assert (predict_fault_batch(live)["probability"] == 0).all()
+
+
+class _CountingModel:
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def predict_proba(self, frame):
+        self.calls += 1
+        return self.model.predict_proba(frame)
+
+
+def test_perturbation_attributions_are_scored_in_one_call(readings):
+    from sklearn.linear_model import LogisticRegression
+
+    train = load_ai4i_split("train")
+    fitted = LogisticRegression(max_iter=2000).fit(train[AI4I_FEATURES], train["machine_failure"])
+    model = _CountingModel(fitted)
+    medians = train[AI4I_FEATURES].median().to_dict()
+    del medians["torque_nm"]
+    features = readings[AI4I_FEATURES].astype(float)
+
+    probabilities, attributions, baselines = feature_attributions(model, features, medians, "perturbation")
+
+    assert model.calls == 1
+    np.testing.assert_allclose(probabilities, fitted.predict_proba(features)[:, 1])
+    for position, feature in enumerate(AI4I_FEATURES):
+        reset = features.copy()
+        if feature in medians:
+            reset[feature] = medians[feature]
+        expected = probabilities - fitted.predict_proba(reset)[:, 1]
+        np.testing.assert_allclose(attributions[:, position], expected, atol=1e-12)
+    np.testing.assert_array_equal(baselines[:, AI4I_FEATURES.index("torque_nm")], features["torque_nm"])
+
+
+def test_cached_predictions_cannot_be_changed_by_callers(readings):
+    model_module.PREDICTION_CACHE.clear()
+    row = readings.iloc[0]
+    first = predict_fault(row, None)
+    first["probability"] = -1.0
+    first["feature_contributions"][0]["contribution"] = 99.0
+    first["feature_contributions"].clear()
+
+    hit = predict_fault(row, None)
+    assert model_module.PREDICTION_CACHE.stats()["hits"] == 1
+    assert 0 <= hit["probability"] <= 1
+    assert len(hit["feature_contributions"]) == len(AI4I_FEATURES)
+    assert all(item["contribution"] != 99.0 for item in hit["feature_contributions"])
+
+    hit["feature_contributions"][0]["contribution"] = 99.0
+    scored = predict_fault_batch(readings.iloc[:1], explain=True)
+    assert scored["feature_contributions"].iloc[0][0]["contribution"] != 99.0
+    assert scored["probability"].iloc[0] == hit["probability"]
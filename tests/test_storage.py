@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from manufacturing_dashboard.data import load_replay_table
+from manufacturing_dashboard.engine import SimulationEngine
+from manufacturing_dashboard.storage import DurableHistory
+
+
+def _batch(first, rows):
+    seconds = np.arange(first, first + rows)
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(seconds, unit="s"),
+        "machine_type": pd.Categorical(np.array(["H", "M", "L"])[seconds % 3], categories=["L", "M", "H"]),
+        "units_produced": (seconds % 7).astype(np.int64),
+        "energy_usage": np.where(seconds % 5 == 0, np.nan, seconds * 0.5),
+    })
+
+
+def test_rows_aggregates_and_cursors_survive_a_reopen(tmp_path):
+    path = tmp_path / "history.sqlite"
+    batches = [_batch(0, 40), _batch(40, 25)]
+    durable = DurableHistory(path)
+    durable.append(batches[0], {"ai4i_cursors": {"H": 14, "M": 13, "L": 13}})
+    durable.append(batches[1], {"ai4i_cursors": {"H": 22, "M": 22, "L": 21}})
+    durable.close()
+
+    durable = DurableHistory(path)
+    try:
+        history = pd.concat(batches, ignore_index=True)
+        assert durable.rows() == len(history)
+        assert durable.rows("M") == (history["machine_type"] == "M").sum()
+        assert durable.replay_state() == {"ai4i_cursors": {"H": 22, "M": 22, "L": 21}}
+
+        window = durable.window()
+        assert window["timestamp"].tolist() == history["timestamp"].tolist()
+        assert window["machine_type"].astype(str).tolist() == history["machine_type"].astype(str).tolist()
+        np.testing.assert_allclose(window["energy_usage"], history["energy_usage"])
+
+        start, end = pd.Timestamp(10, unit="s"), pd.Timestamp(50, unit="s")
+        selected = history[(history["timestamp"] >= start) & (history["timestamp"] < end) & (history["machine_type"] == "L")]
+        assert durable.window(start, end, machine="L")["timestamp"].tolist() == selected["timestamp"].tolist()
+        assert durable.window(newest=3)["timestamp"].tolist() == history["timestamp"].tail(3).tolist()
+
+        sums = durable.aggregate("energy_usage", "sum").set_index("machine_type")["energy_usage"]
+        expected = history.groupby("machine_type", observed=True)["energy_usage"].sum()
+        for machine, total in expected.items():
+            assert sums[machine] == pytest.approx(total)
+
+        totals, integer_columns = durable.totals(["units_produced", "energy_usage"])
+        assert "units_produced" in integer_columns
+        for machine, group in history.groupby("machine_type", observed=True):
+            assert totals[machine]["rows"] == len(group)
+            assert totals[machine]["count"].tolist() == [len(group), group["energy_usage"].count()]
+            np.testing.assert_allclose(totals[machine]["sum"], group[["units_produced", "energy_usage"]].sum())
+            np.testing.assert_allclose(totals[machine]["sum_squares"], (group[["units_produced", "energy_usage"]] ** 2).sum())
+    finally:
+        durable.close()
+
+
+def test_engine_resumes_history_kpis_and_replay_state(tmp_path):
+    path = tmp_path / "history.sqlite"
+    durable = DurableHistory(path)
+    engine = SimulationEngine(durable=durable)
+    engine.ensure_started()
+    for _ in range(4):
+        engine.step(steps=3)
+    before = engine.snapshot()
+    replay_state = {key: value for key, value in engine.replay_state.items() if key == "ai4i_cursors"}
+    durable.close()
+
+    durable = DurableHistory(path)
+    try:
+        resumed = SimulationEngine(durable=durable)
+        after = resumed.snapshot()
+        assert len(after["history_df"]) == len(before["history_df"])
+        assert after["history_df"]["timestamp"].tolist() == before["history_df"]["timestamp"].tolist()
+        assert after["kpis"].rows() == before["kpis"].rows()
+        assert after["kpis"].mean("units_produced") == pytest.approx(before["kpis"].mean("units_produced"))
+        assert after["kpis"].var("energy_usage") == pytest.approx(before["kpis"].var("energy_usage"))
+        if load_replay_table():
+            assert resumed.replay_state == replay_state
+    finally:
+        durable.close()
@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from manufacturing_dashboard.artifacts import AI4I_FEATURES
+from manufacturing_dashboard.data import DATASET_PATH, iter_ai4i_chunks, iter_replay_chunks
+from manufacturing_dashboard.replay import ReplayEngine
+from manufacturing_dashboard.training import collect_model_columns
+
+
+@pytest.fixture
+def export_path(tmp_path):
+    if not DATASET_PATH.exists():
+        pytest.skip("streaming tests read the AI4I dataset")
+    path = tmp_path / "export.csv"
+    pd.read_csv(DATASET_PATH, nrows=1000).to_csv(path, index=False)
+    return path
+
+
+def test_training_sample_is_bounded_and_keeps_small_exports_whole(export_path):
+    # Number the rows through tool wear so sampled rows can be located in the file.
+    export = pd.read_csv(export_path)
+    export["Tool wear [min]"] = np.arange(len(export))
+    export.to_csv(export_path, index=False)
+    columns = AI4I_FEATURES + ["machine_failure"]
+    whole = pd.concat(iter_ai4i_chunks(export_path, 128), ignore_index=True)[columns]
+
+    kept = collect_model_columns(iter_ai4i_chunks(export_path, 128))
+    pd.testing.assert_frame_equal(kept, whole)
+
+    sample = collect_model_columns(iter_ai4i_chunks(export_path, 128), max_rows=300)
+    assert len(sample) == 300
+    # Real rows of the file, still in file order.
+    located = sample["tool_wear_min"].to_numpy().astype(int)
+    pd.testing.assert_frame_equal(sample, whole.take(located).reset_index(drop=True))
+    assert (np.diff(located) > 0).all()
+    # Drawn from across the file, not only from the first chunks.
+    assert located.max() > 900
+    pd.testing.assert_frame_equal(sample, collect_model_columns(iter_ai4i_chunks(export_path, 128), max_rows=300))
+
+
+def test_replay_reads_chunks_in_order_and_stops_at_the_end(export_path):
+    read = []
+
+    def chunks():
+        for chunk in iter_ai4i_chunks(export_path, 100):
+            read.append(len(chunk))
+            yield chunk
+
+    engine = ReplayEngine(rows_per_second=4000, tick_seconds=0.01, chunks=iter_replay_chunks(chunks()))
+    assert not read
+    engine.start()
+    batches = []
+    deadline = time.monotonic() + 10
+    while engine.running and time.monotonic() < deadline:
+        batches.append(engine.pop_batches())
+        time.sleep(0.02)
+    batches.append(engine.pop_batches())
+
+    replayed = pd.concat(batches, ignore_index=True)
+    assert not engine.running
+    assert replayed["udi"].tolist() == list(range(1, 1001))
+    assert replayed["timestamp"].notna().all()
+    assert len(read) == 10